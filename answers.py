@@ -0,0 +1,125 @@
+import re
+import sys
+import html
+import argparse
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+# --- Configuration ---
+CONFIG = {
+    "CACHE_SIZE": 1 << 17,
+}
+
+# Bump this whenever the normalization rules change; archive_db rebuilds its cached
+# answer ids when it does not match.
+CANONICAL_VERSION = 1
+
+# j-archive answers mark optional words with parentheses ("(Abraham) Lincoln") and
+# titles with quotes ("\"Moby-Dick\""); the same answer also turns up with or without a
+# leading article ("the Nile"), with HTML entities, or with accents ("Türkiye").
+
+_PARENTHESIZED = re.compile(r'\([^)]*\)')
+_LEADING_ARTICLE = re.compile(r'^(?:the|an|a)\s+', re.IGNORECASE)
+_DROPPED = re.compile(r"[.'\"`‘’“”]")
+_SEPARATORS = re.compile(r'[^\w&]+')
+_AMPERSAND = re.compile(r'\s*&\s*')
+_SURROUNDING_QUOTES = "\"'‘’“” "
+_WHITESPACE = re.compile(r'\s+')
+
+def _without_optional_parts(text):
+    stripped = _PARENTHESIZED.sub(' ', text)
+    # An answer that is entirely parenthesized keeps its contents.
+    return stripped if stripped.strip() else text.replace('(', ' ').replace(')', ' ')
+
+def _without_article(text):
+    stripped = _LEADING_ARTICLE.sub('', text)
+    return stripped if stripped else text
+
+@lru_cache(maxsize=CONFIG["CACHE_SIZE"])
+def canonical_answer(answer):
+    """
+    Returns the matching key for an answer: entities decoded, optional parenthesized
+    parts, quotes, punctuation and a leading article removed, accents folded and case
+    folded. "the Nile", "Nile" and "NILE" all become "nile"; "" means no usable answer.
+    """
+    text = _without_optional_parts(html.unescape(answer))
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _AMPERSAND.sub(' and ', _DROPPED.sub('', text))
+    text = _SEPARATORS.sub(' ', text).strip()
+    return sys.intern(_without_article(text))
+
+@lru_cache(maxsize=CONFIG["CACHE_SIZE"])
+def display_answer(answer):
+    """Returns a readable form of an answer: the same clean-up as canonical_answer, but keeping case, accents and punctuation."""
+    text = _without_optional_parts(html.unescape(answer))
+    text = _WHITESPACE.sub(' ', text).strip(_SURROUNDING_QUOTES)
+    return sys.intern(_without_article(text))
+
+class AnswerVocabulary:
+    """
+    Assigns a small integer id to every canonical answer, in first-seen order, and
+    remembers the first display form seen for it as the group's label.
+    """
+
+    def __init__(self, entries=()):
+        self.keys = []
+        self.labels = []
+        self._ids = {}
+        for key, label in entries:
+            self._ids[key] = len(self.keys)
+            self.keys.append(sys.intern(key))
+            self.labels.append(sys.intern(label))
+
+    def id_of(self, answer):
+        """Returns the id for an answer, or None if it has no usable canonical form."""
+        key = canonical_answer(answer)
+        if not key:
+            return None
+        answer_id = self._ids.get(key)
+        if answer_id is None:
+            answer_id = self._ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(display_answer(answer))
+        return answer_id
+
+    def label_of(self, answer):
+        """Returns the label of the answer's group, or None if it has no usable canonical form."""
+        answer_id = self.id_of(answer)
+        return None if answer_id is None else self.labels[answer_id]
+
+    def __len__(self):
+        return len(self.keys)
+
+def canonical_map(names):
+    """Re-keys a {name: value} lookup table (states, countries, elements) by canonical answer."""
+    return {canonical_answer(name): value for name, value in names.items()}
+
+
+if __name__ == "__main__":
+    import game_store
+
+    parser = argparse.ArgumentParser(description="Show how answer canonicalization groups the archive's answers.")
+    parser.add_argument("data_path", nargs="?", default="data")
+    parser.add_argument("--top-n", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = Counter()
+    vocabulary = AnswerVocabulary()
+    variants = {}
+    for _, game in game_store.iter_games(game_store.list_games(args.data_path), typed=True):
+        for _, _, clue in game.iter_clues():
+            raw[clue.answer] += 1
+            answer_id = vocabulary.id_of(clue.answer)
+            if answer_id is not None:
+                variants.setdefault(answer_id, Counter())[clue.answer] += 1
+
+    print(f"{len(raw)} distinct raw answers -> {len(vocabulary)} canonical answers")
+    print(f"canonical_answer cache: {canonical_answer.cache_info()}")
+    merged = sorted(variants.items(), key=lambda kv: (-len(kv[1]), -sum(kv[1].values())))
+    for answer_id, forms in merged[:args.top_n]:
+        if len(forms) < 2:
+            break
+        shown = ", ".join(f"{form!r} x{count}" for form, count in forms.most_common(5))
+        print(f"  {vocabulary.labels[answer_id]:<30} {shown}")
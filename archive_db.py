@@ -0,0 +1,365 @@
+import os
+import csv
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+from collections import Counter, defaultdict
+import game_store
+import answers
+from instrumentation import RunReport
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "DB_PATH": "cache/archive.sqlite",
+    "BATCH_SIZE": 500,
+}
+
+# The archive is flattened into games, categories and clues. Clue rows repeat their game's
+# season and their category's round and name so most questions need no joins. answer_id
+# points at the clue's canonical answer (see answers.py), computed once at load time.
+# The database is a cache of data/: when SCHEMA_VERSION or answers.CANONICAL_VERSION
+# changes, it is dropped and rebuilt from scratch.
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    game_id     TEXT PRIMARY KEY,
+    season      TEXT NOT NULL,
+    season_num  INTEGER,
+    url         TEXT
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id          INTEGER PRIMARY KEY,
+    game_id     TEXT NOT NULL REFERENCES games(game_id),
+    round       TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    name        TEXT,
+    clue_count  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id         INTEGER PRIMARY KEY,
+    canonical  TEXT NOT NULL UNIQUE,
+    label      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clues (
+    id                 INTEGER PRIMARY KEY,
+    category_id        INTEGER NOT NULL REFERENCES categories(id),
+    game_id            TEXT NOT NULL,
+    season             TEXT NOT NULL,
+    season_num         INTEGER,
+    round              TEXT NOT NULL,
+    category           TEXT,
+    position           INTEGER NOT NULL,
+    clue               TEXT NOT NULL,
+    answer             TEXT NOT NULL,
+    answer_id          INTEGER REFERENCES answers(id),
+    value              TEXT NOT NULL,
+    dollars            INTEGER,
+    daily_double       INTEGER NOT NULL,
+    triple_stumper     INTEGER NOT NULL,
+    right_contestants  TEXT NOT NULL,
+    wrong_contestants  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_categories_name ON categories(name);
+CREATE INDEX IF NOT EXISTS idx_clues_category_id ON clues(category_id);
+CREATE INDEX IF NOT EXISTS idx_clues_season_answer ON clues(season_num, answer_id);
+CREATE INDEX IF NOT EXISTS idx_clues_category ON clues(category);
+CREATE INDEX IF NOT EXISTS idx_clues_answer ON clues(answer_id);
+"""
+
+# Named queries runnable from the CLI. Parameters use sqlite's :name syntax.
+QUERIES = {
+    # Same counts as bump_chart.analyze_answer_frequencies, one row per (season, answer).
+    "answer_frequencies": """
+        SELECT season_num AS season, answers.label AS answer, COUNT(*) AS count
+        FROM clues JOIN answers ON answers.id = clues.answer_id
+        WHERE season_num IS NOT NULL
+        GROUP BY season_num, answer_id
+        ORDER BY season_num, MIN(clues.id)
+    """,
+    "top_answers": """
+        SELECT answers.label AS answer, COUNT(*) AS count, COUNT(DISTINCT clues.answer) AS variants
+        FROM clues JOIN answers ON answers.id = clues.answer_id
+        GROUP BY answer_id
+        ORDER BY count DESC
+        LIMIT :limit
+    """,
+    # Category appearance, clue and stumper counts as used by stumper_graph.aggregate_category_data.
+    "category_data": """
+        SELECT name AS category, COUNT(*) AS appearances, SUM(clue_count) AS clues,
+               SUM(COALESCE(stumpers.count, 0)) AS stumpers
+        FROM categories
+        LEFT JOIN (SELECT category_id, SUM(triple_stumper) AS count FROM clues GROUP BY category_id) AS stumpers
+            ON stumpers.category_id = categories.id
+        WHERE name != '' AND clue_count > 0 AND instr(py_lower(name), 'potpourri') = 0
+        GROUP BY name
+        ORDER BY appearances DESC, name
+    """,
+    "stumper_rate_by_value": """
+        SELECT dollars, daily_double, COUNT(*) AS clues, SUM(triple_stumper) AS stumpers,
+               ROUND(1.0 * SUM(triple_stumper) / COUNT(*), 4) AS stumper_rate
+        FROM clues
+        WHERE dollars IS NOT NULL
+        GROUP BY dollars, daily_double
+        ORDER BY daily_double, dollars
+    """,
+    "top_answers_by_category": """
+        SELECT answers.label AS answer, COUNT(*) AS count
+        FROM clues JOIN answers ON answers.id = clues.answer_id
+        WHERE category = :category
+        GROUP BY answer_id
+        ORDER BY count DESC, answers.label
+        LIMIT :limit
+    """,
+    # Like category_data, but with spelling variants merged through the category alias table.
+    "canonical_categories": """
+        SELECT canonical_category(name) AS category, COUNT(*) AS appearances, COUNT(DISTINCT name) AS variants
+        FROM categories
+        WHERE name != '' AND clue_count > 0
+        GROUP BY canonical_category(name)
+        ORDER BY appearances DESC, category
+        LIMIT :limit
+    """,
+    "seasons": """
+        SELECT season, COUNT(DISTINCT game_id) AS games, COUNT(*) AS clues, SUM(triple_stumper) AS stumpers
+        FROM clues
+        GROUP BY season
+        ORDER BY season_num, season
+    """,
+}
+
+def _season_num(season):
+    try:
+        return int(season)
+    except ValueError:
+        return None
+
+def connect(db_path=None):
+    """
+    Opens (creating or rebuilding if needed) the archive database. Python's str.strip/title/lower,
+    answers.canonical_answer and the category alias table (canonical_category) are registered
+    as SQL functions so queries can match the chart scripts exactly.
+    """
+    db_path = db_path or CONFIG["DB_PATH"]
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _register_functions(conn)
+
+    version = _version()
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    stored = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone() if "meta" in tables else None
+    if tables and (stored is None or stored[0] != version):
+        logging.info(f"Archive database {db_path} is out of date (version {stored[0] if stored else 'unknown'}); rebuilding")
+        for table in tables:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.executescript(SCHEMA)
+    conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+    conn.commit()
+    return conn
+
+def connect_readonly(db_path=None):
+    """
+    Opens an existing, up-to-date archive database without writing to it. Returns None if the
+    database is missing or was built by an older schema; `build` is what creates and upgrades it.
+    """
+    db_path = db_path or CONFIG["DB_PATH"]
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        stored = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    except sqlite3.DatabaseError:
+        stored = None
+    if stored is None or stored[0] != _version():
+        conn.close()
+        return None
+    _register_functions(conn)
+    return conn
+
+def _version():
+    return f"{SCHEMA_VERSION}.{answers.CANONICAL_VERSION}"
+
+def _register_functions(conn):
+    conn.create_function("py_strip", 1, lambda s: s.strip() if s is not None else None, deterministic=True)
+    conn.create_function("py_title", 1, lambda s: s.title() if s is not None else None, deterministic=True)
+    conn.create_function("py_lower", 1, lambda s: s.lower() if s is not None else None, deterministic=True)
+    conn.create_function("canonical_answer", 1, lambda s: answers.canonical_answer(s) if s is not None else None, deterministic=True)
+    # Category aliases come from the persisted table (see categories.py); built separately.
+    from categories import load_aliases
+    category_aliases = load_aliases()
+    conn.create_function("canonical_category", 1, lambda s: category_aliases.get(s, s), deterministic=True)
+
+def _insert_game(conn, game, vocabulary):
+    season_num = _season_num(game.season)
+    conn.execute("INSERT INTO games VALUES (?, ?, ?, ?)", (game.game_id, game.season, season_num, game.url))
+    clue_rows = []
+    for round_data in game.rounds:
+        for position, category in enumerate(round_data.categories):
+            category_id = conn.execute(
+                "INSERT INTO categories (game_id, round, position, name, clue_count) VALUES (?, ?, ?, ?, ?)",
+                (game.game_id, round_data.name, position, category.name, len(category.clues))
+            ).lastrowid
+            for clue_position, clue in enumerate(category.clues):
+                clue_rows.append((
+                    category_id, game.game_id, game.season, season_num, round_data.name, category.name,
+                    clue_position, clue.clue, clue.answer, vocabulary.id_of(clue.answer), clue.value, clue.dollars, clue.daily_double,
+                    clue.triple_stumper, json.dumps(clue.right_contestants), json.dumps(clue.wrong_contestants)
+                ))
+    conn.executemany(
+        "INSERT INTO clues (category_id, game_id, season, season_num, round, category, position, clue, answer, "
+        "answer_id, value, dollars, daily_double, triple_stumper, right_contestants, wrong_contestants) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        clue_rows
+    )
+
+def _insert_answers(conn, vocabulary, start):
+    """Stores the vocabulary entries from id `start` on; returns the new vocabulary size."""
+    conn.executemany(
+        "INSERT INTO answers VALUES (?, ?, ?)",
+        ((answer_id, vocabulary.keys[answer_id], vocabulary.labels[answer_id]) for answer_id in range(start, len(vocabulary)))
+    )
+    return len(vocabulary)
+
+def build(data_path=None, db_path=None):
+    """
+    Loads every game under data_path that is not in the database yet. The archive only
+    ever grows, so rebuilding after a scrape only inserts the new games. Returns the number added.
+    """
+    conn = connect(db_path)
+    known = {row[0] for row in conn.execute("SELECT game_id FROM games")}
+    locators = [loc for loc in game_store.list_games(data_path or CONFIG["DATA_PATH"]) if game_store.game_id_of(loc) not in known]
+    logging.info(f"{len(known)} games already in the database, {len(locators)} to add")
+
+    # Answer ids are shared with earlier builds, so load the existing vocabulary first.
+    vocabulary = answers.AnswerVocabulary(conn.execute("SELECT canonical, label FROM answers ORDER BY id"))
+    known_answers = len(vocabulary)
+
+    added = 0
+    with conn:
+        for _, game in game_store.iter_games(locators, typed=True):
+            if game.game_id in known:
+                continue
+            known.add(game.game_id)
+            _insert_game(conn, game, vocabulary)
+            added += 1
+            if added % CONFIG["BATCH_SIZE"] == 0:
+                known_answers = _insert_answers(conn, vocabulary, known_answers)
+                conn.commit()
+                logging.info(f"Added {added}/{len(locators)} games")
+        _insert_answers(conn, vocabulary, known_answers)
+    conn.execute("ANALYZE")
+    conn.close()
+    return added
+
+def query(sql, params=(), conn=None):
+    """Runs a query and returns (column names, rows)."""
+    own_conn = conn is None
+    conn = conn or connect()
+    try:
+        cursor = conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description or ()]
+        return columns, cursor.fetchall()
+    finally:
+        if own_conn:
+            conn.close()
+
+def _int_seasons(conn):
+    _, rows = query("SELECT DISTINCT season_num FROM games WHERE season_num IS NOT NULL ORDER BY season_num", conn=conn)
+    return [row[0] for row in rows]
+
+def answer_frequencies(conn=None):
+    """Returns {season: Counter(answer -> count)}, the same result as bump_chart.analyze_answer_frequencies."""
+    _, rows = query(QUERIES["answer_frequencies"], conn=conn)
+    season_answer_counts = {season: Counter() for season in _int_seasons(conn)}
+    for season, answer, count in rows:
+        season_answer_counts[season][answer] = count
+    return season_answer_counts
+
+def category_data(conn=None):
+    """Returns the same five mappings as stumper_graph.aggregate_category_data."""
+    stumper_texts = defaultdict(list)
+    category_counts = defaultdict(int)
+    total_stumper_counts = defaultdict(int)
+    stumper_clues = defaultdict(list)
+    category_clue_counts = defaultdict(int)
+
+    _, rows = query(QUERIES["category_data"], conn=conn)
+    for name, appearances, clues, _ in rows:
+        category_counts[name] = appearances
+        category_clue_counts[name] = clues
+
+    _, rows = query("""
+        SELECT category, clue, answer FROM clues
+        WHERE triple_stumper AND category != '' AND instr(py_lower(category), 'potpourri') = 0
+        ORDER BY id
+    """, conn=conn)
+    for name, clue, answer in rows:
+        total_stumper_counts[name] += 1
+        stumper_texts[name].append(f'{clue} {answer}')
+        stumper_clues[name].append({"clue": clue, "answer": answer})
+
+    return stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts
+
+def _parse_params(pairs):
+    params = {}
+    for pair in pairs or ():
+        key, _, value = pair.partition('=')
+        params[key] = int(value) if value.lstrip('-').isdigit() else value
+    return params
+
+def _print_rows(columns, rows, output_format):
+    if output_format == "json":
+        print(json.dumps([dict(zip(columns, row)) for row in rows], indent=4))
+    elif output_format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        cells = [[str(v) if v is not None else "" for v in row] for row in rows]
+        widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+        print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        print("  ".join("-" * w for w in widths))
+        for row in cells:
+            print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Query the scraped archive with SQL.")
+    parser.add_argument("--db", default=CONFIG["DB_PATH"], help="SQLite database path.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Load new games from the data directory.")
+    build_parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    query_parser = subparsers.add_parser("query", help="Run SQL or a named query.")
+    query_parser.add_argument("sql", help=f"A SELECT statement, or one of: {', '.join(QUERIES)}")
+    query_parser.add_argument("--param", action="append", metavar="NAME=VALUE", help="Query parameter (repeatable).")
+    query_parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    subparsers.add_parser("queries", help="List the named queries.")
+    args = parser.parse_args()
+    CONFIG["DB_PATH"] = args.db
+
+    if args.command == "build":
+        report = RunReport("archive_db")
+        with report.stage("build") as stage:
+            stage.items = build(args.data_path, args.db)
+        report.finish()
+    elif args.command == "queries":
+        for name, sql in QUERIES.items():
+            print(f"-- {name}\n{sql.strip()}\n")
+    else:
+        sql = QUERIES.get(args.sql, args.sql)
+        start = time.perf_counter()
+        columns, rows = query(sql, _parse_params(args.param))
+        _print_rows(columns, rows, args.format)
+        print(f"({len(rows)} rows in {time.perf_counter() - start:.3f}s)", file=sys.stderr)
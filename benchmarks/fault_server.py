@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic_corpus
+
+# --- Configuration ---
+CONFIG = {
+    "HOST": "127.0.0.1",
+    "PORT": 8765,
+    "SEASONS": 3,
+    "GAMES_PER_SEASON": 20,
+    "SEED": synthetic_corpus.CONFIG["SEED"],
+    "THROTTLE_RATE": 0.08,   # share of requests answered 429 with Retry-After
+    "ERROR_RATE": 0.08,      # ...answered 500/503
+    "SLOW_RATE": 0.04,       # ...stalled for SLOW_SECONDS before answering
+    "DROP_RATE": 0.04,       # ...closed without a response
+    "SLOW_SECONDS": 2.0,
+    "RETRY_AFTER": 1,
+    "MAX_RATE": 20,          # requests per second above which every request gets a 429
+}
+
+# A local stand-in for j-archive: the same index, season and game pages the scraper
+# reads (game pages rendered from synthetic_corpus), with random faults injected. The
+# index and season pages list oldest first, so the crawler's newest-first ordering is
+# its own doing. `--check` crawls it and verifies the result.
+
+class FaultServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, seed=None):
+        super().__init__(address, FaultHandler)
+        self.rng = random.Random(CONFIG["SEED"] if seed is None else seed)
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.stats = Counter()
+        self.served_games = []
+        first = synthetic_corpus.CONFIG["FIRST_GAME_ID"]
+        self.games = {}
+        for season in range(1, CONFIG["SEASONS"] + 1):
+            for game_id in range(first, first + CONFIG["GAMES_PER_SEASON"]):
+                self.games[game_id] = season
+            first += CONFIG["GAMES_PER_SEASON"]
+
+    def handle_error(self, request, client_address):
+        # Stalled responses usually find the client already gone after its timeout.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/"
+
+    def pick_fault(self):
+        """Returns the fault to inject for the next request, or None."""
+        with self.lock:
+            now = time.monotonic()
+            self.recent.append(now)
+            while self.recent and self.recent[0] < now - 1:
+                self.recent.popleft()
+            self.stats["requests"] += 1
+            if len(self.recent) > CONFIG["MAX_RATE"]:
+                fault = "overloaded"
+            else:
+                roll = self.rng.random()
+                fault = None
+                for name in ("THROTTLE", "ERROR", "SLOW", "DROP"):
+                    if roll < CONFIG[f"{name}_RATE"]:
+                        fault = name.lower()
+                        break
+                    roll -= CONFIG[f"{name}_RATE"]
+            if fault:
+                self.stats[fault] += 1
+            return fault
+
+class FaultHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=()):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            with server.lock:
+                return self._send(200, json.dumps(server.stats), "application/json")
+
+        fault = server.pick_fault()
+        if fault in ("throttle", "overloaded"):
+            return self._send(429, "Too Many Requests", headers=[("Retry-After", str(CONFIG["RETRY_AFTER"]))])
+        if fault == "error":
+            return self._send(server.rng.choice([500, 503]), "Server Error")
+        if fault == "drop":
+            self.close_connection = True
+            return
+        if fault == "slow":
+            time.sleep(CONFIG["SLOW_SECONDS"])
+
+        query = parse_qs(url.query)
+        if url.path == "/":
+            links = "".join(f'<a href="showseason.php?season={s}">Season {s}</a>' for s in range(1, CONFIG["SEASONS"] + 1))
+            return self._send(200, f"<html><body>{links}</body></html>")
+        if url.path == "/showseason.php" and query.get("season", [""])[0].isdigit():
+            season = int(query["season"][0])
+            links = "".join(f'<a href="showgame.php?game_id={g}">#{g}</a>' for g, s in server.games.items() if s == season)
+            return self._send(200, f"<html><body>{links}</body></html>")
+        if url.path == "/showgame.php" and query.get("game_id", [""])[0].isdigit():
+            game_id = int(query["game_id"][0])
+            if game_id in server.games:
+                with server.lock:
+                    server.served_games.append(game_id)
+                game = synthetic_corpus.generate_game(server.games[game_id], game_id, CONFIG["SEED"])
+                return self._send(200, synthetic_corpus.render_game_html(game))
+        self._send(404, "Not Found")
+
+def start(port=0, seed=None):
+    """Starts a fault server on a background thread and returns it."""
+    server = FaultServer((CONFIG["HOST"], port), seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def check(storage="json"):
+    """Crawls a fault server into a temporary directory and verifies every game arrived intact. Returns True on success."""
+    import crawler
+    import game_store
+    from instrumentation import RunReport
+
+    crawler.CONFIG.update(
+        TIMEOUT=(1, CONFIG["SLOW_SECONDS"] / 2), BACKOFF_BASE=0.05, BACKOFF_MAX=2.0,
+        MAX_RETRIES=6, RATE=10.0, MIN_RATE=1.0, MAX_RATE=2 * CONFIG["MAX_RATE"], RATE_INCREASE=0.5,
+    )
+    server = start()
+    data_dir = tempfile.mkdtemp(prefix="fault_crawl_")
+    try:
+        start_time = time.perf_counter()
+        report = RunReport("fault_check")
+        stats = crawler.crawl(data_dir, storage, server.base_url, report=report)
+        elapsed = time.perf_counter() - start_time
+
+        stored = {int(game_store.game_id_of(loc)): loc for loc in game_store.list_games(data_dir)}
+        missing = sorted(set(server.games) - set(stored))
+        corrupt = [
+            game_id for game_id, loc in stored.items()
+            if game_store.load_game(loc)["rounds"] != synthetic_corpus.generate_game(server.games[game_id], game_id, CONFIG["SEED"])["rounds"]
+        ]
+        newest_first = sorted(server.games, key=lambda g: (-server.games[g], -g))
+        first_pass = list(dict.fromkeys(server.served_games))
+        in_order = first_pass[:CONFIG["GAMES_PER_SEASON"] // 2] == newest_first[:CONFIG["GAMES_PER_SEASON"] // 2]
+
+        rerun = crawler.crawl(data_dir, storage, server.base_url, report=RunReport("fault_check_rerun"))
+
+        print(f"Crawled {len(stored)}/{len(server.games)} games in {elapsed:.1f}s through {server.stats['requests']} requests")
+        print("  injected: " + ", ".join(f"{name}={server.stats[name]}" for name in ("throttle", "overloaded", "error", "slow", "drop")))
+        print("  crawler:  " + ", ".join(f"{name}={count}" for name, count in sorted(stats.items())))
+        print(f"  missing={len(missing)} corrupt={len(corrupt)} newest_first={in_order} "
+              f"rerun_saved={rerun['games_saved']} rerun_skipped={rerun['already_stored']}")
+        return not missing and not corrupt and in_order and rerun["games_saved"] == 0
+    finally:
+        server.shutdown()
+        shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve a fault-injecting stand-in for j-archive.")
+    parser.add_argument("--port", type=int, default=CONFIG["PORT"])
+    parser.add_argument("--seasons", type=int, default=CONFIG["SEASONS"])
+    parser.add_argument("--games-per-season", type=int, default=CONFIG["GAMES_PER_SEASON"])
+    parser.add_argument("--fault-scale", type=float, default=1.0, help="Multiplies every fault rate.")
+    parser.add_argument("--check", action="store_true", help="Crawl the server into a temporary directory and verify the result.")
+    parser.add_argument("--storage", choices=["json", "jsonl"], default="json", help="Storage layout for --check.")
+    args = parser.parse_args()
+    CONFIG.update(SEASONS=args.seasons, GAMES_PER_SEASON=args.games_per_season)
+    for name in ("THROTTLE_RATE", "ERROR_RATE", "SLOW_RATE", "DROP_RATE"):
+        CONFIG[name] *= args.fault_scale
+
+    if args.check:
+        sys.exit(0 if check(args.storage) else 1)
+    server = FaultServer((CONFIG["HOST"], args.port))
+    print(f"Serving {len(server.games)} games with injected faults at {server.base_url} (stats at /stats)")
+    server.serve_forever()
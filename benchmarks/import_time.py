@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# --- Configuration ---
+CONFIG = {
+    "ENTRY_POINTS": [
+        "scraper",
+        "stumper_graph",
+        "bump_chart",
+        "years",
+        "us_states",
+        "world_map",
+        "periodic_table",
+        "archive_db",
+    ],
+    "TOP_N_IMPORTS": 10,
+    "REPO_ROOT": os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+}
+
+def parse_importtime(stderr):
+    """
+    Parses `python -X importtime` output into a list of
+    {"module", "self_us", "cumulative_us", "depth"} records.
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        stripped = name.lstrip()
+        records.append({
+            "module": stripped.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(stripped) - 1) // 2,
+        })
+    return records
+
+def measure_entry_point(module_name):
+    """Imports one entry point in a fresh interpreter and reports where the time went."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=CONFIG["REPO_ROOT"],
+        capture_output=True,
+        text=True,
+    )
+    wall_s = time.perf_counter() - start
+
+    records = parse_importtime(result.stderr)
+
+    # Nested imports are reported before their parent, one indent level deeper.
+    own, children = None, []
+    for record in records:
+        if record["depth"] == 1:
+            children.append(record)
+        elif record["depth"] == 0:
+            if record["module"] == module_name:
+                own = record
+                break
+            children = []
+    slowest = sorted(children, key=lambda r: r["cumulative_us"], reverse=True)
+
+    return {
+        "entry_point": module_name,
+        "ok": result.returncode == 0,
+        "error": result.stderr.strip().splitlines()[-1] if result.returncode != 0 and result.stderr.strip() else None,
+        "process_wall_s": round(wall_s, 4),
+        "import_cumulative_s": round(own["cumulative_us"] / 1e6, 4) if own else None,
+        "modules_imported": len(records),
+        "slowest_imports": [
+            {"module": r["module"], "cumulative_s": round(r["cumulative_us"] / 1e6, 4)}
+            for r in slowest[:CONFIG["TOP_N_IMPORTS"]]
+        ],
+    }
+
+def print_summary(results):
+    """Prints a human-readable import-time table."""
+    print(f"{'entry point':<16} {'import (s)':>10} {'process (s)':>12} {'modules':>8}")
+    for r in results:
+        import_s = f"{r['import_cumulative_s']:.3f}" if r['import_cumulative_s'] is not None else "failed"
+        print(f"{r['entry_point']:<16} {import_s:>10} {r['process_wall_s']:>12.3f} {r['modules_imported']:>8}")
+        for item in r["slowest_imports"][:3]:
+            print(f"    {item['module']:<30} {item['cumulative_s']:.3f}s")
+        if r["error"]:
+            print(f"    error: {r['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import time of each entry point.")
+    parser.add_argument("modules", nargs="*", default=CONFIG["ENTRY_POINTS"])
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    results = [measure_entry_point(name) for name in args.modules]
+    print_summary(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"python": sys.version, "results": results}, f, indent=4)
+        print(f"Import-time report saved to {args.json_path}")
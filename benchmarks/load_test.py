@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+from collections import Counter
+from urllib.parse import urlsplit, quote
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- Configuration ---
+CONFIG = {
+    "URL": "http://127.0.0.1:8000",
+    "CONCURRENCY": 32,
+    "REQUESTS": 5000,
+    "SEED": 1984,
+    "STARTUP_TIMEOUT": 600,
+}
+
+# Drives server.py over keep-alive connections with a mix of endpoints and parameters
+# (so both cache hits and misses are exercised) and reports latency percentiles and
+# throughput. With --start it launches the server itself on a data directory first.
+
+def request_paths(base_url, rng, count):
+    """Builds a random mix of API paths from what the server reports it has loaded."""
+    def fetch(path):
+        with urllib.request.urlopen(base_url + path, timeout=30) as response:
+            return json.load(response)
+
+    seasons = [row["season"] for row in fetch("/api/seasons") if str(row["season"]).isdigit()] or ["1"]
+    seasons = sorted(int(s) for s in seasons)
+    states = [row["entity"] for row in fetch("/api/entities/state?n=50")["entities"]] or ["CA"]
+    leaders = fetch(f"/api/leaderboard/{seasons[-1]}?n=20")["leaderboard"]
+    names = [str(row["player_id"]) for row in leaders] or ["Ken Jennings"]
+    health = fetch("/api/health")
+    categories = fetch("/api/categories")["categories"] if health["graph_categories"] else []
+
+    def season_range():
+        first = rng.choice(seasons)
+        return f"{first}-{min(seasons[-1], first + rng.randint(0, 5))}"
+
+    makers = [
+        lambda: f"/api/entities/{rng.choice(['state', 'country', 'element', 'year'])}?seasons={season_range()}&n=20",
+        lambda: f"/api/entities/state/{rng.choice(states)}?seasons={season_range()}",
+        lambda: f"/api/answers/top?seasons={season_range()}&n={rng.choice([10, 20, 50])}",
+        lambda: f"/api/contestants/{quote(rng.choice(names), safe='')}",
+        lambda: f"/api/leaderboard/{rng.choice(seasons)}?n=20",
+        lambda: "/api/seasons",
+    ]
+    if categories:
+        makers.append(lambda: f"/api/categories/{quote(rng.choice(categories), safe='')}/neighbours?n=10")
+    return [rng.choice(makers)() for _ in range(count)]
+
+async def _worker(host, port, queue, latencies, statuses, byte_counts, gzip_enabled):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            headers = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            if gzip_enabled:
+                headers += "Accept-Encoding: gzip\r\n"
+            start = time.perf_counter()
+            writer.write((headers + "\r\n").encode('latin-1'))
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode('latin-1').split("\r\n")
+            length = 0
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[int(lines[0].split(" ")[1])] += 1
+            byte_counts.append(length)
+    finally:
+        writer.close()
+
+async def run_load(base_url, paths, concurrency, gzip_enabled=True):
+    """Sends every path once over `concurrency` keep-alive connections. Returns the report dict."""
+    url = urlsplit(base_url)
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies, statuses, byte_counts = [], Counter(), []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(url.hostname, url.port or 80, queue, latencies, statuses, byte_counts, gzip_enabled)
+        for _ in range(min(concurrency, len(paths)))
+    ))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return round(1000 * ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 3) if ordered else None
+
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": round(1000 * ordered[-1], 3) if ordered else None,
+        "mean_bytes": round(sum(byte_counts) / len(byte_counts)) if byte_counts else 0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+def start_server(data_path, port):
+    """Launches server.py and waits until it answers /api/health. Returns the process."""
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "server.py"), data_path, "--port", str(port)],
+                               cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + CONFIG["STARTUP_TIMEOUT"]
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server.py exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("server.py did not start in time")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the JSON API and report latency percentiles and throughput.")
+    parser.add_argument("--url", default=CONFIG["URL"])
+    parser.add_argument("--requests", type=int, default=CONFIG["REQUESTS"])
+    parser.add_argument("--concurrency", type=int, default=CONFIG["CONCURRENCY"])
+    parser.add_argument("--no-gzip", action="store_true", help="Do not send Accept-Encoding: gzip.")
+    parser.add_argument("--start", metavar="DATA_PATH", help="Start server.py on this data directory first.")
+    parser.add_argument("--output", help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    process = None
+    if args.start:
+        process = start_server(os.path.abspath(args.start), urlsplit(args.url).port or 8000)
+    try:
+        paths = request_paths(args.url, random.Random(CONFIG["SEED"]), args.requests)
+        # The first pass mostly misses the response cache; the second is served from it.
+        reports = {
+            "cold": asyncio.run(run_load(args.url, paths, args.concurrency, not args.no_gzip)),
+            "warm": asyncio.run(run_load(args.url, paths, args.concurrency, not args.no_gzip)),
+        }
+        with urllib.request.urlopen(args.url + "/api/stats", timeout=30) as response:
+            reports["server"] = json.load(response)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    for name in ("cold", "warm"):
+        r = reports[name]
+        print(f"{name:<5} {r['requests']} requests x{r['concurrency']} in {r['elapsed_s']}s: {r['requests_per_s']} req/s, "
+              f"p50 {r['p50_ms']} ms, p90 {r['p90_ms']} ms, p99 {r['p99_ms']} ms, max {r['max_ms']} ms, statuses {r['statuses']}")
+    print(f"server cache: {reports['server']['cache_hits']} hits, {reports['server']['cache_misses']} misses")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=4)
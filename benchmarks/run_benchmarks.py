@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import synthetic_corpus
+
+# --- Configuration ---
+CONFIG = {
+    "SCALES": [1, 10, 40],
+    "GAMES_PER_SEASON": 230,
+    "SEED": synthetic_corpus.CONFIG["SEED"],
+    "REPEAT": 3,
+    "PARSE_GAMES": 100,
+    "EMBED_CLUES": 500,
+    "CONTESTANT_QUERIES": 20,
+    "GRAPH_VECTOR_DIM": 384,
+    "MEMORY_BENCHMARKS": ["load_archive_json", "load_archive_typed"],
+    "CORPUS_DIR": os.path.join(REPO_ROOT, "benchmarks", ".corpus"),
+    "RESULTS_DIR": os.path.join(REPO_ROOT, "benchmarks", "results"),
+}
+
+def ensure_corpus(seasons):
+    """Generates (once) and returns the corpus directory for a given scale."""
+    corpus_dir = os.path.join(CONFIG["CORPUS_DIR"], f"seasons_{seasons}_games_{CONFIG['GAMES_PER_SEASON']}_seed_{CONFIG['SEED']}")
+    marker = os.path.join(corpus_dir, ".complete")
+    if not os.path.exists(marker):
+        print(f"Generating synthetic corpus: {seasons} season(s) x {CONFIG['GAMES_PER_SEASON']} games...")
+        synthetic_corpus.generate_corpus(corpus_dir, seasons, CONFIG["GAMES_PER_SEASON"], CONFIG["SEED"])
+
+        html_dir = os.path.join(corpus_dir, "html")
+        os.makedirs(html_dir, exist_ok=True)
+        first_id = synthetic_corpus.CONFIG["FIRST_GAME_ID"]
+        for game_id in range(first_id, first_id + min(CONFIG["PARSE_GAMES"], CONFIG["GAMES_PER_SEASON"])):
+            game = synthetic_corpus.generate_game(1, game_id, CONFIG["SEED"])
+            with open(os.path.join(html_dir, f"{game_id}.html"), 'w') as f:
+                f.write(synthetic_corpus.render_game_html(game))
+
+        open(marker, 'w').close()
+    return corpus_dir
+
+# Each benchmark is (name, setup, run). setup(corpus_dir) returns the arguments for
+# run, which is the only timed part and returns the number of items it processed
+# (or, for memory benchmarks, the loaded objects themselves).
+
+def _setup_parse(corpus_dir):
+    html_dir = os.path.join(corpus_dir, "html")
+    pages = []
+    for file_name in sorted(os.listdir(html_dir)):
+        with open(os.path.join(html_dir, file_name), 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return (pages,)
+
+def _run_parse(pages):
+    from bs4 import BeautifulSoup
+    import scraper
+    for page in pages:
+        scraper.parse_game(BeautifulSoup(page, 'lxml'), "synthetic")
+    return len(pages)
+
+def _count_games(data_path):
+    return sum(len(files) for _, _, files in os.walk(data_path))
+
+def _setup_data_path(corpus_dir):
+    return (os.path.join(corpus_dir, "data"),)
+
+def _run_load_json(data_path):
+    games = []
+    for root, _, files in os.walk(data_path):
+        for file_name in files:
+            with open(os.path.join(root, file_name), 'r', encoding='utf-8') as f:
+                games.append(json.load(f))
+    return games
+
+def _run_load_typed(data_path):
+    import game_store
+    return [game for _, game in game_store.iter_games(game_store.list_games(data_path), typed=True)]
+
+def _run_answer_frequencies(data_path):
+    import bump_chart
+    bump_chart.analyze_answer_frequencies(data_path)
+    return _count_games(data_path)
+
+def _run_year_mentions(data_path):
+    import years
+    game_files = years.get_all_game_files(data_path)
+    years.aggregate_year_mentions(game_files)
+    return len(game_files)
+
+def _run_state_counts(data_path):
+    import us_states
+    us_states.get_state_counts(data_path)
+    return _count_games(data_path)
+
+def _run_country_counts(data_path):
+    import world_map
+    world_map.get_country_counts(data_path)
+    return _count_games(data_path)
+
+def _run_element_counts(data_path):
+    import periodic_table
+    periodic_table.get_element_counts(data_path)
+    return _count_games(data_path)
+
+def _run_category_data(data_path):
+    import stumper_graph
+    game_files = stumper_graph.get_all_game_files(data_path)
+    stumper_graph.aggregate_category_data(game_files)
+    return len(game_files)
+
+def _setup_archive_db(corpus_dir):
+    import archive_db
+    db_path = os.path.join(corpus_dir, "archive.sqlite")
+    archive_db.build(os.path.join(corpus_dir, "data"), db_path)
+    return (db_path,)
+
+def _run_query_answer_frequencies(db_path):
+    import archive_db
+    conn = archive_db.connect(db_path)
+    archive_db.answer_frequencies(conn)
+    conn.close()
+    return _count_games(os.path.join(os.path.dirname(db_path), "data"))
+
+def _run_query_category_data(db_path):
+    import archive_db
+    conn = archive_db.connect(db_path)
+    archive_db.category_data(conn)
+    conn.close()
+    return _count_games(os.path.join(os.path.dirname(db_path), "data"))
+
+def _run_near_duplicate_index(data_path):
+    import shutil
+    import tempfile
+    import near_duplicates
+    index_dir = tempfile.mkdtemp(prefix="near_duplicates_")
+    try:
+        index = near_duplicates.NearDuplicateIndex(index_dir)
+        index.update(data_path)
+        index.clusters()
+        return len(index)
+    finally:
+        shutil.rmtree(index_dir)
+
+def _setup_contestant_index(corpus_dir):
+    import contestants
+    index_path = os.path.join(corpus_dir, "contestants.npz")
+    contestants.ContestantIndex(index_path).update(os.path.join(corpus_dir, "data"))
+    return (index_path,)
+
+def _run_query_contestants(index_path):
+    import contestants
+    index = contestants.ContestantIndex(index_path)
+    for player_id in index.data["player_ids"][:CONFIG["CONTESTANT_QUERIES"]]:
+        index.history(str(player_id))
+    for season in sorted(set(index.data["game_seasons"])):
+        index.season_leaderboard(season)
+    return len(index)
+
+def _setup_count_cube(corpus_dir):
+    import count_cube
+    cube_path = os.path.join(corpus_dir, "count_cube.npz")
+    count_cube.load_cube(os.path.join(corpus_dir, "data"), cube_path)
+    return (cube_path,)
+
+def _run_count_cube_slices(cube_path):
+    import count_cube
+    cube = count_cube.CountCube(cube_path)
+    for entity_type in count_cube.ENTITY_TYPES:
+        cube.slice(entity_type)
+        cube.frames(entity_type)
+    return len(cube.count)
+
+def _setup_process_ranks(corpus_dir):
+    import bump_chart
+    return (bump_chart.analyze_answer_frequencies(os.path.join(corpus_dir, "data")),)
+
+def _run_process_ranks(season_answer_counts):
+    import bump_chart
+    bump_chart.process_ranks(season_answer_counts, top_n=20)
+    return len(season_answer_counts)
+
+def _setup_embeddings(corpus_dir):
+    import stumper_graph
+    stumper_texts = stumper_graph.aggregate_category_data(stumper_graph.get_all_game_files(os.path.join(corpus_dir, "data")))[0]
+    texts = [text for clues in stumper_texts.values() for text in clues]
+    return (texts[:CONFIG["EMBED_CLUES"]],)
+
+def _run_embeddings(texts):
+    import stumper_graph
+    stumper_graph.get_embeddings(texts)
+    return len(texts)
+
+def _setup_build_graph(corpus_dir):
+    import numpy as np
+    import stumper_graph
+    game_files = stumper_graph.get_all_game_files(os.path.join(corpus_dir, "data"))
+    _, category_counts, total_stumper_counts, stumper_clues, category_clue_counts = stumper_graph.aggregate_category_data(game_files)
+    category_names = sorted(category_counts)
+    rng = np.random.default_rng(CONFIG["SEED"])
+    vectors = rng.normal(size=(len(category_names), CONFIG["GRAPH_VECTOR_DIM"])).astype(np.float32)
+    return (vectors, category_names, category_counts, total_stumper_counts, stumper_clues, category_clue_counts)
+
+def _run_build_graph(vectors, category_names, *counts):
+    import stumper_graph
+    stumper_graph.build_graph(vectors, category_names, *counts)
+    return len(category_names)
+
+BENCHMARKS = [
+    ("parse_game", _setup_parse, _run_parse),
+    ("load_archive_json", _setup_data_path, _run_load_json),
+    ("load_archive_typed", _setup_data_path, _run_load_typed),
+    ("analyze_answer_frequencies", _setup_data_path, _run_answer_frequencies),
+    ("aggregate_year_mentions", _setup_data_path, _run_year_mentions),
+    ("get_state_counts", _setup_data_path, _run_state_counts),
+    ("get_country_counts", _setup_data_path, _run_country_counts),
+    ("get_element_counts", _setup_data_path, _run_element_counts),
+    ("aggregate_category_data", _setup_data_path, _run_category_data),
+    ("query_answer_frequencies", _setup_archive_db, _run_query_answer_frequencies),
+    ("query_category_data", _setup_archive_db, _run_query_category_data),
+    ("near_duplicate_index", _setup_data_path, _run_near_duplicate_index),
+    ("query_contestants", _setup_contestant_index, _run_query_contestants),
+    ("count_cube_slices", _setup_count_cube, _run_count_cube_slices),
+    ("process_ranks", _setup_process_ranks, _run_process_ranks),
+    ("get_embeddings", _setup_embeddings, _run_embeddings),
+    ("build_graph", _setup_build_graph, _run_build_graph),
+]
+
+def run_benchmark(name, setup, run, corpus_dir, seasons, repeat):
+    """Times one benchmark `repeat` times; missing optional dependencies mark it as skipped."""
+    result = {"benchmark": name, "seasons": seasons}
+    try:
+        args = setup(corpus_dir)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            items = run(*args)
+            timings.append(time.perf_counter() - start)
+            if not isinstance(items, int):
+                items = len(items)
+
+        if name in CONFIG["MEMORY_BENCHMARKS"]:
+            tracemalloc.start()
+            loaded = run(*args)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del loaded
+            result.update({"retained_mb": round(retained / 1e6, 2), "peak_mb": round(peak / 1e6, 2)})
+    except ImportError as e:
+        result.update({"status": "skipped", "reason": str(e)})
+        return result
+
+    best = min(timings)
+    result.update({
+        "status": "ok",
+        "items": items,
+        "repeat": repeat,
+        "best_s": round(best, 6),
+        "mean_s": round(statistics.mean(timings), 6),
+        "stdev_s": round(statistics.stdev(timings), 6) if len(timings) > 1 else 0.0,
+        "items_per_s": round(items / best, 2) if best > 0 else None,
+    })
+    return result
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit or None,
+        "python": sys.version,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(results, baseline_path):
+    """Prints each benchmark's best time relative to a previous results file."""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r["benchmark"], r["seasons"]): r for r in json.load(f)["results"] if r.get("status") == "ok"}
+    print(f"\nComparison against {baseline_path} (ratio > 1 means slower now):")
+    for r in results:
+        previous = baseline.get((r["benchmark"], r["seasons"]))
+        if r.get("status") == "ok" and previous:
+            ratio = r["best_s"] / previous["best_s"] if previous["best_s"] else float("inf")
+            flag = "  <-- regression" if ratio > 1.10 else ""
+            print(f"  {r['benchmark']:<28} {r['seasons']:>3} seasons  {previous['best_s']:.4f}s -> {r['best_s']:.4f}s  x{ratio:.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the benchmark suite against a synthetic corpus.")
+    parser.add_argument("--scales", type=int, nargs="+", default=CONFIG["SCALES"], help="Number of seasons per scale.")
+    parser.add_argument("--games-per-season", type=int, default=CONFIG["GAMES_PER_SEASON"])
+    parser.add_argument("--repeat", type=int, default=CONFIG["REPEAT"])
+    parser.add_argument("--only", nargs="+", help="Only run the named benchmarks.")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", help="A previous results JSON to compare against.")
+    args = parser.parse_args()
+
+    CONFIG["GAMES_PER_SEASON"] = args.games_per_season
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for seasons in args.scales:
+        corpus_dir = ensure_corpus(seasons)
+        for name, setup, run in BENCHMARKS:
+            if args.only and name not in args.only:
+                continue
+            result = run_benchmark(name, setup, run, corpus_dir, seasons, args.repeat)
+            results.append(result)
+            if result["status"] == "ok":
+                memory = f"  retained {result['retained_mb']} MB" if "retained_mb" in result else ""
+                print(f"{name:<28} {seasons:>3} seasons  best {result['best_s']:.4f}s  ({result['items_per_s']} items/s){memory}")
+            else:
+                print(f"{name:<28} {seasons:>3} seasons  skipped: {result['reason']}")
+
+    output = args.output or os.path.join(CONFIG["RESULTS_DIR"], datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {"environment": environment_info(), "config": {k: v for k, v in CONFIG.items() if not k.endswith("_DIR")}, "results": results}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Benchmark results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
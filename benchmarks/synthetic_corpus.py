@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import html
+import random
+import argparse
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from us_states import get_state_data
+from periodic_table import get_element_data
+
+# --- Configuration ---
+CONFIG = {
+    "SEED": 1984,
+    "GAMES_PER_SEASON": 230,
+    "FIRST_GAME_ID": 1000,
+    "MISSING_CLUE_RATE": 0.03,
+    "TRIPLE_STUMPER_RATE": 0.06,
+    "YEAR_MENTION_RATE": 0.15,
+    "CONTESTANTS": ["Ken", "Brad", "James", "Amy", "Matt", "Mattea", "Julia", "Larry", "Arthur", "Cris", "Holly", "Buzzy"],
+    # Several players share each first name, as in the real archive, so the podium
+    # nickname alone does not identify a player.
+    "SURNAMES": ["Jennings", "Rutter", "Holzhauer", "Schneider", "Amodio", "Roggensack", "Collins", "Chu"],
+}
+
+COUNTRIES = [
+    "France", "Japan", "Brazil", "Egypt", "India", "Canada", "Mexico", "Peru", "Kenya", "Norway",
+    "Turkey", "Russia", "Holland", "Vietnam", "Chile", "Greece", "Italy", "Spain", "China", "Australia",
+]
+COMMON_ANSWERS = [
+    "Nile", "the Nile", "(Abraham) Lincoln", "Lincoln", "Shakespeare", "Paris", "Mars", "Venus", "Hamlet",
+    "Mozart", "Napoleon", "Einstein", "Jupiter", "Oxygen", "the Amazon", "Mississippi", "Everest",
+    "Beethoven", "Cleopatra", "Da Vinci", "\"Moby-Dick\"", "Pluto", "Athena", "Zeus", "Odysseus",
+]
+CATEGORY_NAMES = [
+    "POTENT POTABLES", "WORLD CAPITALS", "U.S. STATES", "SCIENCE", "LITERATURE", "OPERA", "BODIES OF WATER",
+    "AMERICAN HISTORY", "WORD ORIGINS", "THE BIBLE", "SPORTS", "ANIMALS", "BEFORE & AFTER", "RHYME TIME",
+    "CHEMISTRY", "GEOGRAPHY", "ART", "FOOD", "POP MUSIC", "POTPOURRI", "MYTHOLOGY", "THE MOVIES",
+]
+FILLER_WORDS = (
+    "this famous river city author king queen painter composer planet element state country flows "
+    "wrote named first largest discovered invented capital island mountain battle treaty novel "
+    "opera symphony empire dynasty war peace crossed founded sang married ruled built"
+).split()
+
+@lru_cache(maxsize=None)
+def _answer_vocabulary():
+    """Returns the answer pool and Zipf-like cumulative weights for sampling it."""
+    answers = COMMON_ANSWERS + COUNTRIES + list(get_state_data()) + [el['name'] for el in get_element_data()]
+    answers += [f"{a} {b}".title() for a in FILLER_WORDS[:40] for b in FILLER_WORDS[40:]]
+    cumulative, total = [], 0.0
+    for rank in range(1, len(answers) + 1):
+        total += 1.0 / rank
+        cumulative.append(total)
+    return answers, cumulative
+
+def _category_name(rng):
+    """Draws a category name, with the punctuation/quoting variants seen in real data."""
+    name = rng.choice(CATEGORY_NAMES)
+    variant = rng.random()
+    if variant < 0.05:
+        return f'"{name}"'
+    if variant < 0.08:
+        return f"{name}!"
+    if variant < 0.25:
+        return f"{name} {rng.choice(FILLER_WORDS).upper()}"
+    return name
+
+def _clue_text(rng):
+    """Builds a clue sentence, sometimes mentioning a year (occasionally B.C.)."""
+    words = rng.sample(FILLER_WORDS, rng.randint(6, 14))
+    if rng.random() < CONFIG["YEAR_MENTION_RATE"]:
+        year = rng.randint(1400, 2025)
+        words.insert(rng.randrange(len(words)), str(year) + (" B.C." if rng.random() < 0.05 else ""))
+    return "In " + " ".join(words).capitalize() + "."
+
+def _contestant_results(rng, contestants):
+    """Returns (right_contestants, wrong_contestants) for one clue."""
+    if rng.random() < CONFIG["TRIPLE_STUMPER_RATE"]:
+        wrong = rng.sample(contestants, rng.randint(0, 2))
+        return [], wrong + ["Triple Stumper"]
+    wrong = rng.sample(contestants, rng.choice([0, 0, 0, 1]))
+    right = [rng.choice([c for c in contestants if c not in wrong])]
+    return right, wrong
+
+def _players(seed, season, game_id, nicknames):
+    """Gives each podium nickname a full name and player id, listed right to left as on j-archive."""
+    rng = random.Random(f"{seed}-{season}-{game_id}-players")
+    players = []
+    for nickname in reversed(nicknames):
+        surname = rng.randrange(len(CONFIG["SURNAMES"]))
+        player_id = CONFIG["CONTESTANTS"].index(nickname) * len(CONFIG["SURNAMES"]) + surname + 1
+        players.append({"name": f"{nickname} {CONFIG['SURNAMES'][surname]}", "player_id": player_id, "nickname": nickname})
+    return players
+
+def generate_game(season, game_id, seed=None):
+    """Generates one game dict in exactly the schema produced by scraper.parse_game."""
+    seed = CONFIG["SEED"] if seed is None else seed
+    rng = random.Random(f"{seed}-{season}-{game_id}")
+    answers, cumulative = _answer_vocabulary()
+    contestants = rng.sample(CONFIG["CONTESTANTS"], 3)
+
+    game = {"url": f"https://j-archive.com/showgame.php?game_id={game_id}", "rounds": []}
+    for round_name, multiplier, daily_doubles in [("jeopardy_round", 200, 1), ("double_jeopardy_round", 400, 2)]:
+        dd_cells = set(rng.sample(range(30), daily_doubles))
+        round_data = {"name": round_name, "categories": []}
+        for col in range(6):
+            category = {"name": _category_name(rng), "clues": []}
+            for row in range(5):
+                if rng.random() < CONFIG["MISSING_CLUE_RATE"]:
+                    continue
+                if row * 6 + col in dd_cells:
+                    value = f"DD: ${rng.randint(5, 30) * 100:,}"
+                else:
+                    value = f"${(row + 1) * multiplier:,}"
+                right, wrong = _contestant_results(rng, contestants)
+                category["clues"].append({
+                    "clue": _clue_text(rng),
+                    "answer": rng.choices(answers, cum_weights=cumulative)[0],
+                    "value": value,
+                    "row": row + 1,
+                    "right_contestants": right,
+                    "wrong_contestants": wrong
+                })
+            round_data["categories"].append(category)
+        game["rounds"].append(round_data)
+
+    final_category = {"name": _category_name(rng), "clues": [{
+        "clue": _clue_text(rng),
+        "answer": rng.choices(answers, cum_weights=cumulative)[0]
+    }]}
+    game["rounds"].append({"name": "final_jeopardy_round", "categories": [final_category]})
+    game["contestants"] = _players(seed, season, game_id, contestants)
+    return game
+
+def _board_cell(round_prefix, col, row, clue):
+    """Renders one clue cell the way j-archive lays it out."""
+    clue_id = f"clue_{round_prefix}_{col + 1}_{row + 1}"
+    value_class = "clue_value_daily_double" if clue["value"].startswith("DD:") else "clue_value"
+    contestants = "".join(f'<td class="right">{html.escape(c)}</td>' for c in clue["right_contestants"])
+    contestants += "".join(f'<td class="wrong">{html.escape(c)}</td>' for c in clue["wrong_contestants"])
+    return (
+        '<td class="clue"><table class="clue_header"><tr>'
+        f'<td class="{value_class}">{html.escape(clue["value"])}</td></tr></table>'
+        f'<table><tr><td id="{clue_id}" class="clue_text">{html.escape(clue["clue"])}</td>'
+        f'<td id="{clue_id}_r" class="clue_text" style="display:none;">'
+        f'<em class="correct_response">{html.escape(clue["answer"])}</em>'
+        f'<table><tr>{contestants}</tr></table></td></tr></table></td>'
+    )
+
+def render_game_html(game):
+    """Renders a game dict as a j-archive style page that scraper.parse_game can read back."""
+    parts = ['<html><body><table id="contestants_table"><tr><td>']
+    for player in game.get("contestants", []):
+        parts.append(f'<p class="contestants"><a href="showplayer.php?player_id={player["player_id"]}">{html.escape(player["name"])}</a>, a synthetic contestant</p>')
+    parts.append("</td></tr></table>")
+    for round_data in game["rounds"]:
+        parts.append(f'<div id="{round_data["name"]}">')
+        if round_data["name"] == "final_jeopardy_round":
+            category = round_data["categories"][0]
+            clue = category["clues"][0]
+            parts.append(
+                '<table class="final_round"><tr><td class="category">'
+                f'<table><tr><td class="category_name">{html.escape(category["name"])}</td></tr></table></td></tr>'
+                f'<tr><td class="clue"><table><tr><td id="clue_FJ" class="clue_text">{html.escape(clue["clue"])}</td>'
+                f'<td id="clue_FJ_r" class="clue_text"><em class="correct_response">{html.escape(clue["answer"])}</em></td>'
+                '</tr></table></td></tr></table>'
+            )
+        else:
+            round_prefix = "J" if round_data["name"] == "jeopardy_round" else "DJ"
+            parts.append('<table class="round"><tr>')
+            for category in round_data["categories"]:
+                parts.append(f'<td class="category"><table><tr><td class="category_name">{html.escape(category["name"])}</td></tr></table></td>')
+            parts.append("</tr>")
+            # Unrevealed clues are rendered as empty cells, as on j-archive.
+            columns = [{clue["row"]: clue for clue in category["clues"]} for category in round_data["categories"]]
+            for row in range(5):
+                parts.append("<tr>")
+                for col, clues in enumerate(columns):
+                    parts.append(_board_cell(round_prefix, col, row, clues[row + 1]) if row + 1 in clues else '<td class="clue"></td>')
+                parts.append("</tr>")
+            parts.append("</table>")
+            nicknames = "".join(f'<td class="score_player_nickname">{html.escape(player["nickname"])}</td>'
+                                for player in reversed(game.get("contestants", [])))
+            parts.append(f'<table><tr>{nicknames}</tr></table>')
+        parts.append("</div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def generate_corpus(out_dir, seasons, games_per_season=None, seed=None, with_html=False):
+    """
+    Writes `seasons` seasons of synthetic games to out_dir/data/<season>/<game_id>.json
+    (and optionally out_dir/html/<game_id>.html). Returns the data directory.
+    """
+    games_per_season = games_per_season or CONFIG["GAMES_PER_SEASON"]
+    data_dir = os.path.join(out_dir, "data")
+    html_dir = os.path.join(out_dir, "html")
+    game_id = CONFIG["FIRST_GAME_ID"]
+    for season in range(1, seasons + 1):
+        season_dir = os.path.join(data_dir, str(season))
+        os.makedirs(season_dir, exist_ok=True)
+        for _ in range(games_per_season):
+            game = generate_game(season, game_id, seed)
+            with open(os.path.join(season_dir, f"{game_id}.json"), 'w') as f:
+                json.dump(game, f, indent=4)
+            if with_html:
+                os.makedirs(html_dir, exist_ok=True)
+                with open(os.path.join(html_dir, f"{game_id}.html"), 'w') as f:
+                    f.write(render_game_html(game))
+            game_id += 1
+    return data_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic j-archive corpus.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--games-per-season", type=int, default=CONFIG["GAMES_PER_SEASON"])
+    parser.add_argument("--seed", type=int, default=CONFIG["SEED"])
+    parser.add_argument("--html", action="store_true", help="Also write saved game HTML pages.")
+    args = parser.parse_args()
+
+    data_dir = generate_corpus(args.out_dir, args.seasons, args.games_per_season, args.seed, args.html)
+    print(f"Synthetic corpus written to {data_dir}")
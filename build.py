@@ -0,0 +1,286 @@
+import os
+import re
+import ast
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import importlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import sampling
+from instrumentation import RunReport
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "MANIFEST_PATH": "cache/build_manifest.json",
+    "LOG_DIR": "cache/build_logs",
+    "INDEX_HTML": "index.html",
+    "JOBS": min(6, os.cpu_count() or 1),
+    "IGNORED_CONFIG_MODULES": ["instrumentation"],  # reporting settings do not change a chart
+}
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Every chart is one script run from the repository root, writing one HTML file. Its
+# inputs are the script's source and that of every local module it imports (directly
+# or not), the CONFIG dicts of those modules, and the data directory. The fingerprint
+# of each input is stored in the manifest; a chart is rebuilt when any of them, or its
+# output file, changed since its last successful build. A chart with "after" reads files
+# another chart's run writes, so it starts once that chart has finished. Every script is
+# passed --data-path, except those marked "data": False, which only read other caches.
+CHARTS = {
+    "stumper_graph": {"script": "stumper_graph.py", "output": "charts/jeopardy_stumper_similarity_graph.html"},
+    "stumper_clusters": {"script": "clustering.py", "output": "charts/jeopardy_stumper_clusters.html", "after": "stumper_graph", "data": False},
+    "bump_chart": {"script": "bump_chart.py", "output": "charts/jeopardy_answer_rank_bump_chart.html"},
+    "years": {"script": "years.py", "output": "charts/jeopardy_year_frequency_clues.html"},
+    "world_map": {"script": "world_map.py", "output": "charts/jeopardy_answers_by_country.html"},
+    "us_states": {"script": "us_states.py", "output": "charts/jeopardy_answers_by_state.html"},
+    "periodic_table": {"script": "periodic_table.py", "output": "charts/jeopardy_answers_by_element.html"},
+    "values": {"script": "values.py", "output": "charts/jeopardy_clue_values.html"},
+}
+
+def _sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return _sha1(f.read())
+
+def local_imports(module):
+    """Returns the repository modules a module imports, including lazy imports inside functions."""
+    with open(os.path.join(REPO_ROOT, f"{module}.py"), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if os.path.exists(os.path.join(REPO_ROOT, f"{name}.py"))}
+
+def module_closure(module):
+    """The module plus every repository module reachable through its imports."""
+    seen, pending = set(), [module]
+    while pending:
+        name = pending.pop()
+        if name not in seen:
+            seen.add(name)
+            pending.extend(local_imports(name) - seen)
+    return sorted(seen)
+
+def data_fingerprint(data_path):
+    """Hashes the name, size and modification time of every file under the data directory."""
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(data_path):
+        dirs.sort()
+        for file_name in sorted(files):
+            stat = os.stat(os.path.join(root, file_name))
+            digest.update(f"{os.path.relpath(os.path.join(root, file_name), data_path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def config_fingerprint(modules):
+    """Hashes the CONFIG dict of each module that has one, as loaded (so environment overrides count)."""
+    configs = {}
+    for name in modules:
+        if name in CONFIG["IGNORED_CONFIG_MODULES"]:
+            continue
+        config = getattr(importlib.import_module(name), "CONFIG", None)
+        if config is not None:
+            configs[name] = config
+    return _sha1(json.dumps(configs, sort_keys=True, default=str).encode())
+
+def chart_inputs(name, data_hash):
+    """Returns {input: fingerprint} for one chart."""
+    modules = module_closure(CHARTS[name]["script"][:-3])
+    return {
+        "source": _sha1("".join(f"{m}:{file_hash(os.path.join(REPO_ROOT, f'{m}.py'))}\n" for m in modules).encode()),
+        "config": config_fingerprint(modules),
+        "data": data_hash,
+    }
+
+def load_manifest(path=None):
+    try:
+        with open(path or CONFIG["MANIFEST_PATH"], 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_atomic(path, text):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def stale_reasons(name, inputs, manifest):
+    """Returns why a chart needs rebuilding (an empty list if it is up to date)."""
+    entry = manifest.get(name)
+    output = CHARTS[name]["output"]
+    if not entry:
+        return ["never built"]
+    if not os.path.exists(output):
+        return ["output missing"]
+    reasons = [f"{key} changed" for key, value in inputs.items() if entry["inputs"].get(key) != value]
+    if file_hash(output) != entry.get("output_hash"):
+        reasons.append("output modified")
+    return reasons
+
+def invalidate_caches(name, inputs, manifest):
+    """Deletes derived caches a chart would otherwise reuse although its data changed."""
+    if name == "stumper_graph" and manifest.get(name, {}).get("inputs", {}).get("data") != inputs["data"]:
+        import stumper_graph
+        for path in stumper_graph.aggregate_cache_paths(stumper_graph.CONFIG["CACHE_PATH"]):
+            if os.path.exists(path):
+                os.remove(path)
+
+def run_chart(name, sample=None):
+    """
+    Runs one chart script in its own process, logging to CONFIG["LOG_DIR"]; with a sample
+    fraction, builds its preview instead. Returns (ok, seconds).
+    """
+    os.makedirs(CONFIG["LOG_DIR"], exist_ok=True)
+    log_path = os.path.join(CONFIG["LOG_DIR"], f"{name}{'_preview' if sample else ''}.log")
+    data_args = ["--data-path", CONFIG["DATA_PATH"]] if CHARTS[name].get("data", True) else []
+    command = [sys.executable, CHARTS[name]["script"], *data_args] + (["--sample", str(sample)] if sample else [])
+    output = sampling.output_path(CHARTS[name]["output"]) if sample else CHARTS[name]["output"]
+    start = time.perf_counter()
+    with open(log_path, 'w') as log:
+        result = subprocess.run(command, cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    seconds = time.perf_counter() - start
+    ok = result.returncode == 0 and os.path.exists(output)
+    if ok:
+        logging.info(f"Built {name} in {seconds:.1f}s")
+    else:
+        logging.error(f"{name} failed (exit code {result.returncode}) after {seconds:.1f}s; see {log_path}")
+    return ok, seconds
+
+def run_charts(names, run, jobs=None):
+    """
+    Runs `run(name)` for each chart in parallel. A chart that comes after another one being
+    run starts as soon as that chart is done, not after everything started before it. Returns {name: result}.
+    """
+    names = list(names)
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs or CONFIG["JOBS"]) as pool:
+        running = {}
+        waiting = list(names)
+        while waiting or running:
+            ready = [name for name in waiting if CHARTS[name].get("after") not in names or CHARTS[name]["after"] in results]
+            for name in ready:
+                running[pool.submit(run, name)] = name
+                waiting.remove(name)
+            if not running:
+                raise ValueError(f"charts {', '.join(waiting)} come after each other in a cycle")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+def update_index(manifest, index_path=None):
+    """
+    Points every chart iframe in index.html at its current build (`?v=<output hash>`) so
+    browsers reload rebuilt charts, replacing the file atomically. Returns True if it changed.
+    """
+    index_path = index_path or CONFIG["INDEX_HTML"]
+    with open(index_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    versions = {chart["output"]: manifest[name]["output_hash"][:12] for name, chart in CHARTS.items() if name in manifest}
+
+    def versioned(match):
+        src = match.group(2)
+        if src not in versions:
+            return match.group(0)
+        return f'{match.group(1)}{src}?v={versions[src]}{match.group(3)}'
+
+    updated = re.sub(r'(<iframe\s[^>]*src=")([^"?]+)(?:\?v=[0-9a-f]*)?(")', versioned, html)
+    if updated == html:
+        return False
+    _write_atomic(index_path, updated)
+    return True
+
+def build_previews(names=None, sample=None, jobs=None, report=None):
+    """
+    Builds the sampled previews of the charts (see sampling.py) next to their outputs. The
+    manifest and index.html are left alone. Returns the names that failed.
+    """
+    names = names or list(CHARTS)
+    report = report or RunReport("build")
+    with report.stage("build_previews", items=len(names)):
+        # Draw the sample once, before the charts read the manifest in parallel.
+        sampling.load_sample(CONFIG["DATA_PATH"], sample)
+        results = run_charts(names, lambda name: run_chart(name, sample), jobs)
+    return [name for name, (ok, _) in results.items() if not ok]
+
+def build(names=None, force=False, jobs=None, dry_run=False, report=None):
+    """Rebuilds the stale charts (all of `names`, if force) in parallel. Returns the names that failed."""
+    names = names or list(CHARTS)
+    report = report or RunReport("build")
+    manifest = load_manifest()
+
+    with report.stage("fingerprint", items=len(names)):
+        data_hash = data_fingerprint(CONFIG["DATA_PATH"])
+        inputs = {name: chart_inputs(name, data_hash) for name in names}
+        stale = {}
+        for name in names:
+            reasons = ["forced"] if force else stale_reasons(name, inputs[name], manifest)
+            if reasons:
+                stale[name] = reasons
+    for name in names:
+        logging.info(f"{name}: {', '.join(stale[name]) if name in stale else 'up to date'}")
+    if dry_run or not stale:
+        return []
+
+    failed = []
+    with report.stage("build_charts", items=len(stale)):
+        for name in stale:
+            invalidate_caches(name, inputs[name], manifest)
+        results = run_charts(stale, run_chart, jobs)
+        for name, (ok, seconds) in results.items():
+            if not ok:
+                failed.append(name)
+                continue
+            manifest[name] = {
+                "inputs": inputs[name],
+                "output_hash": file_hash(CHARTS[name]["output"]),
+                "seconds": round(seconds, 3),
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+
+    with report.stage("write_index"):
+        _write_atomic(CONFIG["MANIFEST_PATH"], json.dumps(manifest, indent=4, sort_keys=True))
+        if update_index(manifest):
+            logging.info(f"Updated {CONFIG['INDEX_HTML']}")
+    return failed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Rebuild the charts whose inputs changed and refresh index.html.")
+    parser.add_argument("charts", nargs="*", help=f"Charts to consider (default: all of {', '.join(CHARTS)}).")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if up to date.")
+    parser.add_argument("--jobs", type=int, default=CONFIG["JOBS"], help="Charts built at the same time.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which charts are stale.")
+    parser.add_argument("--data-path", help=f"Archive directory (default: {CONFIG['DATA_PATH']} in the repository).")
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+    if args.data_path:
+        # Taken relative to where build.py was started, before moving to the repository root.
+        CONFIG["DATA_PATH"] = os.path.abspath(args.data_path)
+    os.chdir(REPO_ROOT)
+    unknown = [name for name in args.charts if name not in CHARTS]
+    if unknown:
+        parser.error(f"unknown chart(s): {', '.join(unknown)}")
+
+    report = RunReport("build")
+    if args.sample:
+        failed = build_previews(args.charts, args.sample, args.jobs, report)
+    else:
+        failed = build(args.charts, args.force, args.jobs, args.dry_run, report)
+    report.finish()
+    if failed:
+        sys.exit(f"Failed to build: {', '.join(failed)}")
@@ -1,33 +1,35 @@
-import os
-import json
-import pandas as pd
-import plotly.express as px
+import argparse
 from collections import Counter
+import game_store
+import sampling
+from answers import AnswerVocabulary
+from instrumentation import RunReport, timed
 
-def analyze_answer_frequencies(data_path):
+OUTPUT_HTML_FILE = "charts/jeopardy_answer_rank_bump_chart.html"
+
+def analyze_answer_frequencies(data_path, sketch_factory=None, game_files=None):
     """
-    Analyzes all seasons to find the frequency of each full answer per season.
+    Analyzes all seasons to find the frequency of each answer per season. Variants of
+    the same answer ("the Nile", "Nile") are counted together under one label.
+    With a sketch_factory (see sketches.make_sketch), each season is counted in a
+    fixed-memory heavy-hitters sketch instead of a full Counter. `game_files`
+    restricts the count to those games.
     """
     season_answer_counts = {}
-    for season_dir in sorted(os.listdir(data_path)):
-        season_path = os.path.join(data_path, season_dir)
-        if os.path.isdir(season_path):
-            try:
-                season_num = int(os.path.basename(season_dir))
-                season_answers = []
-                for episode_file in os.listdir(season_path):
-                    if episode_file.endswith('.json'):
-                        with open(os.path.join(season_path, episode_file), 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            for round_data in data.get('rounds', []):
-                                for category in round_data.get('categories', []):
-                                    for clue in category.get('clues', []):
-                                        answer = clue.get('answer', '').strip().title()
-                                        if answer and answer != "=":
-                                            season_answers.append(answer)
-                season_answer_counts[season_num] = Counter(season_answers)
-            except (json.JSONDecodeError, ValueError, KeyError):
-                continue
+    vocabulary = AnswerVocabulary()
+    for season, games in game_store.iter_seasons(data_path, typed=True, locators=game_files):
+        try:
+            season_num = int(season)
+        except ValueError:
+            continue
+        counts = sketch_factory() if sketch_factory else Counter()
+        for _, game in games:
+            with timed("scan"):
+                counts.update(
+                    label for label in (vocabulary.label_of(clue.answer) for _, _, clue in game.iter_clues())
+                    if label is not None
+                )
+        season_answer_counts[season_num] = counts
     return season_answer_counts
 
 def process_ranks(season_answer_counts, top_n=20):
@@ -35,6 +37,8 @@ def process_ranks(season_answer_counts, top_n=20):
     Processes answer counts to calculate ranks and prepares data for plotting,
     including a pre-formatted hover text string.
     """
+    import pandas as pd
+
     top_answers = set()
     for season, counts in season_answer_counts.items():
         top_answers.update([answer for answer, count in counts.most_common(top_n)])
@@ -68,10 +72,12 @@ def process_ranks(season_answer_counts, top_n=20):
     
     return pd.DataFrame(plot_data), legend_order
 
-def plot_bump_chart(df, legend_order, top_n=20):
+def plot_bump_chart(df, legend_order, top_n=20, output_file=OUTPUT_HTML_FILE):
     """
     Creates and saves a prettier bump chart visualization for answer ranks.
     """
+    import plotly.express as px
+
     fig = px.line(
         df,
         x='season',
@@ -112,23 +118,52 @@ def plot_bump_chart(df, legend_order, top_n=20):
         hovertemplate="%{customdata}<extra></extra>"
     )
 
-    fig.write_html("charts/jeopardy_answer_rank_bump_chart.html")
-    print("Bump chart saved to charts/jeopardy_answer_rank_bump_chart.html")
+    fig.write_html(output_file)
+    print(f"Bump chart saved to {output_file}")
 
 
 if __name__ == '__main__':
-    data_path = 'data'
+    parser = argparse.ArgumentParser(description="Build the answer-rank bump chart.")
+    parser.add_argument("--approximate", choices=["space-saving", "count-min"],
+                        help="Count answers with a fixed-memory heavy-hitters sketch instead of exact counters.")
+    parser.add_argument("--epsilon", type=float, default=None, help="Sketch error bound as a fraction of each season's clue count.")
+    parser.add_argument("--data-path", default="data")
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+
+    data_path = args.data_path
+    report = RunReport("bump_chart")
+    sketch_factory = None
+    if args.approximate:
+        import sketches
+        sketch_factory = lambda: sketches.make_sketch(args.approximate, args.epsilon)
+    sample = sampling.load_sample(data_path, args.sample) if args.sample else None
     
     print("Analyzing answer frequencies across all seasons...")
-    season_counts = analyze_answer_frequencies(data_path)
+    with report.stage("analyze_answer_frequencies") as stage:
+        season_counts = analyze_answer_frequencies(data_path, sketch_factory, sample.locators if sample else None)
+        stage.items = sum(counts.total() for counts in season_counts.values())
+    if sample:
+        bound = 0.0
+        for season, counts in season_counts.items():
+            season_counts[season], bounds = sampling.scale_counts(dict(counts.most_common()), sample.weight(season))
+            bound = max(bound, sampling.relative_bound(season_counts[season], bounds, 20))
     
     print("Processing answer ranks for the Top 20...")
-    ranks_df, legend_order = process_ranks(season_counts, top_n=20)
-    
-    ranks_df = ranks_df.sort_values(by=['answer', 'season'])
+    with report.stage("process_ranks", items=len(season_counts)):
+        ranks_df, legend_order = process_ranks(season_counts, top_n=20)
+        ranks_df = ranks_df.sort_values(by=['answer', 'season'])
     
     if not ranks_df.empty:
         print("Generating bump chart...")
-        plot_bump_chart(ranks_df, legend_order, top_n=20)
+        with report.stage("write_html", items=len(ranks_df)):
+            if sample:
+                output_file = sampling.output_path(OUTPUT_HTML_FILE)
+                plot_bump_chart(ranks_df, legend_order, top_n=20, output_file=output_file)
+                sampling.mark_preview(output_file, sample.note(bound))
+            else:
+                plot_bump_chart(ranks_df, legend_order, top_n=20)
     else:
-        print("No data available to plot.")
\ No newline at end of file
+        print("No data available to plot.")
+
+    report.finish()
\ No newline at end of file
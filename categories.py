@@ -0,0 +1,263 @@
+import os
+import re
+import json
+import html
+import difflib
+import hashlib
+import logging
+import argparse
+import unicodedata
+from collections import Counter, defaultdict
+import numpy as np
+import game_store
+from instrumentation import RunReport, timed
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "ALIASES_PATH": "cache/category_aliases.json",
+    "NGRAM": 3,
+    "BLOCK_THRESHOLD": 0.5,         # trigram Jaccard similarity a pair needs to be compared at all
+    "THRESHOLD": 0.9,               # edit similarity (difflib ratio) needed to merge two names
+    "CLUSTER_MIN_SIMILARITY": 0.8,  # every merged name must also be this close to its cluster's canonical name
+    "WORD_SIMILARITY": 0.75,        # ...and, for names with the same number of words, each word to its counterpart
+}
+
+# Category names are canonicalized in two steps:
+#   1. names with the same normalized key ("POTENT POTABLES", "\"POTENT POTABLES\"",
+#      "Potent Potables!") are grouped directly;
+#   2. the remaining keys are compared by edit similarity, but only pairs whose character
+#      trigram sets are similar enough; those are found by blocking on each key's rarest
+#      trigrams (prefix filtering), so tens of thousands of names never need all-pairs
+#      comparison. Plurals and typos merge; names with an extra word do not.
+# Each group's most frequent raw name becomes the canonical name. The result is stored as
+# an alias table {raw name: canonical name} (names that are their own canonical form are
+# left out) at CONFIG["ALIASES_PATH"].
+
+_DROPPED = re.compile(r"[.'\"`‘’“”]")
+_SEPARATORS = re.compile(r'[^\w&]+')
+_DIGITS = re.compile(r'\d+')
+
+def normalize_category(name):
+    """Returns the exact-match key for a category name: case, accents, quotes and punctuation removed."""
+    text = unicodedata.normalize('NFKD', html.unescape(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _DROPPED.sub('', text).replace('&', ' and ')
+    return _SEPARATORS.sub(' ', text).strip()
+
+def _ngrams(key):
+    n = CONFIG["NGRAM"]
+    padded = f" {key} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+def _similarity(a, b):
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+def _words_match(a, b):
+    # A long shared prefix can hide a completely different last word ("BEFORE & AFTER KING" /
+    # "BEFORE & AFTER SANG"), so names of equal length must also match word by word.
+    words_a, words_b = a.split(), b.split()
+    if len(words_a) != len(words_b):
+        return True
+    return all(x == y or _similarity(x, y) >= CONFIG["WORD_SIMILARITY"] for x, y in zip(words_a, words_b))
+
+def _gram_matrix(grams):
+    from scipy.sparse import csr_matrix
+
+    vocabulary = {}
+    rows, cols = [], []
+    for i, key_grams in enumerate(grams):
+        for gram in key_grams:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+    matrix = csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(len(grams), len(vocabulary)))
+    matrix.sort_indices()
+    return matrix
+
+def _candidate_pairs(matrix, threshold):
+    """
+    Returns index pairs (i < j) that can reach the Jaccard threshold. With n-grams ordered
+    rarest first, two sets with Jaccard >= t must share one of the first |a| - ceil(t|a|) + 1
+    n-grams of each (prefix filtering), so only those prefixes are used as blocks.
+    """
+    from scipy.sparse import csr_matrix, triu
+
+    frequency = np.asarray(matrix.sum(axis=0)).ravel()
+    rank = np.empty(len(frequency), dtype=np.int64)
+    rank[np.argsort(frequency, kind='stable')] = np.arange(len(frequency))
+    rows, cols = [], []
+    for i in range(matrix.shape[0]):
+        row = matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]]
+        prefix = len(row) - int(np.ceil(threshold * len(row))) + 1
+        rows.extend([i] * prefix)
+        cols.extend(row[np.argsort(rank[row], kind='stable')[:prefix]].tolist())
+    prefixes = csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=matrix.shape)
+    shared = triu(prefixes @ prefixes.T, k=1).tocoo()
+    return shared.row, shared.col
+
+def _jaccard_pairs(matrix, left, right, chunk_size=500_000):
+    """Exact Jaccard similarity for each (left[k], right[k]) pair of rows."""
+    sizes = np.diff(matrix.indptr)
+    scores = np.zeros(len(left))
+    for start in range(0, len(left), chunk_size):
+        l, r = left[start:start + chunk_size], right[start:start + chunk_size]
+        shared = np.asarray(matrix[l].multiply(matrix[r]).sum(axis=1)).ravel()
+        scores[start:start + len(l)] = shared / (sizes[l] + sizes[r] - shared)
+    return scores
+
+def build_aliases(name_counts, threshold=None):
+    """
+    Clusters raw category names ({name: appearances}) and returns the alias table
+    {raw name: canonical name} for every name that is not already canonical.
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    threshold = CONFIG["THRESHOLD"] if threshold is None else threshold
+
+    # Step 1: exact normalized keys.
+    with timed("normalize"):
+        forms = defaultdict(Counter)
+        for name, count in name_counts.items():
+            if name:
+                forms[normalize_category(name)][name] += count
+        keys = sorted(forms)
+        key_counts = [sum(forms[key].values()) for key in keys]
+        grams = [_ngrams(key) for key in keys]
+
+    # Step 2: fuzzy matches between keys, within n-gram blocks only.
+    with timed("block"):
+        matrix = _gram_matrix(grams)
+        left, right = _candidate_pairs(matrix, CONFIG["BLOCK_THRESHOLD"])
+    with timed("compare"):
+        lengths = np.array([len(key) for key in keys])
+        # The edit ratio can never exceed 2 * shorter / (sum of lengths).
+        close = 2 * np.minimum(lengths[left], lengths[right]) >= threshold * (lengths[left] + lengths[right])
+        left, right = left[close], right[close]
+        close = _jaccard_pairs(matrix, left, right) >= CONFIG["BLOCK_THRESHOLD"]
+        # Names that differ in a number ("1980s MUSIC" / "1990s MUSIC") are different categories.
+        matches = [(i, j) for i, j in zip(left[close].tolist(), right[close].tolist())
+                   if _DIGITS.findall(keys[i]) == _DIGITS.findall(keys[j])
+                   and _similarity(keys[i], keys[j]) >= threshold and _words_match(keys[i], keys[j])]
+    logging.info(f"{len(name_counts)} names, {len(keys)} normalized keys, {int(close.sum())} candidate pairs compared, {len(matches)} matches")
+
+    with timed("cluster"):
+        n = len(keys)
+        pairs = np.array(matches, dtype=np.int64).reshape(-1, 2)
+        graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        clusters = defaultdict(list)
+        for i, label in enumerate(labels):
+            clusters[label].append(i)
+
+        aliases = {}
+        for members in clusters.values():
+            # The most frequent key anchors the cluster; chained matches that drifted too
+            # far from it stay on their own.
+            anchor = max(members, key=lambda i: (key_counts[i], -len(keys[i]), keys[i]))
+            group = [i for i in members if i == anchor or _similarity(keys[i], keys[anchor]) >= CONFIG["CLUSTER_MIN_SIMILARITY"]]
+            strays = [i for i in members if i not in group]
+            for keys_in_group in [group] + [[i] for i in strays]:
+                combined = Counter()
+                for i in keys_in_group:
+                    combined.update(forms[keys[i]])
+                canonical = max(combined, key=lambda name: (combined[name], name))
+                for name in combined:
+                    if name != canonical:
+                        aliases[name] = canonical
+    return aliases
+
+def _fingerprint(name_counts):
+    digest = hashlib.sha1()
+    for name in sorted(name for name in name_counts if name):
+        digest.update(name.encode('utf-8') + b"\0")
+    digest.update(json.dumps([CONFIG["NGRAM"], CONFIG["BLOCK_THRESHOLD"], CONFIG["THRESHOLD"], CONFIG["CLUSTER_MIN_SIMILARITY"], CONFIG["WORD_SIMILARITY"]]).encode())
+    return digest.hexdigest()
+
+def load_aliases(path=None):
+    """Returns the persisted alias table, or {} if none has been built."""
+    try:
+        with open(path or CONFIG["ALIASES_PATH"], 'r', encoding='utf-8') as f:
+            return json.load(f)["aliases"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def update_aliases(name_counts, path=None):
+    """
+    Returns the alias table for these names, reusing the persisted one when it was built
+    from the same set of names and settings and rebuilding (and saving) it otherwise.
+    The persisted table is shared (archive_db's canonical_category reads it), so pass the
+    whole archive's names (category_name_counts), or use archive_aliases.
+    """
+    path = path or CONFIG["ALIASES_PATH"]
+    fingerprint = _fingerprint(name_counts)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored.get("fingerprint") == fingerprint:
+            return stored["aliases"]
+    except (OSError, ValueError):
+        pass
+
+    aliases = build_aliases(name_counts)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"fingerprint": fingerprint, "names": len(name_counts), "aliases": aliases}, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+    logging.info(f"Saved {len(aliases)} category aliases to {path}")
+    return aliases
+
+def archive_aliases(data_path=None, path=None):
+    """Returns the alias table built from every category name in the archive."""
+    return update_aliases(category_name_counts(data_path), path)
+
+def canonical_category(name, aliases):
+    return aliases.get(name, name)
+
+def merge_by_alias(mapping, aliases):
+    """
+    Re-keys a per-category mapping by canonical name, adding numbers and concatenating
+    lists of merged names (as produced by stumper_graph.aggregate_category_data).
+    """
+    merged = defaultdict(type(next(iter(mapping.values()))) if mapping else int)
+    for name, value in mapping.items():
+        merged[aliases.get(name, name)] += value
+    return merged
+
+def category_name_counts(data_path=None):
+    """Counts the appearances of every raw category name in the archive."""
+    counts = Counter()
+    for _, game in game_store.iter_games(game_store.list_games(data_path or CONFIG["DATA_PATH"]), typed=True):
+        for round_data in game.rounds:
+            for category in round_data.categories:
+                if category.name:
+                    counts[category.name] += 1
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Build the category alias table.")
+    parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    parser.add_argument("--threshold", type=float, default=CONFIG["THRESHOLD"])
+    parser.add_argument("--output", default=CONFIG["ALIASES_PATH"])
+    parser.add_argument("--show", type=int, default=15, help="Largest merged groups to print.")
+    args = parser.parse_args()
+    CONFIG["THRESHOLD"] = args.threshold
+
+    report = RunReport("categories")
+    with report.stage("count_names") as stage:
+        name_counts = category_name_counts(args.data_path)
+        stage.items = len(name_counts)
+    with report.stage("update_aliases", items=len(name_counts)):
+        aliases = update_aliases(name_counts, args.output)
+
+    groups = defaultdict(list)
+    for name, canonical in aliases.items():
+        groups[canonical].append(name)
+    print(f"{len(name_counts)} category names -> {len(name_counts) - len(aliases)} canonical names")
+    for canonical, names in sorted(groups.items(), key=lambda kv: -len(kv[1]))[:args.show]:
+        print(f"  {canonical!r} <- {', '.join(repr(n) for n in sorted(names))}")
+    report.finish()
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import colorsys
+import hashlib
+import logging
+import argparse
+import numpy as np
+import sampling
+from instrumentation import RunReport
+
+# scikit-learn and plotly are imported inside the functions that need them.
+
+# --- Configuration ---
+CONFIG = {
+    "ASSIGNMENTS_PATH": "cache/category_clusters.json",
+    "OUTPUT_HTML_FILE": "charts/jeopardy_stumper_clusters.html",
+    "METHOD": "kmeans",             # or "hdbscan"
+    "DIMENSIONS": 32,               # PCA components the categories are clustered in
+    "HDBSCAN_DIMENSIONS": 10,       # HDBSCAN's neighbour search slows sharply with dimension
+    "CLUSTERS": None,               # k-means clusters; None picks sqrt(categories / 2)
+    "MIN_CLUSTERS": 2,
+    "MAX_CLUSTERS": 120,
+    "BATCH_SIZE": 4096,             # mini-batch k-means rows per step
+    "N_INIT": 3,
+    "MIN_CLUSTER_SIZE": 5,          # HDBSCAN
+    "LABEL_NAMES": 3,               # most central category names used as a cluster's label
+    "CHART_CLUSTERS": 40,           # largest clusters shown in the summary chart
+    "SEED": 1984,
+}
+
+# Categories are grouped by topic from their pooled stumper embeddings (see stumper_graph):
+# the vectors are projected onto their top principal components, re-normalized so Euclidean
+# distance tracks cosine similarity, and clustered with mini-batch k-means (or HDBSCAN,
+# which leaves outliers unclustered as -1). Clusters are numbered largest first and labelled
+# by the category names nearest their centre. Assignments are cached in
+# CONFIG["ASSIGNMENTS_PATH"] under a fingerprint of the names, vectors and settings, along
+# with each cluster's pooled Triple Stumper rate for the summary chart.
+
+def _fingerprint(category_names, category_vectors, method):
+    digest = hashlib.sha1()
+    digest.update("\n".join(category_names).encode('utf-8'))
+    digest.update(np.ascontiguousarray(category_vectors, dtype=np.float32).tobytes())
+    settings = {key: CONFIG[key] for key in ("DIMENSIONS", "HDBSCAN_DIMENSIONS", "CLUSTERS", "MIN_CLUSTERS",
+                                             "MAX_CLUSTERS", "BATCH_SIZE", "N_INIT", "MIN_CLUSTER_SIZE", "SEED")}
+    digest.update(json.dumps([method, settings], sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def cluster_count(n):
+    if CONFIG["CLUSTERS"]:
+        return min(CONFIG["CLUSTERS"], n)
+    return min(n, max(CONFIG["MIN_CLUSTERS"], min(CONFIG["MAX_CLUSTERS"], round(np.sqrt(n / 2)))))
+
+def project(vectors, dimensions):
+    """Projects vectors onto their top principal components and L2-normalizes the result."""
+    from sklearn.decomposition import PCA
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    dimensions = min(dimensions, *vectors.shape)
+    if dimensions < vectors.shape[1]:
+        vectors = PCA(dimensions, svd_solver="randomized", random_state=CONFIG["SEED"]).fit_transform(vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+def cluster_vectors(vectors, method=None):
+    """Returns one cluster label per vector, numbered by descending cluster size; HDBSCAN outliers are -1."""
+    from sklearn.cluster import HDBSCAN, MiniBatchKMeans
+
+    method = method or CONFIG["METHOD"]
+    if len(vectors) < 2:
+        return np.zeros(len(vectors), dtype=np.int64)
+    if method == "kmeans":
+        points = project(vectors, CONFIG["DIMENSIONS"])
+        model = MiniBatchKMeans(cluster_count(len(points)), batch_size=CONFIG["BATCH_SIZE"],
+                                n_init=CONFIG["N_INIT"], random_state=CONFIG["SEED"])
+    elif method == "hdbscan":
+        points = project(vectors, CONFIG["HDBSCAN_DIMENSIONS"])
+        model = HDBSCAN(min_cluster_size=min(CONFIG["MIN_CLUSTER_SIZE"], len(points)), copy=True)
+    else:
+        raise ValueError(f"unknown clustering method {method!r}; expected 'kmeans' or 'hdbscan'")
+    labels = model.fit_predict(points)
+
+    sizes = np.bincount(labels[labels >= 0])
+    order = np.argsort(-sizes, kind='stable')
+    renumber = np.full(len(sizes) + 1, -1, dtype=np.int64)
+    renumber[order] = np.arange(len(order))
+    return renumber[labels]  # -1 indexes the trailing -1
+
+def label_clusters(category_names, category_vectors, labels):
+    """Names each cluster after its CONFIG["LABEL_NAMES"] categories most similar to the cluster's mean vector."""
+    vectors = np.asarray(category_vectors, dtype=np.float32)
+    names = {}
+    for cluster in np.unique(labels[labels >= 0]):
+        members = np.flatnonzero(labels == cluster)
+        centre = vectors[members].mean(axis=0)
+        nearest = members[np.argsort(-(vectors[members] @ centre), kind='stable')[:CONFIG["LABEL_NAMES"]]]
+        names[int(cluster)] = " / ".join(category_names[i] for i in nearest)
+    return names
+
+def cluster_color(cluster):
+    """A distinct color per cluster (golden-ratio hue steps); grey for unclustered categories."""
+    if cluster < 0:
+        return "#BBBBBB"
+    red, green, blue = colorsys.hls_to_rgb((cluster * 0.618033988749895) % 1, 0.5, 0.75)
+    return f"#{round(red * 255):02X}{round(green * 255):02X}{round(blue * 255):02X}"
+
+def summarize(category_names, labels, label_names, total_stumper_counts, category_clue_counts):
+    """One row per cluster, largest first: size, pooled clues and stumpers, and the stumper rate."""
+    rows = []
+    for cluster in sorted(set(int(label) for label in labels)):
+        members = [name for name, label in zip(category_names, labels) if label == cluster]
+        clues = sum(category_clue_counts.get(name, 0) for name in members)
+        stumpers = sum(total_stumper_counts.get(name, 0) for name in members)
+        rows.append({
+            "cluster": cluster,
+            "label": label_names.get(cluster, "unclustered"),
+            "color": cluster_color(cluster),
+            "categories": len(members),
+            "clues": clues,
+            "stumpers": stumpers,
+            "stumper_rate": round(stumpers / clues, 4) if clues else 0.0,
+            "members": sorted(members, key=lambda name: -total_stumper_counts.get(name, 0))[:10],
+        })
+    return sorted(rows, key=lambda row: (row["cluster"] < 0, -row["categories"]))
+
+def load_assignments(path=None):
+    try:
+        with open(path or CONFIG["ASSIGNMENTS_PATH"], 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def assign_clusters(category_names, category_vectors, total_stumper_counts, category_clue_counts,
+                    method=None, path=None, note=None):
+    """
+    Clusters the categories, reusing the cached labels while the names, vectors and settings
+    are unchanged, and saves the assignments with a per-cluster summary to `path`
+    (CONFIG["ASSIGNMENTS_PATH"]). `note` marks a sampled preview. Returns the assignments.
+    """
+    method = method or CONFIG["METHOD"]
+    path = path or CONFIG["ASSIGNMENTS_PATH"]
+    fingerprint = _fingerprint(category_names, category_vectors, method)
+    cached = load_assignments(path)
+    if cached and cached.get("fingerprint") == fingerprint:
+        labels = np.array([cached["categories"][name] for name in category_names], dtype=np.int64)
+        label_names = {row["cluster"]: row["label"] for row in cached["clusters"]}
+        logging.info(f"Reusing {len(label_names)} cached category clusters")
+    else:
+        start = time.perf_counter()
+        labels = cluster_vectors(category_vectors, method)
+        label_names = label_clusters(category_names, category_vectors, labels)
+        logging.info(f"Clustered {len(category_names)} categories into {len(label_names)} topics with {method} "
+                     f"in {time.perf_counter() - start:.2f}s ({int((labels < 0).sum())} unclustered)")
+
+    assignments = {
+        "fingerprint": fingerprint,
+        "method": method,
+        "note": note,
+        "categories": {name: int(label) for name, label in zip(category_names, labels)},
+        "clusters": summarize(category_names, labels, label_names, total_stumper_counts, category_clue_counts),
+    }
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(assignments, f)
+    os.replace(tmp_path, path)
+    return assignments
+
+def node_colors(category_names, assignments):
+    return [cluster_color(assignments["categories"].get(name, -1)) for name in category_names]
+
+def plot_cluster_summary(assignments, output_file=None, top_n=None):
+    """Writes a bar chart of the Triple Stumper rate of the largest clusters, colored as in the graph."""
+    import plotly.graph_objects as go
+
+    output_file = output_file or CONFIG["OUTPUT_HTML_FILE"]
+    rows = [row for row in assignments["clusters"] if row["cluster"] >= 0][:top_n or CONFIG["CHART_CLUSTERS"]]
+    rows.sort(key=lambda row: row["stumper_rate"])
+    clues = sum(row["clues"] for row in assignments["clusters"])
+    overall = sum(row["stumpers"] for row in assignments["clusters"]) / clues if clues else 0.0
+
+    fig = go.Figure(go.Bar(
+        x=[row["stumper_rate"] for row in rows],
+        y=[f"{row['label'][:60]} ({row['cluster']})" for row in rows],
+        orientation='h',
+        marker_color=[row["color"] for row in rows],
+        customdata=[[row["categories"], row["clues"], row["stumpers"], "<br>".join(row["members"][:5])] for row in rows],
+        hovertemplate=("<b>%{y}</b><br>Triple Stumper rate: %{x:.1%}<br>Categories: %{customdata[0]}<br>"
+                       "Clues: %{customdata[1]}<br>Triple Stumpers: %{customdata[2]}<br>%{customdata[3]}<extra></extra>"),
+    ))
+    fig.add_vline(x=overall, line_dash="dash", line_color="grey",
+                  annotation_text=f"all graph categories: {overall:.1%}", annotation_position="top")
+    fig.update_layout(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        height=max(500, 22 * len(rows) + 150),
+        xaxis=dict(title='Triple Stumper rate', tickformat='.0%', gridcolor='lightgrey'),
+        yaxis=dict(title=None, automargin=True),
+        margin=dict(l=20, r=20, t=60, b=40),
+        title=f"Triple Stumper rate of the {len(rows)} largest category topics",
+        font=dict(family="Arial, sans-serif"),
+    )
+    fig.write_html(output_file)
+    print(f"Cluster summary chart saved to {output_file}")
+
+def benchmark(n, dim=384, topics=200, methods=None):
+    """Times projection and clustering on n synthetic category vectors drawn around `topics` centres."""
+    from sklearn.metrics import adjusted_rand_score
+
+    rng = np.random.default_rng(CONFIG["SEED"])
+    truth = rng.integers(0, topics, n)
+    vectors = rng.normal(size=(topics, dim))[truth] + rng.normal(scale=2.0, size=(n, dim))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    results = []
+    for method in methods or ["kmeans"]:
+        start = time.perf_counter()
+        labels = cluster_vectors(vectors, method)
+        results.append({
+            "method": method,
+            "categories": n,
+            "clusters": int(labels.max()) + 1,
+            "unclustered": int((labels < 0).sum()),
+            "seconds": round(time.perf_counter() - start, 2),
+            "adjusted_rand_index": round(adjusted_rand_score(truth, labels), 3),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Chart the Triple Stumper rate of the stumper graph's category topics.")
+    parser.add_argument("--method", choices=["kmeans", "hdbscan"], default=CONFIG["METHOD"])
+    parser.add_argument("--clusters", type=int, help="k-means clusters (default: sqrt(categories / 2)).")
+    parser.add_argument("--recluster", action="store_true",
+                        help="Cluster again from the stumper_graph caches instead of charting the saved assignments.")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Time clustering N synthetic categories and exit.")
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+    CONFIG["CLUSTERS"] = args.clusters or CONFIG["CLUSTERS"]
+
+    if args.benchmark:
+        for row in benchmark(args.benchmark, methods=[args.method]):
+            print("  ".join(f"{key}={value}" for key, value in row.items()))
+        raise SystemExit(0)
+
+    report = RunReport("clustering")
+    assignments_path = sampling.output_path(CONFIG["ASSIGNMENTS_PATH"]) if args.sample else CONFIG["ASSIGNMENTS_PATH"]
+    with report.stage("load_assignments") as stage:
+        if args.recluster and not args.sample:
+            import stumper_graph
+            cached = stumper_graph.load_cached_category_vectors()
+            if cached is None:
+                raise SystemExit("The stumper_graph caches are missing; run stumper_graph.py first.")
+            category_names, category_vectors = cached
+            _, _, total_stumpers_cache, _, clue_counts_cache = stumper_graph.aggregate_cache_paths(stumper_graph.CONFIG['CACHE_PATH'])
+            with open(total_stumpers_cache, 'r') as f: total_stumper_counts = json.load(f)
+            with open(clue_counts_cache, 'r') as f: category_clue_counts = json.load(f)
+            assignments = assign_clusters(category_names, category_vectors, total_stumper_counts, category_clue_counts, args.method)
+        else:
+            assignments = load_assignments(assignments_path)
+            if assignments is None:
+                raise SystemExit(f"{assignments_path} is missing; run stumper_graph.py{' --sample' if args.sample else ''} first.")
+        stage.items = len(assignments["categories"])
+
+    output_file = sampling.output_path(CONFIG["OUTPUT_HTML_FILE"]) if args.sample else CONFIG["OUTPUT_HTML_FILE"]
+    with report.stage("write_html", items=len(assignments["clusters"])):
+        plot_cluster_summary(assignments, output_file)
+        if assignments.get("note"):
+            sampling.mark_preview(output_file, assignments["note"])
+    report.finish()
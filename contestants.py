@@ -0,0 +1,317 @@
+import os
+import logging
+import argparse
+import numpy as np
+import game_store
+from values import infer_rows
+from instrumentation import RunReport, timed
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "INDEX_PATH": "cache/contestants.npz",
+    "NOT_A_CONTESTANT": "Triple Stumper",
+}
+
+ROUNDS = ["jeopardy_round", "double_jeopardy_round", "final_jeopardy_round"]
+INDEX_VERSION = 3
+
+# One row per contestant response (a nickname in a clue's right_contestants or
+# wrong_contestants list), stored as parallel numpy columns:
+#   contestant, game, category   int32 ids into the `player_ids`, `game_ids` and `categories`
+#                                tables; `names` holds each player's full name
+#   round                        int8 index into ROUNDS
+#   dollars                      int32 clue value (the wager for Daily Doubles), 0 when unknown
+#   board_value                  int32 dollars printed on the board (a Daily Double's comes
+#                                from its row, see values.infer_rows), 0 when unknown
+#   daily_double, correct        bool
+# Rows are sorted by (contestant, game, round), and `offsets` gives each contestant's row
+# range, so a contestant's history is one slice. Response lists only hold podium
+# nicknames, and many players share a first name, so a contestant is the j-archive
+# player id the game's contestant list gives that nickname. Responses of games without a
+# contestant list (scraped before it was recorded) cannot be attributed and are left out.
+# The index records its data directory and a stamp per game (`game_stamps`, see
+# game_store.game_stamps), and is rebuilt when either no longer matches the archive.
+#
+# Coryat scores follow the usual rules: a right response earns the clue's board value
+# (a Daily Double's too, whatever the wager), a wrong one loses it except on a Daily
+# Double, and Final Jeopardy does not count.
+
+COLUMNS = ("contestant", "game", "category", "round", "dollars", "board_value", "daily_double", "correct")
+TABLES = ("player_ids", "names", "game_ids", "game_seasons", "game_stamps", "categories")
+
+def _empty_index():
+    return {
+        "contestant": np.zeros(0, dtype=np.int32),
+        "game": np.zeros(0, dtype=np.int32),
+        "category": np.zeros(0, dtype=np.int32),
+        "round": np.zeros(0, dtype=np.int8),
+        "dollars": np.zeros(0, dtype=np.int32),
+        "board_value": np.zeros(0, dtype=np.int32),
+        "daily_double": np.zeros(0, dtype=bool),
+        "correct": np.zeros(0, dtype=bool),
+        **{table: [] for table in TABLES},
+        "data_path": None,
+    }
+
+def coryat(board_value, daily_double, correct):
+    """Per-response Coryat: +board value when right, -board value when wrong, 0 for a missed Daily Double."""
+    return np.where(correct, board_value, np.where(daily_double, 0, -board_value)).astype(np.int64)
+
+class ContestantIndex:
+    """Columnar index of every contestant response in the archive."""
+
+    def __init__(self, path=None):
+        self.path = path or CONFIG["INDEX_PATH"]
+        self.data = self._load()
+        self._lookups()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return _empty_index()
+        with np.load(self.path) as npz:
+            if "version" not in npz or int(npz["version"]) != INDEX_VERSION:
+                logging.info(f"Contestant index {self.path} is out of date; rebuilding")
+                return _empty_index()
+            data = {column: npz[column] for column in COLUMNS}
+            for table in TABLES:
+                data[table] = npz[table].tolist()
+            data["data_path"] = str(npz["data_path"]) or None
+        return data
+
+    def _lookups(self):
+        data = self.data
+        self.player_index = {player_id: i for i, player_id in enumerate(data["player_ids"])}
+        # Full names are not unique; a name lookup finds the first player indexed with it.
+        self.name_ids, self.name_ids_folded = {}, {}
+        for i, name in enumerate(data["names"]):
+            self.name_ids.setdefault(name, i)
+            self.name_ids_folded.setdefault(name.casefold(), i)
+        self.game_index = {game_id: i for i, game_id in enumerate(data["game_ids"])}
+        self.category_ids = {name: i for i, name in enumerate(data["categories"])}
+        self.offsets = np.searchsorted(data["contestant"], np.arange(len(data["player_ids"]) + 1))
+        # Specials (non-numeric season directories) get -1, which no season number matches.
+        self.season_of_game = np.array([_season_num(s) if _season_num(s) is not None else -1 for s in data["game_seasons"]], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.data["contestant"])
+
+    def update(self, data_path=None):
+        """
+        Adds the responses from games not indexed yet and saves the index; starts over if it
+        indexes another directory or an indexed game changed or disappeared. Returns the rows added.
+        """
+        data_path = os.path.abspath(data_path or CONFIG["DATA_PATH"])
+        known = {f"{season}/{game_id}": stamp for season, game_id, stamp
+                 in zip(self.data["game_seasons"], self.data["game_ids"], self.data["game_stamps"])}
+        rebuild, locators, stamps = game_store.pending_games(data_path, self.data["data_path"], known, "contestant index")
+        if rebuild:
+            self.data = _empty_index()
+            self._lookups()
+        data = self.data
+        data["data_path"] = data_path
+        logging.info(f"{len(self.game_index)} games indexed, {len(locators)} to add")
+
+        def intern_id(table, lookup, value):
+            if value not in lookup:
+                lookup[value] = len(table)
+                table.append(value)
+            return lookup[value]
+
+        new = {column: [] for column in COLUMNS}
+        unattributed = set()
+        for locator, game in game_store.iter_games(locators, typed=True):
+            with timed("extract"):
+                game_idx = intern_id(data["game_ids"], self.game_index, game.game_id)
+                data["game_seasons"].append(game.season)
+                data["game_stamps"].append(stamps[game_store.game_key(locator)])
+                players = {}
+                for player in game.contestants:
+                    if player.player_id is None or not player.nickname:
+                        continue
+                    if player.player_id not in self.player_index:
+                        self.player_index[player.player_id] = len(data["player_ids"])
+                        data["player_ids"].append(player.player_id)
+                        data["names"].append(player.name)
+                    players[player.nickname] = self.player_index[player.player_id]
+                for round_data in game.rounds:
+                    if round_data.name not in ROUNDS:
+                        continue
+                    round_idx = ROUNDS.index(round_data.name)
+                    rows, base = infer_rows(round_data) if not round_data.is_final else ([[]] * len(round_data.categories), None)
+                    for category, category_rows in zip(round_data.categories, rows):
+                        for i, clue in enumerate(category.clues):
+                            row = category_rows[i] if category_rows else 0
+                            board_value = (row * base if row and base else 0) if clue.daily_double else (clue.dollars or 0)
+                            for correct, nicknames in ((True, clue.right_contestants), (False, clue.wrong_contestants)):
+                                for nickname in nicknames:
+                                    if nickname == CONFIG["NOT_A_CONTESTANT"]:
+                                        continue
+                                    if nickname not in players:
+                                        unattributed.add(game.game_id)
+                                        continue
+                                    new["contestant"].append(players[nickname])
+                                    new["game"].append(game_idx)
+                                    new["category"].append(intern_id(data["categories"], self.category_ids, category.name or ""))
+                                    new["round"].append(round_idx)
+                                    new["dollars"].append(clue.dollars or 0)
+                                    new["board_value"].append(0 if round_data.is_final else board_value)
+                                    new["daily_double"].append(clue.daily_double)
+                                    new["correct"].append(correct)
+        if unattributed:
+            logging.warning(f"{len(unattributed)} games have responses by nicknames missing from their contestant list "
+                            f"(games scraped before contestants were recorded); those responses are not indexed")
+
+        added = len(new["contestant"])
+        with timed("sort"):
+            for column in COLUMNS:
+                data[column] = np.concatenate([data[column], np.array(new[column], dtype=data[column].dtype)])
+            order = np.lexsort((data["round"], data["game"], data["contestant"]))
+            for column in COLUMNS:
+                data[column] = data[column][order]
+        self._lookups()
+        self.save()
+        return added
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        tables = {table: np.array(self.data[table], dtype=np.int64 if table == "player_ids" else str) for table in TABLES}
+        np.savez(tmp_path, version=np.array(INDEX_VERSION), data_path=np.array(self.data["data_path"] or ""), **{column: self.data[column] for column in COLUMNS}, **tables)
+        os.replace(tmp_path, self.path)
+
+    def contestant_id(self, name):
+        """Looks a contestant up by j-archive player id or full name, falling back to a case-insensitive match."""
+        if name.isdigit() and int(name) in self.player_index:
+            return self.player_index[int(name)]
+        if name in self.name_ids:
+            return self.name_ids[name]
+        return self.name_ids_folded.get(name.casefold())
+
+    def history(self, name):
+        """
+        Returns a contestant's full history: one entry per game with correct/incorrect
+        counts, Coryat score and every response, oldest game first.
+        """
+        contestant = self.contestant_id(name)
+        if contestant is None:
+            return None
+        data = self.data
+        rows = slice(self.offsets[contestant], self.offsets[contestant + 1])
+        games, correct, dollars = data["game"][rows], data["correct"][rows], data["dollars"][rows]
+        categories, rounds, daily_doubles = data["category"][rows], data["round"][rows], data["daily_double"][rows]
+        scores = coryat(data["board_value"][rows], daily_doubles, correct)
+
+        history = []
+        game_starts = np.flatnonzero(np.r_[True, games[1:] != games[:-1]])
+        for start, end in zip(game_starts, np.r_[game_starts[1:], len(games)]):
+            game = int(games[start])
+            history.append({
+                "game_id": data["game_ids"][game],
+                "season": data["game_seasons"][game],
+                "correct": int(correct[start:end].sum()),
+                "incorrect": int((~correct[start:end]).sum()),
+                "coryat": int(scores[start:end].sum()),
+                "responses": [
+                    {
+                        "round": ROUNDS[rounds[i]],
+                        "category": data["categories"][categories[i]],
+                        "dollars": int(dollars[i]),
+                        "daily_double": bool(daily_doubles[i]),
+                        "correct": bool(correct[i]),
+                    }
+                    for i in range(start, end)
+                ],
+            })
+        history.sort(key=lambda g: (_season_num(g["season"]) or 0, _game_sort_key(g["game_id"])))
+        return {"contestant": data["names"][contestant], "player_id": data["player_ids"][contestant], "games": history}
+
+    def season_leaderboard(self, season, top_n=20, by="coryat"):
+        """
+        Ranks the contestants of one season by "coryat", "correct" or "accuracy". Each row
+        has games played, correct and incorrect responses, accuracy and Coryat score (summed
+        over the season's games).
+        """
+        data = self.data
+        in_season = self.season_of_game[data["game"]] == int(season)
+        contestants = data["contestant"][in_season]
+        correct = data["correct"][in_season]
+        scores = coryat(data["board_value"][in_season], data["daily_double"][in_season], correct)
+
+        n = len(data["player_ids"])
+        right = np.bincount(contestants, weights=correct, minlength=n)
+        wrong = np.bincount(contestants, weights=~correct, minlength=n)
+        coryat_total = np.bincount(contestants, weights=scores, minlength=n)
+        pairs = np.unique(contestants.astype(np.int64) * len(data["game_ids"]) + data["game"][in_season])
+        games_played = np.bincount(pairs // len(data["game_ids"]), minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            accuracy = np.where(right + wrong > 0, right / (right + wrong), 0.0)
+
+        metric = {"coryat": coryat_total, "correct": right, "accuracy": accuracy}[by]
+        present = np.flatnonzero(right + wrong > 0)
+        ranked = present[np.lexsort((-coryat_total[present], -metric[present]))][:top_n]
+        return [
+            {
+                "contestant": data["names"][i],
+                "player_id": data["player_ids"][i],
+                "games": int(games_played[i]),
+                "correct": int(right[i]),
+                "incorrect": int(wrong[i]),
+                "accuracy": round(float(accuracy[i]), 4),
+                "coryat": int(coryat_total[i]),
+            }
+            for i in ranked
+        ]
+
+def _season_num(season):
+    try:
+        return int(season)
+    except (TypeError, ValueError):
+        return None
+
+def _game_sort_key(game_id):
+    return (0, int(game_id)) if game_id.isdigit() else (1, game_id)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Query contestant performance.")
+    parser.add_argument("--index", default=CONFIG["INDEX_PATH"], help="Index file path.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Index the responses of games added since the last build.")
+    build_parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    history_parser = subparsers.add_parser("history", help="Show one contestant's game-by-game history.")
+    history_parser.add_argument("name", help="Full name or j-archive player id.")
+    history_parser.add_argument("--responses", action="store_true", help="Also list every response.")
+    board_parser = subparsers.add_parser("leaderboard", help="Rank the contestants of a season.")
+    board_parser.add_argument("season", type=int)
+    board_parser.add_argument("--top-n", type=int, default=20)
+    board_parser.add_argument("--by", choices=["coryat", "correct", "accuracy"], default="coryat")
+    args = parser.parse_args()
+
+    index = ContestantIndex(args.index)
+    if args.command == "build":
+        report = RunReport("contestants")
+        with report.stage("update") as stage:
+            stage.items = index.update(args.data_path)
+        print(f"{len(index)} responses from {len(index.data['player_ids'])} contestants in {len(index.data['game_ids'])} games")
+        report.finish()
+    elif args.command == "history":
+        result = index.history(args.name)
+        if result is None:
+            print(f"No contestant named {args.name!r}")
+        else:
+            print(f"{result['contestant']} (player {result['player_id']}): {len(result['games'])} games")
+            for game in result["games"]:
+                print(f"  season {game['season']} game {game['game_id']}: {game['correct']} right, {game['incorrect']} wrong, Coryat ${game['coryat']:,}")
+                if args.responses:
+                    for response in game["responses"]:
+                        mark = "+" if response["correct"] else "-"
+                        dd = " (DD)" if response["daily_double"] else ""
+                        print(f"      {mark}${response['dollars']:,}{dd}  {response['category']}")
+    else:
+        print(f"Season {args.season} leaderboard by {args.by}:")
+        print(f"  {'contestant':<24} {'games':>5} {'right':>6} {'wrong':>6} {'acc':>6} {'coryat':>9}")
+        for row in index.season_leaderboard(args.season, args.top_n, args.by):
+            print(f"  {row['contestant']:<24} {row['games']:>5} {row['correct']:>6} {row['incorrect']:>6} {row['accuracy']:>6.3f} {row['coryat']:>9,}")
@@ -0,0 +1,305 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import argparse
+from collections import Counter
+import numpy as np
+import entities
+import game_store
+from answers import canonical_answer, CANONICAL_VERSION
+from instrumentation import RunReport, timed
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "CUBE_PATH": "cache/count_cube.npz",
+    "EXAMPLES": 5,  # example clues kept per (entity type, entity, season)
+}
+
+ENTITY_TYPES = ["state", "country", "element", "year"]
+ROUNDS = ["jeopardy_round", "double_jeopardy_round", "final_jeopardy_round"]
+
+# Counts are kept as a sparse 4-d cube, season x round x entity type x entity, in
+# coordinate form: one row per non-zero cell in parallel numpy columns (season, round,
+# type, entity, count), with the season and per-type entity labels in side tables.
+# States, countries and elements are counted when they are a clue's answer (with the
+# name maps in entities.py); years when a clue mentions them (entities.find_years). Any
+# slice or roll-up is a boolean mask plus a bincount.
+# The arrays live in CONFIG["CUBE_PATH"] and the tables, the indexed games and the
+# example clues for hover text in a JSON file next to it. The JSON also records the data
+# directory and a stamp per game, so counting another archive, or a game that was
+# re-scraped or deleted, rebuilds the cube instead of merging into it.
+
+def _extractors():
+    return {
+        "state": entities.get_state_name_map(),
+        "country": entities.get_country_name_map(),
+        "element": entities.get_element_name_map(),
+        "year": entities.find_years,
+    }
+
+def _extractor_fingerprint(extractors):
+    maps = {name: sorted(extractor.items()) for name, extractor in extractors.items() if isinstance(extractor, dict)}
+    settings = [CANONICAL_VERSION, entities.YEAR_PATTERN.pattern, entities.CONFIG["START_YEAR"], entities.CONFIG["END_YEAR"], ENTITY_TYPES]
+    return hashlib.sha1(json.dumps([maps, settings]).encode()).hexdigest()
+
+def parse_seasons(spec):
+    """
+    Parses a season filter such as "30", "25-30" or "1-5,12,superjeopardy" into a
+    predicate on season names; None (or "") selects every season.
+    """
+    if not spec:
+        return None
+    ranges, names = [], set()
+    for part in spec.split(','):
+        part = part.strip()
+        match = re.fullmatch(r'(\d+)\s*-\s*(\d+)', part)
+        if match:
+            ranges.append((int(match.group(1)), int(match.group(2))))
+        elif part.isdigit():
+            ranges.append((int(part), int(part)))
+        elif part:
+            names.add(part)
+    return lambda season: season in names or (season.isdigit() and any(lo <= int(season) <= hi for lo, hi in ranges))
+
+def season_sort_key(season):
+    return (0, int(season), "") if season.isdigit() else (1, 0, season)
+
+class CountCube:
+    """Season x round x entity type x entity counts, updated incrementally from the archive."""
+
+    def __init__(self, path=None):
+        self.path = path or CONFIG["CUBE_PATH"]
+        self.meta_path = os.path.splitext(self.path)[0] + ".json"
+        self.extractors = _extractors()
+        self.fingerprint = _extractor_fingerprint(self.extractors)
+        self._load()
+
+    def _reset(self):
+        self.season = np.zeros(0, dtype=np.int16)
+        self.round = np.zeros(0, dtype=np.int8)
+        self.type = np.zeros(0, dtype=np.int8)
+        self.entity = np.zeros(0, dtype=np.int32)
+        self.count = np.zeros(0, dtype=np.int32)
+        self.seasons = []
+        self.entities = {entity_type: [] for entity_type in ENTITY_TYPES}
+        self.games = {}         # game_key -> stamp (see game_store.game_stamps)
+        self.data_path = None   # the archive the cube counts, absolute
+        # examples[type][entity][season] -> [{"category", "clue", "answer"}, ...]
+        self.examples = {entity_type: {} for entity_type in ENTITY_TYPES}
+
+    def _load(self):
+        self._reset()
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with np.load(self.path) as npz:
+                arrays = {name: npz[name] for name in ("season", "round", "type", "entity", "count")}
+        except (OSError, ValueError, KeyError):
+            return
+        if meta.get("fingerprint") != self.fingerprint or meta.get("cells") != len(arrays["count"]) or "data_path" not in meta:
+            logging.info("Count cube was built by an older version or other entity name maps; rebuilding")
+            return
+        self.season, self.round, self.type, self.entity, self.count = (
+            arrays[name] for name in ("season", "round", "type", "entity", "count")
+        )
+        self.seasons = meta["seasons"]
+        self.entities = meta["entities"]
+        self.games = meta["games"]
+        self.data_path = meta["data_path"]
+        self.examples = meta["examples"]
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        meta = {
+            "fingerprint": self.fingerprint,
+            "cells": len(self.count),
+            "seasons": self.seasons,
+            "entities": self.entities,
+            "data_path": self.data_path,
+            "games": self.games,
+            "examples": self.examples,
+        }
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, season=self.season, round=self.round, type=self.type, entity=self.entity, count=self.count)
+        with open(self.meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def _index(self, table, lookup, value):
+        if value not in lookup:
+            lookup[value] = len(table)
+            table.append(value)
+        return lookup[value]
+
+    def update(self, data_path=None):
+        """
+        Adds the games not counted yet and saves the cube; starts over if the cube counts
+        another directory or a counted game changed or disappeared. Returns the number of games added.
+        """
+        data_path = os.path.abspath(data_path or CONFIG["DATA_PATH"])
+        rebuild, locators, stamps = game_store.pending_games(data_path, self.data_path, self.games, "count cube")
+        if rebuild:
+            self._reset()
+        self.data_path = data_path
+        logging.info(f"{len(self.games)} games in the count cube, {len(locators)} to add")
+        if not locators:
+            if rebuild:
+                self.save()
+            return 0
+
+        season_ids = {season: i for i, season in enumerate(self.seasons)}
+        entity_ids = {t: {entity: i for i, entity in enumerate(self.entities[t])} for t in ENTITY_TYPES}
+        answer_maps = [(ENTITY_TYPES.index(t), t, self.extractors[t]) for t in ("state", "country", "element")]
+        year_type, find_years = ENTITY_TYPES.index("year"), self.extractors["year"]
+        cells = Counter()
+
+        def record(type_idx, entity_type, entity, season, round_idx, category, clue):
+            entity_idx = self._index(self.entities[entity_type], entity_ids[entity_type], entity)
+            cells[(season_idx, round_idx, type_idx, entity_idx)] += 1
+            examples = self.examples[entity_type].setdefault(entity, {}).setdefault(season, [])
+            if len(examples) < CONFIG["EXAMPLES"]:
+                examples.append({"category": category.name or "N/A", "clue": clue.clue, "answer": clue.answer})
+
+        for locator, game in game_store.iter_games(locators, typed=True):
+            season = game_store.season_of(locator)
+            season_idx = self._index(self.seasons, season_ids, season)
+            self.games[game_store.game_key(locator)] = stamps[game_store.game_key(locator)]
+            with timed("scan"):
+                for round_data, category, clue in game.iter_clues():
+                    if round_data.name not in ROUNDS:
+                        continue
+                    round_idx = ROUNDS.index(round_data.name)
+                    answer = canonical_answer(clue.answer)
+                    for type_idx, entity_type, name_map in answer_maps:
+                        if answer in name_map:
+                            record(type_idx, entity_type, name_map[answer], season, round_idx, category, clue)
+                    for year in find_years(clue.clue):
+                        record(year_type, "year", str(year), season, round_idx, category, clue)
+
+        with timed("coalesce"):
+            keys = np.array(list(cells), dtype=np.int64).reshape(-1, 4)
+            self._merge(keys, np.fromiter(cells.values(), dtype=np.int64, count=len(cells)))
+        self.save()
+        return len(locators)
+
+    def _merge(self, new_keys, new_counts):
+        """Adds new cells to the cube, summing cells that already exist."""
+        keys = np.concatenate([np.stack([self.season, self.round, self.type, self.entity], axis=1).astype(np.int64), new_keys])
+        counts = np.concatenate([self.count.astype(np.int64), new_counts])
+        # Pack the four coordinates into one sortable key.
+        dims = keys.max(axis=0) + 1 if len(keys) else np.ones(4, dtype=np.int64)
+        packed = np.ravel_multi_index(keys.T, dims)
+        unique, inverse = np.unique(packed, return_inverse=True)
+        season, round_idx, type_idx, entity = np.unravel_index(unique, dims)
+        self.season, self.round = season.astype(np.int16), round_idx.astype(np.int8)
+        self.type, self.entity = type_idx.astype(np.int8), entity.astype(np.int32)
+        self.count = np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int32)
+
+    def _mask(self, entity_type, seasons=None, rounds=None):
+        mask = self.type == ENTITY_TYPES.index(entity_type)
+        if seasons is not None:
+            selected = np.array([seasons(season) for season in self.seasons], dtype=bool)
+            mask &= selected[self.season] if len(selected) else False
+        if rounds is not None:
+            mask &= np.isin(self.round, [ROUNDS.index(r) for r in rounds])
+        return mask
+
+    def counts(self, entity_type, seasons=None, rounds=None):
+        """Returns {entity: count} for one entity type, over the seasons (a parse_seasons predicate) and rounds given."""
+        mask = self._mask(entity_type, seasons, rounds)
+        totals = np.bincount(self.entity[mask], weights=self.count[mask], minlength=len(self.entities[entity_type]))
+        return {self.entities[entity_type][i]: int(totals[i]) for i in np.flatnonzero(totals)}
+
+    def by_season(self, entity_type, seasons=None, rounds=None):
+        """Returns {season: {entity: count}} for every selected season, oldest first."""
+        mask = self._mask(entity_type, seasons, rounds)
+        n_entities = len(self.entities[entity_type])
+        grid = np.zeros((len(self.seasons), n_entities), dtype=np.int64)
+        np.add.at(grid, (self.season[mask], self.entity[mask]), self.count[mask])
+        result = {}
+        for season_idx in sorted(range(len(self.seasons)), key=lambda i: season_sort_key(self.seasons[i])):
+            season = self.seasons[season_idx]
+            if seasons is None or seasons(season):
+                row = grid[season_idx]
+                result[season] = {self.entities[entity_type][i]: int(row[i]) for i in np.flatnonzero(row)}
+        return result
+
+    def example_clues(self, entity_type, entities, seasons=None):
+        """Returns {entity: [up to EXAMPLES clues]} drawn from the selected seasons, oldest first."""
+        result = {}
+        for entity in entities:
+            per_season = self.examples[entity_type].get(str(entity), {})
+            clues = []
+            for season in sorted(per_season, key=season_sort_key):
+                if seasons is None or seasons(season):
+                    clues.extend(per_season[season])
+                if len(clues) >= CONFIG["EXAMPLES"]:
+                    break
+            result[entity] = clues[:CONFIG["EXAMPLES"]]
+        return result
+
+    def slice(self, entity_type, seasons=None, rounds=None):
+        """Returns (counts, example clues) in the shape the chart scripts' get_*_counts functions return."""
+        counts = self.counts(entity_type, seasons, rounds)
+        if entity_type == "year":
+            counts = {int(year): count for year, count in counts.items()}
+        return counts, self.example_clues(entity_type, counts, seasons)
+
+    def frames(self, entity_type, seasons=None, rounds=None):
+        """Returns [(season, counts, example clues)] with one animation frame per selected season."""
+        frames = []
+        for season, counts in self.by_season(entity_type, seasons, rounds).items():
+            only_season = lambda s, season=season: s == season
+            if entity_type == "year":
+                counts = {int(year): count for year, count in counts.items()}
+            frames.append((season, counts, self.example_clues(entity_type, counts, only_season)))
+        return frames
+
+def load_cube(data_path=None, path=None):
+    """Returns the count cube, first adding any games that are not in it yet."""
+    cube = CountCube(path)
+    cube.update(data_path)
+    return cube
+
+def output_path(default_path, seasons_spec=None, animate=False):
+    """Derives the HTML file name for a season-filtered or animated variant of a chart."""
+    stem, ext = os.path.splitext(default_path)
+    if animate:
+        stem += "_by_season"
+    if seasons_spec:
+        stem += "_seasons_" + re.sub(r'[^\w-]+', '_', seasons_spec)
+    return stem + ext
+
+def add_arguments(parser):
+    """Adds the --seasons and --animate options shared by the chart scripts."""
+    parser.add_argument("--seasons", help='Only count these seasons, e.g. "30", "25-30" or "1-5,12".')
+    parser.add_argument("--animate", action="store_true", help="Write an animated chart with one frame per season.")
+    parser.add_argument("--data-path", default=CONFIG["DATA_PATH"])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Build the season x round x entity count cube and query it.")
+    parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    parser.add_argument("--cube", default=CONFIG["CUBE_PATH"])
+    parser.add_argument("--type", choices=ENTITY_TYPES, default="state")
+    parser.add_argument("--seasons", help='Season filter, e.g. "25-30".')
+    parser.add_argument("--rounds", nargs="+", choices=ROUNDS)
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    report = RunReport("count_cube")
+    with report.stage("update") as stage:
+        cube = CountCube(args.cube)
+        stage.items = cube.update(args.data_path)
+    with report.stage("query"):
+        counts = cube.counts(args.type, parse_seasons(args.seasons), args.rounds)
+    print(f"{len(cube.count)} non-zero cells over {len(cube.seasons)} seasons and {len(cube.games)} games")
+    for entity, count in sorted(counts.items(), key=lambda kv: -kv[1])[:args.top_n]:
+        print(f"  {entity:<10} {count}")
+    report.finish()
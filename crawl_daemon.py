@@ -0,0 +1,242 @@
+import os
+import gc
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+import subprocess
+from collections import deque
+from datetime import datetime, timezone
+import crawler
+from instrumentation import RunReport, current_rss_mb
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_DIR": "data",
+    "STORAGE": "json",
+    "POLL_INTERVAL": 6 * 3600,      # seconds between polls of the season index
+    "POLL_SEASONS": 2,              # newest seasons re-listed on each poll; new games air in the current one
+    "STATUS_PATH": "cache/crawl_daemon_status.json",
+    "STATUS_INTERVAL": 10,          # at most one status write per this many seconds during a crawl
+    "RATE_WINDOW": 24 * 3600,       # seconds of history behind the games/hour figure
+    "REFRESH_TIMEOUT": 3600,        # seconds per refresh command
+    # Run after a poll that saved games; {data_dir} is the daemon's data directory (absolute,
+    # since the commands run from the repository root).
+    "REFRESH_COMMANDS": [
+        ["archive_db.py", "build", "{data_dir}"],
+        ["contestants.py", "build", "{data_dir}"],
+        ["count_cube.py", "{data_dir}"],
+        ["build.py", "--data-path", "{data_dir}"],
+    ],
+}
+
+# The daemon stays small over weeks of uptime: every poll crawls with the same Fetcher (one
+# HTTP session and one token bucket), parse trees are decomposed as soon as they are read,
+# a collection runs after each batch, and the downstream refreshes, which load the whole
+# archive, each run in their own process. Only counters and a bounded window of batch
+# history are kept between polls.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _now_iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds") if timestamp else None
+
+class CrawlDaemon:
+    """Polls the newest seasons for new games, refreshes the derived data after each batch and reports its status."""
+
+    def __init__(self, data_dir=None, storage=None, base_url=None, seasons=None, interval=None,
+                 status_path=None, refresh=True, fetcher=None, clock=time.time):
+        self.data_dir = os.path.abspath(data_dir or CONFIG["DATA_DIR"])
+        self.storage = storage or CONFIG["STORAGE"]
+        self.base_url = base_url or crawler.CONFIG["BASE_URL"]
+        self.seasons = seasons or CONFIG["POLL_SEASONS"]
+        self.interval = CONFIG["POLL_INTERVAL"] if interval is None else interval
+        self.status_path = status_path or CONFIG["STATUS_PATH"]
+        self.refresh_enabled = refresh
+        self.fetcher = fetcher or crawler.Fetcher()
+        self.clock = clock
+        self.stopping = threading.Event()
+
+        self.started_at = clock()
+        self.state = "starting"
+        self.polls = 0
+        self.games_saved = 0
+        self.failed_polls = 0
+        self.batches = deque()       # (finished at, games saved) within CONFIG["RATE_WINDOW"]
+        self.queue_depth = 0
+        self.peak_rss_mb = 0.0
+        self.last_poll = None
+        self.last_refresh = None
+        # Set when games are saved and cleared by a refresh whose commands all succeed, so
+        # games saved by a poll that then failed (or a failed refresh) are refreshed later.
+        self.refresh_pending = False
+        self.last_error = None
+        self.next_poll_at = None
+        self._status_written = 0.0
+
+    def games_per_hour(self):
+        now = self.clock()
+        while self.batches and self.batches[0][0] < now - CONFIG["RATE_WINDOW"]:
+            self.batches.popleft()
+        window = min(CONFIG["RATE_WINDOW"], now - self.started_at)
+        return sum(saved for _, saved in self.batches) * 3600 / window if window > 0 else 0.0
+
+    def status(self):
+        rss = current_rss_mb()
+        self.peak_rss_mb = max(self.peak_rss_mb, rss or 0.0)
+        return {
+            "state": self.state,
+            "pid": os.getpid(),
+            "data_dir": self.data_dir,
+            "started_at": _now_iso(self.started_at),
+            "uptime_s": round(self.clock() - self.started_at, 1),
+            "polls": self.polls,
+            "failed_polls": self.failed_polls,
+            "games_saved": self.games_saved,
+            "games_per_hour": round(self.games_per_hour(), 2),
+            "queue_depth": self.queue_depth,
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "request_rate": round(self.fetcher.bucket.rate, 3),
+            "fetch_stats": dict(self.fetcher.stats),
+            "last_poll": self.last_poll,
+            "last_refresh": self.last_refresh,
+            "refresh_pending": self.refresh_pending,
+            "last_error": self.last_error,
+            "next_poll_at": _now_iso(self.next_poll_at),
+            "updated_at": _now_iso(self.clock()),
+        }
+
+    def write_status(self):
+        if os.path.dirname(self.status_path):
+            os.makedirs(os.path.dirname(self.status_path), exist_ok=True)
+        tmp_path = self.status_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.status(), f, indent=4)
+        os.replace(tmp_path, self.status_path)
+        self._status_written = self.clock()
+
+    def _progress(self, stats, queued):
+        self.queue_depth = queued
+        if self.clock() - self._status_written >= CONFIG["STATUS_INTERVAL"]:
+            self.write_status()
+
+    def poll(self, seasons=None):
+        """
+        Crawls the newest `seasons` seasons (all with 0) and refreshes downstream data if this
+        or an earlier poll saved games that are not refreshed yet. Returns the games saved.
+        """
+        seasons = self.seasons if seasons is None else seasons or None
+        self.state = "crawling"
+        self.write_status()
+        started = self.clock()
+        before = dict(self.fetcher.stats)
+        report = RunReport("crawl_daemon")
+        try:
+            crawler.crawl(self.data_dir, self.storage, self.base_url, seasons, self.fetcher, report, self._progress)
+        finally:
+            self.queue_depth = 0
+            delta = {name: count - before.get(name, 0) for name, count in self.fetcher.stats.items()
+                     if count != before.get(name, 0)}
+            saved = delta.get("games_saved", 0)
+            self.refresh_pending = self.refresh_pending or saved > 0
+            self.polls += 1
+            self.games_saved += saved
+            self.batches.append((self.clock(), saved))
+            self.last_poll = {"finished_at": _now_iso(self.clock()), "wall_s": round(self.clock() - started, 1),
+                              "seasons": seasons, **delta}
+            collected = gc.collect()
+            logging.info(f"Poll {self.polls}: {saved} new games, {delta.get('failed', 0)} failed; "
+                         f"collected {collected} objects, RSS {current_rss_mb():.1f} MB")
+        if self.refresh_pending and self.refresh_enabled:
+            with report.stage("refresh", items=len(CONFIG["REFRESH_COMMANDS"])):
+                self.refresh()
+        report.finish()
+        return saved
+
+    def refresh(self):
+        """Runs each refresh command in its own process; a failed command is logged and the rest still run."""
+        self.state = "refreshing"
+        self.write_status()
+        started = self.clock()
+        results = {}
+        for command in CONFIG["REFRESH_COMMANDS"]:
+            args = [part.format(data_dir=self.data_dir) for part in command]
+            name = os.path.splitext(args[0])[0]
+            try:
+                result = subprocess.run([sys.executable, *args], cwd=REPO_DIR, timeout=CONFIG["REFRESH_TIMEOUT"],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+                results[name] = result.returncode
+                if result.returncode:
+                    logging.error(f"Refresh {' '.join(args)} exited with {result.returncode}: {result.stderr.strip()[-500:]}")
+            except subprocess.TimeoutExpired:
+                results[name] = "timeout"
+                logging.error(f"Refresh {' '.join(args)} timed out after {CONFIG['REFRESH_TIMEOUT']}s")
+        self.last_refresh = {"finished_at": _now_iso(self.clock()), "wall_s": round(self.clock() - started, 1),
+                             "exit_codes": results}
+        self.refresh_pending = any(code != 0 for code in results.values())
+        logging.info(f"Refreshed downstream data in {self.clock() - started:.1f}s: {results}")
+
+    def run(self, once=False, backfill=False):
+        """Polls until stop() (SIGTERM or SIGINT when run as a script); with once, polls a single time."""
+        first = True
+        while not self.stopping.is_set():
+            try:
+                self.poll(0 if first and backfill else None)
+                self.last_error = None
+            except Exception as e:
+                # A network outage or a bad page must not end weeks of uptime; the next poll retries.
+                self.failed_polls += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logging.exception("Poll failed")
+                if self.refresh_pending and self.refresh_enabled:
+                    # Games the failed poll saved before it stopped still need their refresh.
+                    try:
+                        self.refresh()
+                    except Exception:
+                        logging.exception("Refresh after a failed poll failed")
+            first = False
+            if once:
+                break
+            self.next_poll_at = self.clock() + self.interval
+            self.state = "sleeping"
+            self.write_status()
+            self.stopping.wait(self.interval)
+        self.state = "stopped"
+        self.next_poll_at = None
+        self.write_status()
+
+    def stop(self, *_):
+        logging.info("Stopping after the current step")
+        self.stopping.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Poll j-archive for newly aired games and keep the derived data up to date.")
+    parser.add_argument("--data-dir", default=CONFIG["DATA_DIR"])
+    parser.add_argument("--storage", choices=["json", "jsonl"], default=CONFIG["STORAGE"],
+                        help="json: one file per game; jsonl: one compressed bundle per season.")
+    parser.add_argument("--base-url", default=crawler.CONFIG["BASE_URL"], help="Site root (e.g. a local test server).")
+    parser.add_argument("--interval", type=float, default=CONFIG["POLL_INTERVAL"], help="Seconds between polls.")
+    parser.add_argument("--seasons", type=int, default=CONFIG["POLL_SEASONS"], help="Newest seasons checked on each poll.")
+    parser.add_argument("--status", default=CONFIG["STATUS_PATH"], help="Status file path.")
+    parser.add_argument("--backfill", action="store_true", help="Crawl every season on the first poll.")
+    parser.add_argument("--once", action="store_true", help="Poll once and exit.")
+    parser.add_argument("--no-refresh", action="store_true", help="Do not refresh downstream data after a batch.")
+    parser.add_argument("--show-status", action="store_true", help="Print the running daemon's status file and exit.")
+    args = parser.parse_args()
+
+    if args.show_status:
+        with open(args.status, 'r') as f:
+            print(f.read())
+        sys.exit(0)
+
+    daemon = CrawlDaemon(args.data_dir, args.storage, args.base_url, args.seasons, args.interval,
+                         args.status, refresh=not args.no_refresh)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run(once=args.once, backfill=args.backfill)
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import heapq
+import random
+import logging
+import argparse
+from collections import Counter
+from email.utils import parsedate_to_datetime
+import requests
+from bs4 import BeautifulSoup
+import game_store
+import scraper
+from instrumentation import RunReport, timed
+
+# --- Configuration ---
+CONFIG = {
+    "BASE_URL": scraper.BASE_URL,
+    "DATA_DIR": "data",
+    "TIMEOUT": scraper.TIMEOUT,    # (connect, read) seconds per request
+    "MAX_RETRIES": 5,              # retries per request after the first attempt
+    "RETRY_STATUSES": {429, 500, 502, 503, 504},
+    "BACKOFF_BASE": 1.0,           # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+    "BACKOFF_MAX": 60.0,
+    "MAX_REQUEUES": 2,             # times a failed page goes back to the end of the queue
+    "RATE": 1.0,                   # starting requests per second
+    "MIN_RATE": 0.1,
+    "MAX_RATE": 4.0,
+    "BURST": 2,
+    "RATE_INCREASE": 0.05,         # added to the rate after each successful request
+    "RATE_DECREASE": 0.5,          # rate multiplier after a 429, 5xx or timeout
+    "USER_AGENT": "jeopardy-archive-crawler",
+}
+
+# The crawl is a priority queue of pages. Lower keys go first:
+#   (tier, season key, kind, game key)
+# tier 0 is the first pass and each requeue of a failed page moves it one tier later
+# (backfill). Within a tier the newest season comes first, its season page before its
+# games, and games newest (highest id) first. Numbered seasons come before specials.
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate adapts to the server: additive increase after each
+    success, multiplicative decrease when the server signals pressure (AIMD).
+    """
+
+    def __init__(self, rate=None, burst=None, min_rate=None, max_rate=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate or CONFIG["RATE"]
+        self.burst = burst or CONFIG["BURST"]
+        self.min_rate = min_rate or CONFIG["MIN_RATE"]
+        self.max_rate = max_rate or CONFIG["MAX_RATE"]
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.burst)
+        self.updated = clock()
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            with timed("rate_limit_wait"):
+                self.sleep((1 - self.tokens) / self.rate)
+            self.tokens = 1.0
+            self.updated = self.clock()
+        self.tokens -= 1
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + CONFIG["RATE_INCREASE"])
+
+    def on_pressure(self):
+        self.rate = max(self.min_rate, self.rate * CONFIG["RATE_DECREASE"])
+        self.tokens = min(self.tokens, 0.0)
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header (seconds or an HTTP date); None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None, rng=random):
+    """
+    Exponential backoff with full jitter: a random delay in [0, BACKOFF_BASE * 2**attempt],
+    capped at BACKOFF_MAX, and never shorter than the server's Retry-After.
+    """
+    ceiling = min(CONFIG["BACKOFF_MAX"], CONFIG["BACKOFF_BASE"] * 2 ** attempt)
+    delay = rng.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, CONFIG["BACKOFF_MAX"]))
+    return delay
+
+def is_retryable(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in CONFIG["RETRY_STATUSES"]
+
+class Fetcher:
+    """GETs pages through the token bucket, retrying timeouts, dropped connections, 429s and 5xx."""
+
+    def __init__(self, bucket=None, session=None, rng=None, sleep=time.sleep):
+        self.bucket = bucket or AdaptiveTokenBucket()
+        self.session = session or requests.Session()
+        self.session.headers.setdefault("User-Agent", CONFIG["USER_AGENT"])
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+        self.stats = Counter()
+
+    def get(self, url):
+        """Returns the response, or raises the last requests exception once retries run out."""
+        for attempt in range(CONFIG["MAX_RETRIES"] + 1):
+            self.bucket.acquire()
+            self.stats["requests"] += 1
+            retry_after = None
+            try:
+                with timed("http_get"):
+                    response = self.session.get(url, timeout=CONFIG["TIMEOUT"])
+                response.raise_for_status()
+            except requests.RequestException as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+                if e.response is not None:
+                    self.stats[f"status_{e.response.status_code}"] += 1
+                    retry_after = retry_after_seconds(e.response.headers.get("Retry-After"))
+                else:
+                    self.stats["timeouts" if isinstance(e, requests.Timeout) else "connection_errors"] += 1
+                self.bucket.on_pressure()
+            else:
+                self.bucket.on_success()
+                return response
+
+            if attempt == CONFIG["MAX_RETRIES"]:
+                raise error
+            delay = backoff_delay(attempt, retry_after, self.rng)
+            self.stats["retries"] += 1
+            logging.warning(f"{url}: {error}; retry {attempt + 1} in {delay:.1f}s at {self.bucket.rate:.2f} req/s")
+            with timed("backoff_sleep"):
+                self.sleep(delay)
+
+    def get_soup(self, url):
+        response = self.get(url)
+        with timed("html_parse"):
+            return BeautifulSoup(response.content, 'lxml')
+
+def season_key(season):
+    return (0, -int(season)) if season.isdigit() else (1, season)
+
+def game_key(game_id):
+    return -int(game_id) if game_id.isdigit() else 0
+
+class CrawlQueue:
+    """Priority queue of pages to fetch; see the ordering comment above."""
+
+    SEASON, GAME = 0, 1
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+
+    def push(self, kind, url, season, game_id=None, tier=0):
+        key = (tier, season_key(season), kind, game_key(game_id) if game_id else 0)
+        heapq.heappush(self._heap, (key, self._seq, kind, url, season, game_id, tier))
+        self._seq += 1
+
+    def pop(self):
+        _, _, kind, url, season, game_id, tier = heapq.heappop(self._heap)
+        return kind, url, season, game_id, tier
+
+    def __len__(self):
+        return len(self._heap)
+
+class GameSink:
+    """Writes games in either storage layout and knows which games are already stored."""
+
+    def __init__(self, data_dir, storage="json"):
+        self.data_dir = data_dir
+        self.storage = storage
+        self.bundles = {}
+        self.bundled_ids = {}
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _bundle(self, season):
+        if season not in self.bundles:
+            self.bundles[season] = game_store.SeasonBundleWriter(self.data_dir, season)
+        return self.bundles[season]
+
+    def __contains__(self, season_game):
+        season, game_id = season_game
+        if self.storage == "jsonl":
+            if season in self.bundles:
+                return game_id in self.bundles[season]
+            # Read-only: a writer (and the bundle file) is only created by save().
+            if season not in self.bundled_ids:
+                path = game_store.existing_bundle(self.data_dir, season)
+                self.bundled_ids[season] = set(game_store.load_index(path)) if path else set()
+            return str(game_id) in self.bundled_ids[season]
+        return os.path.exists(os.path.join(self.data_dir, season, f"{game_id}.json"))
+
+    def save(self, season, game_id, game_data):
+        with timed("write_json"):
+            if self.storage == "jsonl":
+                self._bundle(season).append(game_id, game_data)
+                return
+            season_dir = os.path.join(self.data_dir, season)
+            os.makedirs(season_dir, exist_ok=True)
+            # Written to a temporary name first so an interrupted crawl never leaves a truncated game.
+            file_path = os.path.join(season_dir, f"{game_id}.json")
+            with open(file_path + ".tmp", 'w') as f:
+                json.dump(game_data, f, indent=4)
+            os.replace(file_path + ".tmp", file_path)
+
+    def close(self):
+        for bundle in self.bundles.values():
+            bundle.close()
+        self.bundles = {}
+
+def crawl(data_dir=None, storage="json", base_url=None, seasons=None, fetcher=None, report=None, progress=None):
+    """
+    Crawls the archive newest season first, skipping games that are already stored.
+    `seasons` limits the crawl to the newest N seasons. `progress(stats, queued pages)` is
+    called after every page. Returns the crawl statistics.
+    Parse trees are decomposed as soon as they are read: BeautifulSoup trees are full of
+    reference cycles, so otherwise they wait for the cyclic garbage collector.
+    """
+    base_url = base_url or CONFIG["BASE_URL"]
+    fetcher = fetcher or Fetcher()
+    sink = GameSink(data_dir or CONFIG["DATA_DIR"], storage)
+    report = report or RunReport("crawler")
+    stats = fetcher.stats
+
+    with report.stage("season_index") as stage:
+        index_soup = fetcher.get_soup(base_url)
+        season_links = scraper.get_season_links(index_soup, base_url)
+        index_soup.decompose()
+        stage.items = len(season_links)
+    logging.info(f"Found {len(season_links)} season links")
+
+    queue = CrawlQueue()
+    season_links = sorted(season_links, key=lambda link: season_key(link.split('=')[-1]))
+    for season_link in season_links[:seasons]:
+        queue.push(CrawlQueue.SEASON, season_link, season_link.split('=')[-1])
+
+    saved_before = stats["games_saved"]
+    try:
+        with report.stage("crawl") as stage:
+            while queue:
+                kind, url, season, game_id, tier = queue.pop()
+                try:
+                    if kind == CrawlQueue.SEASON:
+                        season_soup = fetcher.get_soup(url)
+                        game_links = scraper.get_game_links(season_soup, base_url)
+                        season_soup.decompose()
+                        logging.info(f"Season {season}: {len(game_links)} games")
+                        for game_link in game_links:
+                            linked_id = game_link.split('=')[-1]
+                            if (season, linked_id) in sink:
+                                stats["already_stored"] += 1
+                            else:
+                                queue.push(CrawlQueue.GAME, game_link, season, linked_id)
+                    else:
+                        game_soup = fetcher.get_soup(url)
+                        try:
+                            with timed("extract"):
+                                game_data = scraper.parse_game(game_soup, url)
+                        finally:
+                            game_soup.decompose()
+                        sink.save(season, game_id, game_data)
+                        stats["games_saved"] += 1
+                        logging.info(f"Saved season {season} game {game_id} ({len(queue)} pages queued)")
+                except requests.RequestException as e:
+                    if is_retryable(e) and tier < CONFIG["MAX_REQUEUES"]:
+                        stats["requeued"] += 1
+                        logging.warning(f"Deferring {url} to backfill pass {tier + 1}: {e}")
+                        queue.push(kind, url, season, game_id, tier + 1)
+                    else:
+                        stats["failed"] += 1
+                        logging.error(f"Giving up on {url}: {e}")
+                if progress:
+                    progress(stats, len(queue))
+            stage.items = stats["games_saved"] - saved_before
+    finally:
+        sink.close()
+
+    logging.info(f"Crawl finished at {fetcher.bucket.rate:.2f} req/s")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Crawl j-archive newest-first with retries and adaptive rate limiting.")
+    parser.add_argument("--data-dir", default=CONFIG["DATA_DIR"])
+    parser.add_argument("--storage", choices=["json", "jsonl"], default="json",
+                        help="json: one file per game; jsonl: one compressed bundle per season.")
+    parser.add_argument("--base-url", default=CONFIG["BASE_URL"], help="Site root (e.g. a local test server).")
+    parser.add_argument("--seasons", type=int, help="Only crawl the newest N seasons.")
+    parser.add_argument("--rate", type=float, default=CONFIG["RATE"], help="Starting requests per second.")
+    parser.add_argument("--max-rate", type=float, default=CONFIG["MAX_RATE"])
+    parser.add_argument("--timeout", type=float, default=CONFIG["TIMEOUT"][1], help="Read timeout in seconds.")
+    parser.add_argument("--max-retries", type=int, default=CONFIG["MAX_RETRIES"])
+    args = parser.parse_args()
+    CONFIG.update(RATE=args.rate, MAX_RATE=args.max_rate, MAX_RETRIES=args.max_retries,
+                  TIMEOUT=(CONFIG["TIMEOUT"][0], args.timeout))
+
+    report = RunReport("crawler")
+    stats = crawl(args.data_dir, args.storage, args.base_url, args.seasons, report=report)
+    print("Crawl statistics: " + ", ".join(f"{name}={count}" for name, count in sorted(stats.items())))
+    report.finish()
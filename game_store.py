@@ -0,0 +1,396 @@
+import os
+import io
+import gzip
+import json
+import zlib
+import logging
+import argparse
+from collections import defaultdict
+from instrumentation import timed
+from schema import SchemaError, decode_game, loads
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# --- Configuration ---
+CONFIG = {
+    "COMPRESSION": "zstd" if zstandard else "gzip",
+    "GZIP_LEVEL": 6,
+    "ZSTD_LEVEL": 10,
+    "INDEX_FLUSH_EVERY": 50,
+}
+
+# Two on-disk layouts are supported side by side:
+#   data/<season>/<game_id>.json    one pretty-printed file per game (the scraper's original output)
+#   data/<season>.jsonl.gz|.zst     one bundle per season; every line is {"game_id": ..., "game": {...}}
+#                                   compressed as its own gzip member / zstd frame, so the sidecar
+#                                   index (<bundle>.idx.json) can map a game id to (offset, length).
+#
+# Games are addressed by a locator string: a .json path, or "<bundle path>#<game_id>".
+
+BUNDLE_SUFFIXES = {".jsonl.gz": "gzip", ".jsonl.zst": "zstd"}
+INDEX_SUFFIX = ".idx.json"
+
+def _bundle_compression(path):
+    for suffix, compression in BUNDLE_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+def _compress(data, compression):
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=CONFIG["ZSTD_LEVEL"]).compress(data)
+    return gzip.compress(data, compresslevel=CONFIG["GZIP_LEVEL"], mtime=0)
+
+def _decompress(data, compression):
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+def bundle_path(data_dir, season, compression=None):
+    compression = compression or CONFIG["COMPRESSION"]
+    suffix = next(s for s, c in BUNDLE_SUFFIXES.items() if c == compression)
+    return os.path.join(data_dir, f"{season}{suffix}")
+
+def _write_index(path, index):
+    tmp_path = path + INDEX_SUFFIX + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, path + INDEX_SUFFIX)
+
+def existing_bundle(data_dir, season):
+    """Returns the path of the season's bundle in whichever compression it has, or None."""
+    existing = [bundle_path(data_dir, season, c) for c in BUNDLE_SUFFIXES.values()]
+    return next((p for p in existing if os.path.exists(p)), None)
+
+class SeasonBundleWriter:
+    """Appends compact game records to one compressed JSON Lines bundle per season."""
+
+    def __init__(self, data_dir, season, compression=None):
+        # Keep appending to whatever bundle the season already has.
+        self.path = existing_bundle(data_dir, season) or bundle_path(data_dir, season, compression)
+        self.compression = _bundle_compression(self.path)
+        self.index = load_index(self.path) if os.path.exists(self.path) else {}
+        self._file = open(self.path, 'ab')
+        self._pending = 0
+
+    def __contains__(self, game_id):
+        return str(game_id) in self.index
+
+    def append(self, game_id, game_data):
+        line = json.dumps({"game_id": str(game_id), "game": game_data}, separators=(',', ':'), ensure_ascii=False) + "\n"
+        payload = _compress(line.encode('utf-8'), self.compression)
+        offset = self._file.seek(0, io.SEEK_END)
+        self._file.write(payload)
+        self.index[str(game_id)] = [offset, len(payload)]
+
+        self._pending += 1
+        if self._pending >= CONFIG["INDEX_FLUSH_EVERY"]:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        _write_index(self.path, self.index)
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def rebuild_index(path):
+    """Recovers the (offset, length) index of a bundle by walking its gzip members / zstd frames."""
+    compression = _bundle_compression(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    index, offset = {}, 0
+    while offset < len(raw):
+        if compression == "zstd":
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            decompressor = zlib.decompressobj(wbits=31)
+        line = decompressor.decompress(raw[offset:])
+        if not getattr(decompressor, 'eof', True):
+            # A write was interrupted mid-record: drop the partial tail.
+            logging.warning(f"Truncating partial record at byte {offset} of {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+            break
+        length = len(raw) - offset - len(decompressor.unused_data)
+        index[json.loads(line)["game_id"]] = [offset, length]
+        offset += length
+
+    _write_index(path, index)
+    return index
+
+_INDEX_CACHE = {}
+
+def load_index(path):
+    """Returns {game_id: [offset, length]} for a bundle, rebuilding the sidecar if it is missing or stale."""
+    index_path = path + INDEX_SUFFIX
+    try:
+        stamp = (os.path.getmtime(path), os.path.getsize(path))
+    except OSError:
+        return {}
+    cached = _INDEX_CACHE.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    index = None
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        covered = max((offset + length for offset, length in index.values()), default=0)
+        if covered != stamp[1]:
+            index = None
+    if index is None:
+        logging.info(f"Rebuilding bundle index for {path}")
+        index = rebuild_index(path)
+
+    _INDEX_CACHE[path] = (stamp, index)
+    return index
+
+def list_games(data_path):
+    """
+    Returns a sorted list of game locators found under data_path, in either layout.
+    A game present in both layouts is listed once, from its bundle.
+    """
+    bundled = {}
+    loose = {}
+    for root, _, files in os.walk(data_path):
+        for file in files:
+            path = os.path.join(root, file)
+            if _bundle_compression(file):
+                season = file.split('.', 1)[0]
+                for game_id in load_index(path):
+                    bundled[(season, game_id)] = f"{path}#{game_id}"
+            elif file.endswith('.json') and not file.endswith(INDEX_SUFFIX):
+                season = os.path.basename(root)
+                loose[(season, file[:-len('.json')])] = path
+
+    loose.update(bundled)
+    return sorted(loose.values())
+
+def season_of(locator):
+    """Returns the season directory/bundle name a locator belongs to."""
+    path = locator.split('#', 1)[0]
+    if '#' in locator:
+        return os.path.basename(path).split('.', 1)[0]
+    return os.path.basename(os.path.dirname(path))
+
+def game_id_of(locator):
+    if '#' in locator:
+        return locator.split('#', 1)[1]
+    return os.path.basename(locator)[:-len('.json')]
+
+def game_key(locator):
+    """Returns "<season>/<game_id>", which names a game across both layouts."""
+    return f"{season_of(locator)}/{game_id_of(locator)}"
+
+def game_stamps(locators):
+    """
+    Returns {game_key: stamp} for the given locators. A stamp changes whenever the game's
+    record does: size and modification time for a .json file, offset and length within a
+    bundle (a game saved again is appended again).
+    """
+    stamps = {}
+    for locator in locators:
+        if '#' in locator:
+            path, game_id = locator.split('#', 1)
+            offset, length = load_index(path)[game_id]
+            stamps[game_key(locator)] = f"{offset}:{length}"
+        else:
+            stat = os.stat(locator)
+            stamps[game_key(locator)] = f"{stat.st_size}:{stat.st_mtime_ns}"
+    return stamps
+
+def pending_games(data_path, built_from, known, name):
+    """
+    Compares an incrementally built index with the archive under data_path (absolute).
+    `built_from` is the directory the index was built from (None while it is empty) and
+    `known` its {game_key: stamp}. Returns (rebuild, locators, stamps): whether the index
+    must start over (it was built from another directory, or a game in it was changed or
+    removed since), the locators of the games to add, and every game's current stamp.
+    """
+    locators = list_games(data_path)
+    stamps = game_stamps(locators)
+    changed = [key for key, stamp in known.items() if stamps.get(key) != stamp]
+    rebuild = False
+    if built_from not in (None, data_path):
+        logging.info(f"The {name} was built from {built_from}; rebuilding it from {data_path}")
+        rebuild = True
+    elif changed:
+        logging.info(f"{len(changed)} games in the {name} were changed or removed; rebuilding it")
+        rebuild = True
+    if not rebuild:
+        locators = [loc for loc in locators if game_key(loc) not in known]
+    return rebuild, locators, stamps
+
+def _read_payload(locator):
+    """Returns the raw JSON bytes for a locator; bundle entries are read with one seek and are still wrapped in their record."""
+    if '#' not in locator:
+        with timed("read"):
+            with open(locator, 'rb') as f:
+                return f.read()
+
+    path, game_id = locator.split('#', 1)
+    offset, length = load_index(path)[game_id]
+    with timed("read"):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            payload = f.read(length)
+    with timed("decompress"):
+        return _decompress(payload, _bundle_compression(path))
+
+def _decode(locator, payload, typed):
+    bundled = '#' in locator
+    if typed:
+        with timed("decode_schema"):
+            return decode_game(payload, season_of(locator), game_id_of(locator), bundled)
+    with timed("json_decode"):
+        data = loads(payload)
+    return data["game"] if bundled else data
+
+def load_game(locator, typed=False):
+    """Loads a single game by locator, as a raw dict or (typed=True) a schema.Game."""
+    return _decode(locator, _read_payload(locator), typed)
+
+def _iter_bundle(path, wanted, typed):
+    """Streams a whole bundle once, yielding the games whose ids are in `wanted`."""
+    wanted = set(wanted)
+    index = load_index(path)
+    if len(wanted) * 4 < len(index):
+        # Only a few games are needed: seeking is cheaper than decompressing everything.
+        for game_id in sorted(wanted, key=lambda g: index[g][0]):
+            locator = f"{path}#{game_id}"
+            try:
+                yield locator, load_game(locator, typed)
+            except SchemaError as e:
+                logging.warning(f"Skipping malformed game {locator}: {e}")
+        return
+
+    compression = _bundle_compression(path)
+    with timed("read"):
+        with open(path, 'rb') as f:
+            raw = f.read()
+    with timed("decompress"):
+        if compression == "zstd":
+            # Frames are decompressed one by one; gzip handles concatenated members itself.
+            spans = sorted(index.values())
+            text = b"".join(_decompress(raw[offset:offset + length], compression) for offset, length in spans)
+        else:
+            text = gzip.decompress(raw)
+    season = os.path.basename(path).split(".", 1)[0]
+    for line in text.splitlines():
+        try:
+            if typed:
+                with timed("decode_schema"):
+                    game = decode_game(line, season, bundled=True)
+                game_id = game.game_id
+            else:
+                with timed("json_decode"):
+                    record = loads(line)
+                game_id, game = record["game_id"], record["game"]
+        except SchemaError as e:
+            logging.warning(f"Skipping malformed record in {path}: {e}")
+            continue
+        if game_id in wanted:
+            wanted.discard(game_id)
+            yield f"{path}#{game_id}", game
+
+def iter_games(locators, typed=False):
+    """
+    Yields (locator, game) for every locator. Bundle entries are grouped so each
+    bundle is decompressed in one sequential pass. With typed=True games are
+    schema.Game objects decoded straight from the JSON bytes, otherwise raw dicts.
+    Malformed games are skipped with a warning.
+    """
+    by_bundle = defaultdict(set)
+    for locator in locators:
+        if '#' in locator:
+            path, game_id = locator.split('#', 1)
+            by_bundle[path].add(game_id)
+            continue
+        try:
+            yield locator, load_game(locator, typed)
+        except SchemaError as e:
+            logging.warning(f"Skipping malformed file {locator}: {e}")
+
+    for path, wanted in by_bundle.items():
+        try:
+            yield from _iter_bundle(path, wanted, typed)
+        except (OSError, EOFError) as e:
+            logging.warning(f"Skipping unreadable bundle {path}: {e}")
+
+def iter_seasons(data_path, typed=False, locators=None):
+    """
+    Yields (season, iterator of (locator, game)) for each season, in sorted season order,
+    over all games under data_path or only the given locators.
+    """
+    by_season = defaultdict(list)
+    for locator in list_games(data_path) if locators is None else locators:
+        by_season[season_of(locator)].append(locator)
+    for season in sorted(by_season):
+        yield season, iter_games(by_season[season], typed)
+
+def pack(data_path, compression=None, remove=False):
+    """Converts per-game JSON directories under data_path into season bundles."""
+    packed = 0
+    for season in sorted(os.listdir(data_path)):
+        season_dir = os.path.join(data_path, season)
+        if not os.path.isdir(season_dir):
+            continue
+        game_files = sorted(f for f in os.listdir(season_dir) if f.endswith('.json'))
+        with SeasonBundleWriter(data_path, season, compression) as writer:
+            for file in game_files:
+                game_id = file[:-len('.json')]
+                path = os.path.join(season_dir, file)
+                if game_id not in writer:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        writer.append(game_id, json.load(f))
+                    packed += 1
+                if remove:
+                    os.remove(path)
+        if remove and not os.listdir(season_dir):
+            os.rmdir(season_dir)
+    return packed
+
+def disk_usage(data_path):
+    """Returns (file count, total bytes) under data_path."""
+    count, total = 0, 0
+    for root, _, files in os.walk(data_path):
+        for file in files:
+            count += 1
+            total += os.path.getsize(os.path.join(root, file))
+    return count, total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Manage the on-disk game archive.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="Convert per-game JSON files into season bundles.")
+    pack_parser.add_argument("data_path", nargs="?", default="data")
+    pack_parser.add_argument("--compression", choices=sorted(set(BUNDLE_SUFFIXES.values())), default=None)
+    pack_parser.add_argument("--remove", action="store_true", help="Delete the JSON files once packed.")
+    stats_parser = subparsers.add_parser("stats", help="Show game count and disk usage.")
+    stats_parser.add_argument("data_path", nargs="?", default="data")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        before = disk_usage(args.data_path)
+        packed = pack(args.data_path, args.compression, args.remove)
+        after = disk_usage(args.data_path)
+        print(f"Packed {packed} games. Files: {before[0]} -> {after[0]}, bytes: {before[1]:,} -> {after[1]:,}")
+    else:
+        files, size = disk_usage(args.data_path)
+        print(f"{len(list_games(args.data_path))} games in {files} files, {size:,} bytes")
@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import cProfile
+import tracemalloc
+import subprocess
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Configuration ---
+# Everything is driven by environment variables so the chart scripts need no extra flags:
+#   JEOPARDY_REPORT_DIR      where run reports are written (set to "" to disable)
+#   JEOPARDY_TRACEMALLOC=1   also record the tracemalloc peak per stage (slower)
+#   JEOPARDY_PROFILE_STAGE   name of one stage to profile
+#   JEOPARDY_PROFILER        "cprofile" (default) or "py-spy"
+CONFIG = {
+    "REPORT_DIR": os.environ.get("JEOPARDY_REPORT_DIR", "cache/reports"),
+    "TRACEMALLOC": os.environ.get("JEOPARDY_TRACEMALLOC") == "1",
+    "PROFILE_STAGE": os.environ.get("JEOPARDY_PROFILE_STAGE"),
+    "PROFILER": os.environ.get("JEOPARDY_PROFILER", "cprofile"),
+}
+
+_ACTIVE_STAGE = None
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def current_rss_mb():
+    """Current resident set size of this process in MB (the peak where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _peak_rss_mb()
+
+class Stage:
+    """
+    Measurements for one named pipeline stage. Set `items` to get a throughput figure.
+    `rss_delta_mb` is how much the resident set grew during the stage; the OS only reports
+    the peak for the whole process, so `process_peak_rss_mb` is that peak as of the stage's end.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = None
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.rss_delta_mb = None
+        self.process_peak_rss_mb = None
+        self.tracemalloc_peak_mb = None
+        self.profile_path = None
+        self.timers = {}
+
+    def add_time(self, name, seconds, calls=1):
+        timer = self.timers.setdefault(name, {"wall_s": 0.0, "calls": 0})
+        timer["wall_s"] += seconds
+        timer["calls"] += calls
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "rss_delta_mb": round(self.rss_delta_mb, 2) if self.rss_delta_mb is not None else None,
+            "process_peak_rss_mb": round(self.process_peak_rss_mb, 2) if self.process_peak_rss_mb is not None else None,
+            "tracemalloc_peak_mb": round(self.tracemalloc_peak_mb, 2) if self.tracemalloc_peak_mb is not None else None,
+            "items": self.items,
+            "items_per_s": round(self.items / self.wall_s, 2) if self.items and self.wall_s > 0 else None,
+            "timers": {name: {"wall_s": round(t["wall_s"], 6), "calls": t["calls"]} for name, t in self.timers.items()},
+            "profile": self.profile_path,
+        }
+
+class _Timer:
+    """Accumulates wall time for a repeated sub-step into the active stage."""
+    __slots__ = ("stage", "name", "start")
+
+    def __init__(self, stage, name):
+        self.stage = stage
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stage.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+_NULL_TIMER = nullcontext()
+
+def timed(name):
+    """
+    Times a small, frequently repeated step (a file read, a json.loads, a regex scan)
+    and adds it to the currently running stage. Costs almost nothing when no stage is active.
+    """
+    if _ACTIVE_STAGE is None:
+        return _NULL_TIMER
+    return _Timer(_ACTIVE_STAGE, name)
+
+class RunReport:
+    """Collects per-stage measurements for one run of a script and writes them as a report."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self.stages = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name, items=None):
+        global _ACTIVE_STAGE
+        stage = Stage(name)
+        stage.items = items
+        parent = _ACTIVE_STAGE
+
+        trace = CONFIG["TRACEMALLOC"]
+        if trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        profiler = _start_profiler(self.name, name) if CONFIG["PROFILE_STAGE"] == name else None
+
+        self.stages.append(stage)
+        _ACTIVE_STAGE = stage
+        rss_start = current_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stage
+        finally:
+            stage.wall_s = time.perf_counter() - wall_start
+            stage.cpu_s = time.process_time() - cpu_start
+            rss_end = current_rss_mb()
+            stage.rss_delta_mb = rss_end - rss_start if rss_end is not None and rss_start is not None else None
+            stage.process_peak_rss_mb = _peak_rss_mb()
+            if trace:
+                stage.tracemalloc_peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if profiler:
+                stage.profile_path = profiler()
+            _ACTIVE_STAGE = parent
+            logging.info(f"[{self.name}] stage '{name}' took {stage.wall_s:.3f}s")
+
+    def to_dict(self):
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(),
+            "argv": sys.argv,
+            "wall_s": round(time.perf_counter() - self._wall_start, 6),
+            "cpu_s": round(time.process_time() - self._cpu_start, 6),
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+    def summary(self):
+        """Returns a human-readable table of the stages."""
+        report = self.to_dict()
+        lines = [f"Run '{self.name}': {report['wall_s']:.2f}s wall, {report['cpu_s']:.2f}s CPU"]
+        lines.append(f"  {'stage':<28} {'wall s':>9} {'cpu s':>9} {'rss +MB':>8} {'proc peak':>9} {'items':>9} {'items/s':>10}")
+        for stage in report["stages"]:
+            delta = f"{stage['rss_delta_mb']:+.0f}" if stage["rss_delta_mb"] is not None else "-"
+            peak = f"{stage['process_peak_rss_mb']:.0f}" if stage["process_peak_rss_mb"] is not None else "-"
+            items = stage["items"] if stage["items"] is not None else "-"
+            rate = stage["items_per_s"] if stage["items_per_s"] is not None else "-"
+            lines.append(f"  {stage['stage']:<28} {stage['wall_s']:>9.3f} {stage['cpu_s']:>9.3f} {delta:>8} {peak:>9} {items:>9} {rate:>10}")
+            for timer_name, timer in sorted(stage["timers"].items(), key=lambda t: -t[1]["wall_s"]):
+                lines.append(f"    {timer_name:<26} {timer['wall_s']:>9.3f} ({timer['calls']} calls)")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Prints the summary and writes the JSON report. Returns the report path, if any."""
+        print(self.summary())
+        if not CONFIG["REPORT_DIR"]:
+            return None
+        os.makedirs(CONFIG["REPORT_DIR"], exist_ok=True)
+        # The pid keeps concurrent runs of one script (e.g. job_queue workers) apart.
+        path = os.path.join(CONFIG["REPORT_DIR"], f"{self.name}_{self.started_at:%Y%m%d_%H%M%S}_{os.getpid()}.json")
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+        logging.info(f"Run report saved to {path}")
+        return path
+
+def _start_profiler(run_name, stage_name):
+    """Starts the configured profiler and returns a function that stops it and returns the output path."""
+    profile_dir = os.path.join(CONFIG["REPORT_DIR"] or ".", "profiles")
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, f"{run_name}_{stage_name}_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}")
+
+    if CONFIG["PROFILER"] == "py-spy":
+        # py-spy samples this process from the outside; the output opens in speedscope.
+        path = base + ".speedscope.json"
+        try:
+            proc = subprocess.Popen(
+                ["py-spy", "record", "--pid", str(os.getpid()), "--format", "speedscope", "--output", path],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logging.warning(f"Cannot start py-spy ({e}); profiling stage '{stage_name}' with cProfile instead")
+        else:
+            def stop():
+                proc.send_signal(signal.SIGINT)
+                proc.wait()
+                return path
+            return stop
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def stop():
+        profiler.disable()
+        path = base + ".prof"
+        profiler.dump_stats(path)
+        return path
+    return stop
@@ -0,0 +1,359 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+import subprocess
+from collections import defaultdict
+import numpy as np
+import game_store
+from instrumentation import RunReport
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "QUEUE_DIR": "cache/jobs",      # on a filesystem every node mounts
+    "LEASE_SECONDS": 300,
+    "POLL_SECONDS": 2,
+    "MAX_ATTEMPTS": 3,
+    "SQLITE_TIMEOUT": 60,
+}
+
+# Season shards of the stumper_graph pipeline run on any number of nodes that share
+# CONFIG["QUEUE_DIR"]:
+#   queue.sqlite   one row per job; a worker leases a job for LEASE_SECONDS and renews the
+#                  lease while it runs, so the job of a node that dies is leased again
+#                  once the lease expires (up to MAX_ATTEMPTS times)
+#   results/       one file per finished job, written by the worker holding the lease
+# Each season gets an "aggregate" job (decode its games and compute stumper_graph's
+# per-category aggregates) and an "embed" job (embed its stumper clue texts that are not
+# in the embedding cache yet). Job ids include a fingerprint of the season's files, so an
+# unchanged season's finished jobs are reused. `merge` combines the results in the order a
+# single-process run reads the games, producing the same stumper_graph caches (for an
+# archive stored in one layout; mixing loose files and bundles only reorders categories).
+#
+# Leases rely on SQLite's file locking and the nodes' clocks roughly agreeing; use a
+# filesystem with working POSIX locks (not every NFS setup has them).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id             TEXT PRIMARY KEY,
+    kind           TEXT NOT NULL,
+    priority       INTEGER NOT NULL,
+    payload        TEXT NOT NULL,
+    status         TEXT NOT NULL,   -- pending, leased, done or failed
+    owner          TEXT,
+    lease_expires  REAL,
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    result         TEXT,
+    error          TEXT
+);
+"""
+KINDS = {"embed": 0, "aggregate": 1}  # kind -> priority; embedding is the slow part, so it starts first
+
+class JobQueue:
+    """A lease-based job queue in an SQLite file on a shared directory."""
+
+    def __init__(self, queue_dir=None):
+        self.queue_dir = queue_dir or CONFIG["QUEUE_DIR"]
+        self.results_dir = os.path.join(self.queue_dir, "results")
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.path = os.path.join(self.queue_dir, "queue.sqlite")
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=CONFIG["SQLITE_TIMEOUT"], isolation_level=None)
+
+    def submit(self, jobs):
+        """Adds (id, kind, payload) jobs; ids already queued are kept as they are. Returns the number added."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            added = 0
+            for job_id, kind, payload in jobs:
+                added += conn.execute(
+                    "INSERT OR IGNORE INTO jobs (id, kind, priority, payload, status) VALUES (?, ?, ?, ?, 'pending')",
+                    (job_id, kind, KINDS[kind], json.dumps(payload))
+                ).rowcount
+            conn.execute("COMMIT")
+            return added
+        finally:
+            conn.close()
+
+    def lease(self, worker, lease_seconds=None):
+        """Leases the next pending job, or one whose lease expired. Returns (id, kind, payload) or None."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose every attempt ended with an expired lease are given up on.
+            conn.execute("""
+                UPDATE jobs SET status = 'failed', error = 'lease expired ' || attempts || ' times'
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """, (now, CONFIG["MAX_ATTEMPTS"]))
+            row = conn.execute("""
+                SELECT id, kind, payload FROM jobs
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY priority, id LIMIT 1
+            """, (now,)).fetchone()
+            if row:
+                conn.execute("UPDATE jobs SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                             (worker, now + (lease_seconds or CONFIG["LEASE_SECONDS"]), row[0]))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    def _update_owned(self, sql, params):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount == 1
+        finally:
+            conn.close()
+
+    def renew(self, job_id, worker, lease_seconds=None):
+        """Extends a lease; False if the worker no longer holds it."""
+        return self._update_owned("UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ? AND status = 'leased'",
+                                  (time.time() + (lease_seconds or CONFIG["LEASE_SECONDS"]), job_id, worker))
+
+    def complete(self, job_id, worker, result):
+        """Marks a leased job done with its result file name; False if the lease was lost meanwhile."""
+        return self._update_owned("UPDATE jobs SET status = 'done', result = ?, error = NULL WHERE id = ? AND owner = ? AND status = 'leased'",
+                                  (result, job_id, worker))
+
+    def fail(self, job_id, worker, error):
+        """Returns a job to the queue after an error, or marks it failed after MAX_ATTEMPTS."""
+        return self._update_owned("""
+            UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, owner = NULL, error = ?
+            WHERE id = ? AND owner = ? AND status = 'leased'
+        """, (CONFIG["MAX_ATTEMPTS"], error, job_id, worker))
+
+    def counts(self):
+        conn = self._connect()
+        try:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        finally:
+            conn.close()
+
+    def jobs(self, kind=None, status=None):
+        """Returns [{id, kind, payload, status, attempts, result, error}] in id order."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT id, kind, payload, status, attempts, result, error FROM jobs
+                WHERE (? IS NULL OR kind = ?) AND (? IS NULL OR status = ?) ORDER BY id
+            """, (kind, kind, status, status)).fetchall()
+        finally:
+            conn.close()
+        return [{"id": r[0], "kind": r[1], "payload": json.loads(r[2]), "status": r[3], "attempts": r[4], "result": r[5], "error": r[6]}
+                for r in rows]
+
+def _season_fingerprint(locators):
+    digest = hashlib.sha1()
+    for path in sorted({locator.split('#', 1)[0] for locator in locators}):
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    digest.update("\n".join(locators).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def season_jobs(data_path=None):
+    """One aggregate and one embed job per season of the archive."""
+    by_season = defaultdict(list)
+    for locator in game_store.list_games(os.path.abspath(data_path or CONFIG["DATA_PATH"])):
+        by_season[game_store.season_of(locator)].append(locator)
+    jobs = []
+    for season, locators in sorted(by_season.items()):
+        payload = {"season": season, "locators": locators}
+        fingerprint = _season_fingerprint(locators)
+        jobs += [(f"{kind}:{season}:{fingerprint}", kind, payload) for kind in KINDS]
+    return jobs
+
+def _result_name(job_id, extension):
+    return job_id.replace(':', '_') + extension
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def run_aggregate(payload, results_dir, job_id):
+    import stumper_graph
+    aggregates = stumper_graph.aggregate_category_data(payload["locators"])
+    name = _result_name(job_id, ".json")
+    _write_atomic(os.path.join(results_dir, name), lambda f: f.write(json.dumps(aggregates).encode('utf-8')))
+    return name
+
+def run_embed(payload, results_dir, job_id, cache_dir=None):
+    """Embeds the season's stumper texts that neither the clue cache nor an earlier text of the season has."""
+    import stumper_graph
+    stumper_texts = stumper_graph.aggregate_category_data(payload["locators"])[0]
+    _, cached_keys = stumper_graph.load_clue_cache(cache_dir or stumper_graph.CONFIG['CACHE_PATH'])
+    known = set(cached_keys)
+    texts, keys = [], []
+    for text in (text for clues in stumper_texts.values() for text in clues):
+        key = stumper_graph.text_key(text)
+        if key not in known:
+            known.add(key)
+            texts.append(text)
+            keys.append(key)
+    vectors = np.asarray(stumper_graph.get_embeddings(texts), dtype=np.float32) if texts else np.zeros((0, 0), dtype=np.float32)
+    name = _result_name(job_id, ".npz")
+    _write_atomic(os.path.join(results_dir, name), lambda f: np.savez(f, keys=np.array(keys, dtype=str), vectors=vectors))
+    return name
+
+RUNNERS = {"aggregate": run_aggregate, "embed": run_embed}
+
+def work(queue, worker=None, wait=True, die_after=None):
+    """
+    Leases and runs jobs until none are left (with wait, until none are pending or leased,
+    so that expired leases are picked up). die_after simulates a node crash by exiting
+    without finishing the die_after-th job. Returns the number of jobs finished.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    finished = leased = 0
+    while True:
+        job = queue.lease(worker)
+        if job is None:
+            counts = queue.counts()
+            if not wait or not (counts.get("pending") or counts.get("leased")):
+                return finished
+            time.sleep(CONFIG["POLL_SECONDS"])
+            continue
+        job_id, kind, payload = job
+        leased += 1
+        if die_after and leased >= die_after:
+            logging.warning(f"{worker} exiting while holding {job_id}")
+            os._exit(1)
+
+        stop = threading.Event()
+
+        def keep_alive():
+            while not stop.wait(CONFIG["LEASE_SECONDS"] / 3):
+                if not queue.renew(job_id, worker):
+                    return
+
+        renewer = threading.Thread(target=keep_alive, daemon=True)
+        renewer.start()
+        start = time.perf_counter()
+        try:
+            result = RUNNERS[kind](payload, queue.results_dir, job_id)
+        except Exception as e:
+            logging.exception(f"{job_id} failed")
+            queue.fail(job_id, worker, f"{type(e).__name__}: {e}")
+            continue
+        finally:
+            stop.set()
+            renewer.join()
+        if queue.complete(job_id, worker, result):
+            finished += 1
+            logging.info(f"{worker} finished {job_id} in {time.perf_counter() - start:.1f}s")
+        else:
+            logging.warning(f"{worker} lost the lease on {job_id}; its result is left to the new holder")
+
+def merge(queue, data_path=None, cache_dir=None):
+    """
+    Combines the finished jobs of the current seasons into stumper_graph's aggregate and
+    clue embedding caches, in the order a single process reads the games. Returns the
+    number of seasons merged.
+    """
+    import stumper_graph
+    cache_dir = cache_dir or stumper_graph.CONFIG['CACHE_PATH']
+    wanted = {job_id: kind for job_id, kind, _ in season_jobs(data_path)}
+    done = {job["id"]: job for job in queue.jobs(status="done") if job["id"] in wanted}
+    missing = sorted(set(wanted) - set(done))
+    if missing:
+        raise RuntimeError(f"{len(missing)} job(s) are not finished, e.g. {missing[0]}")
+    # list_games returns locators sorted by path, so seasons are read in order of their first game.
+    ordered = sorted(done.values(), key=lambda job: job["payload"]["locators"][0])
+
+    aggregates = tuple(defaultdict(list) if i in (0, 3) else defaultdict(int) for i in range(5))
+    for job in (job for job in ordered if job["kind"] == "aggregate"):
+        with open(os.path.join(queue.results_dir, job["result"]), 'r') as f:
+            for merged, shard in zip(aggregates, json.load(f)):
+                for name, value in shard.items():
+                    merged[name] += value
+    os.makedirs(cache_dir, exist_ok=True)
+    stumper_graph.save_aggregate_caches(cache_dir, stumper_graph.merge_category_aliases(aggregates, data_path or CONFIG["DATA_PATH"]))
+
+    vectors, keys = stumper_graph.load_clue_cache(cache_dir)
+    known = set(keys)
+    for job in (job for job in ordered if job["kind"] == "embed"):
+        with np.load(os.path.join(queue.results_dir, job["result"])) as shard:
+            fresh = [i for i, key in enumerate(shard["keys"]) if key not in known]
+            if fresh:
+                vectors = stumper_graph.append_clue_vectors(vectors, shard["vectors"][fresh])
+                keys += [str(shard["keys"][i]) for i in fresh]
+                known.update(keys[-len(fresh):])
+    if vectors is not None:
+        stumper_graph.save_clue_cache(vectors, keys, cache_dir)
+    return len(ordered) // len(KINDS)
+
+def run_local(data_path, workers, report, die_after=None):
+    """Submits the season jobs and runs `workers` worker processes on this machine, then merges."""
+    queue = JobQueue()
+    with report.stage("submit") as stage:
+        stage.items = queue.submit(season_jobs(data_path))
+    with report.stage("work", items=workers):
+        command = [sys.executable, os.path.abspath(__file__), "--queue-dir", queue.queue_dir,
+                   "--lease-seconds", str(CONFIG["LEASE_SECONDS"]), "worker"]
+        processes = [subprocess.Popen(command + (["--die-after", str(die_after)] if die_after and i == 0 else []))
+                     for i in range(workers)]
+        for process in processes:
+            process.wait()
+    counts = queue.counts()
+    if counts.get("failed"):
+        raise RuntimeError(f"{counts['failed']} job(s) failed; see `python job_queue.py status`")
+    with report.stage("merge") as stage:
+        stage.items = merge(queue, data_path)
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run the stumper_graph pipeline's season shards on several nodes via a shared job queue.")
+    parser.add_argument("--queue-dir", default=CONFIG["QUEUE_DIR"])
+    parser.add_argument("--lease-seconds", type=float, default=CONFIG["LEASE_SECONDS"])
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="Queue one aggregate and one embed job per season.")
+    submit.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    worker = commands.add_parser("worker", help="Run jobs until the queue is drained.")
+    worker.add_argument("--no-wait", action="store_true", help="Exit as soon as nothing can be leased.")
+    worker.add_argument("--die-after", type=int, help="Exit abruptly on the Nth leased job (crash testing).")
+    merge_command = commands.add_parser("merge", help="Combine the finished jobs into stumper_graph's caches.")
+    merge_command.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    commands.add_parser("status", help="Show job counts and failures.")
+    run = commands.add_parser("run", help="submit, run local worker processes, then merge.")
+    run.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--die-after", type=int, help="Make the first worker crash on its Nth job.")
+    args = parser.parse_args()
+    CONFIG["QUEUE_DIR"] = args.queue_dir
+    CONFIG["LEASE_SECONDS"] = args.lease_seconds
+
+    report = RunReport(f"job_queue_{args.command}")
+    if args.command == "submit":
+        added = JobQueue().submit(season_jobs(args.data_path))
+        logging.info(f"Queued {added} new job(s)")
+    elif args.command == "worker":
+        with report.stage("work") as stage:
+            stage.items = work(JobQueue(), wait=not args.no_wait, die_after=args.die_after)
+    elif args.command == "merge":
+        with report.stage("merge") as stage:
+            stage.items = merge(JobQueue(), args.data_path)
+    elif args.command == "status":
+        queue = JobQueue()
+        print(queue.counts())
+        for job in queue.jobs(status="failed"):
+            print(f"{job['id']}: {job['error']}")
+    else:
+        print(run_local(args.data_path, args.workers, report, args.die_after))
+    report.finish()
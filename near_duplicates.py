@@ -0,0 +1,333 @@
+import os
+import re
+import json
+import logging
+import argparse
+import numpy as np
+import game_store
+from instrumentation import RunReport, timed
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "INDEX_DIR": "cache/near_duplicates",
+    "SHINGLE_SIZE": 5,     # character n-grams of the normalized "clue answer" text
+    "NUM_PERM": 64,
+    "BANDS": 16,           # NUM_PERM / BANDS rows per band; candidates share at least one band
+    "THRESHOLD": 0.6,      # minimum estimated Jaccard similarity to count as a near repeat
+    "BATCH_SIZE": 512,
+    "MAX_BUCKET_PAIRS": 50,
+    "SEED": 1984,
+}
+
+# Clues are indexed by MinHash signatures of their character shingles and bucketed by
+# LSH bands, so candidates come from exact bucket matches instead of all-pairs
+# comparison. Everything lives in CONFIG["INDEX_DIR"] and is only ever appended to:
+#   signatures.u32   NUM_PERM uint32 per clue
+#   band_keys.u64    BANDS uint64 bucket keys per clue
+#   entries.jsonl    one {"game_id", "season", "round", "category", "clue", "answer"} per clue
+#   meta.json        parameters, row count and the ids of the games already indexed
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+def normalize_text(clue, answer=""):
+    return _NON_WORD.sub(' ', f"{clue} {answer}".lower()).strip()
+
+def _hash_params():
+    rng = np.random.default_rng(CONFIG["SEED"])
+    # Multiply-shift hashing; the odd multipliers make each row a distinct permutation.
+    a = rng.integers(1, 2 ** 63, size=CONFIG["NUM_PERM"], dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=CONFIG["NUM_PERM"], dtype=np.uint64)
+    rows = CONFIG["NUM_PERM"] // CONFIG["BANDS"]
+    band_mix = rng.integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    return a, b, band_mix
+
+def shingles(text):
+    """Returns the distinct character shingles of a text packed into uint64s."""
+    k = CONFIG["SHINGLE_SIZE"]
+    data = np.frombuffer(text.encode('utf-8'), dtype=np.uint8).astype(np.uint64)
+    if len(data) < k:
+        data = np.concatenate([data, np.zeros(k - len(data), dtype=np.uint64)])
+    n = len(data) - k + 1
+    packed = np.zeros(n, dtype=np.uint64)
+    for i in range(k):
+        packed |= data[i:i + n] << np.uint64(8 * i)
+    return np.unique(packed)
+
+def signatures(texts, params=None):
+    """Returns a (len(texts), NUM_PERM) uint32 MinHash signature matrix."""
+    a, b, _ = params or _hash_params()
+    if not texts:
+        return np.zeros((0, CONFIG["NUM_PERM"]), dtype=np.uint32)
+    parts = [shingles(text) for text in texts]
+    offsets = np.cumsum([0] + [len(p) for p in parts[:-1]])
+    hashed = (a[:, None] * np.concatenate(parts)[None, :] + b[:, None]) >> np.uint64(32)
+    return np.minimum.reduceat(hashed, offsets, axis=1).T.astype(np.uint32)
+
+def band_keys(sigs, params=None):
+    """Collapses each band of a signature matrix into one uint64 bucket key."""
+    _, _, band_mix = params or _hash_params()
+    banded = sigs.astype(np.uint64).reshape(len(sigs), CONFIG["BANDS"], CONFIG["NUM_PERM"] // CONFIG["BANDS"])
+    return (banded * band_mix).sum(axis=2, dtype=np.uint64)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity between signatures (row-wise for 2-D inputs)."""
+    return (sig_a == sig_b).mean(axis=-1)
+
+class NearDuplicateIndex:
+    """An append-only MinHash LSH index over every clue in the archive."""
+
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir or CONFIG["INDEX_DIR"]
+        self.params = _hash_params()
+        self.meta = self._load_meta()
+        self._entries = None
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _expected_params(self):
+        return {key: CONFIG[key] for key in ("SHINGLE_SIZE", "NUM_PERM", "BANDS", "SEED")}
+
+    def _load_meta(self):
+        try:
+            with open(self._path("meta.json"), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta and meta.get("params") == self._expected_params():
+            return meta
+        if meta:
+            logging.info("Near-duplicate index parameters changed; rebuilding from scratch")
+        return {"params": self._expected_params(), "count": 0, "games": []}
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _array(self, name, dtype, width):
+        path = self._path(name)
+        if not self.meta["count"] or not os.path.exists(path):
+            return np.zeros((0, width), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(self.meta["count"], width))
+
+    @property
+    def signatures(self):
+        return self._array("signatures.u32", np.uint32, CONFIG["NUM_PERM"])
+
+    @property
+    def band_keys(self):
+        return self._array("band_keys.u64", np.uint64, CONFIG["BANDS"])
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = []
+            if self.meta["count"]:
+                with open(self._path("entries.jsonl"), 'r', encoding='utf-8') as f:
+                    for line, _ in zip(f, range(self.meta["count"])):
+                        self._entries.append(json.loads(line))
+        return self._entries
+
+    def _append(self, sigs, keys, entries):
+        # Anything past meta["count"] is the tail of an interrupted update: cut it off first.
+        count = self.meta["count"]
+        for name, row_bytes in (("signatures.u32", 4 * CONFIG["NUM_PERM"]), ("band_keys.u64", 8 * CONFIG["BANDS"])):
+            with open(self._path(name), 'ab') as f:
+                f.truncate(count * row_bytes)
+        with open(self._path("signatures.u32"), 'ab') as f:
+            f.write(np.ascontiguousarray(sigs).tobytes())
+        with open(self._path("band_keys.u64"), 'ab') as f:
+            f.write(np.ascontiguousarray(keys).tobytes())
+        with open(self._path("entries.jsonl"), 'ab') as f:
+            f.truncate(self.meta.get("entries_bytes", 0))
+            f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode('utf-8'))
+            self.meta["entries_bytes"] = f.tell()
+        self.meta["count"] += len(entries)
+        if self._entries is not None:
+            self._entries.extend(entries)
+
+    def _save_meta(self):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def update(self, data_path=None):
+        """Indexes the clues of every game not indexed yet. Returns the number of clues added."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        if self.meta["count"] == 0:
+            # A fresh (or reset) index: drop any files left over from another configuration.
+            self._entries = None
+            for name in ("signatures.u32", "band_keys.u64", "entries.jsonl"):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self.meta["games"] = []
+            self.meta["entries_bytes"] = 0
+        indexed_games = set(self.meta["games"])
+        locators = [loc for loc in game_store.list_games(data_path or CONFIG["DATA_PATH"])
+                    if game_store.game_id_of(loc) not in indexed_games]
+        logging.info(f"{len(indexed_games)} games indexed, {len(locators)} to add")
+
+        added, pending, pending_games = 0, [], []
+
+        def flush():
+            nonlocal added
+            with timed("minhash"):
+                sigs = signatures([normalize_text(e["clue"], e["answer"]) for e in pending], self.params)
+                keys = band_keys(sigs, self.params)
+            with timed("write"):
+                self._append(sigs, keys, pending)
+                self.meta["games"].extend(pending_games)
+                self._save_meta()
+            added += len(pending)
+            pending.clear()
+            pending_games.clear()
+
+        for _, game in game_store.iter_games(locators, typed=True):
+            for round_data, category, clue in game.iter_clues():
+                if normalize_text(clue.clue, clue.answer):
+                    pending.append({
+                        "game_id": game.game_id, "season": game.season, "round": round_data.name,
+                        "category": category.name, "clue": clue.clue, "answer": clue.answer,
+                    })
+            pending_games.append(game.game_id)
+            if len(pending) >= CONFIG["BATCH_SIZE"]:
+                flush()
+        if pending or pending_games:
+            flush()
+        return added
+
+    def query(self, clue, answer="", threshold=None):
+        """Returns [(similarity, entry)] for indexed clues that are near repeats of the given text."""
+        threshold = CONFIG["THRESHOLD"] if threshold is None else threshold
+        text = normalize_text(clue, answer)
+        if not text or not len(self):
+            return []
+        sig = signatures([text], self.params)
+        return self._matches(sig[0], band_keys(sig, self.params)[0], threshold)
+
+    def similar_to(self, row, threshold=None):
+        """Returns [(similarity, entry)] for the near repeats of an indexed clue, excluding itself."""
+        threshold = CONFIG["THRESHOLD"] if threshold is None else threshold
+        matches = self._matches(self.signatures[row], self.band_keys[row], threshold)
+        return [(score, entry) for score, entry in matches if entry["row"] != row]
+
+    def _matches(self, sig, keys, threshold):
+        candidates = np.unique(np.nonzero((self.band_keys == keys).any(axis=1))[0])
+        if not len(candidates):
+            return []
+        scores = similarity(self.signatures[candidates], sig)
+        keep = scores >= threshold
+        matches = [(float(score), dict(self.entries[row], row=int(row))) for row, score in zip(candidates[keep], scores[keep])]
+        return sorted(matches, key=lambda m: -m[0])
+
+    def candidate_pairs(self):
+        """Returns an (n, 2) array of row pairs that share at least one LSH bucket."""
+        keys = self.band_keys
+        pairs = []
+        for band in range(CONFIG["BANDS"]):
+            column = np.asarray(keys[:, band])
+            order = np.argsort(column, kind='stable')
+            sorted_keys = column[order]
+            same = sorted_keys[1:] == sorted_keys[:-1]
+            # Pair each bucket member with its predecessor and with the bucket's first member;
+            # the clustering below makes the groups transitive anyway.
+            starts = np.concatenate([[0], np.nonzero(~same)[0] + 1])
+            leader = starts[np.searchsorted(starts, np.arange(len(order)), side='right') - 1]
+            idx = np.nonzero(same)[0] + 1
+            pairs.append(np.stack([order[idx - 1], order[idx]], axis=1))
+            far = idx[(idx - leader[idx] > 1) & (idx - leader[idx] <= CONFIG["MAX_BUCKET_PAIRS"])]
+            pairs.append(np.stack([order[leader[far]], order[far]], axis=1))
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.int64)
+        pairs = np.sort(np.concatenate(pairs), axis=1)
+        return np.unique(pairs, axis=0)
+
+    def clusters(self, threshold=None, min_size=2):
+        """Groups near-repeat clues; returns lists of rows, largest clusters first."""
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        threshold = CONFIG["THRESHOLD"] if threshold is None else threshold
+        n = len(self)
+        with timed("candidates"):
+            pairs = self.candidate_pairs()
+        with timed("verify"):
+            sigs = self.signatures
+            keep = np.zeros(len(pairs), dtype=bool)
+            for start in range(0, len(pairs), 100_000):
+                chunk = pairs[start:start + 100_000]
+                keep[start:start + len(chunk)] = similarity(sigs[chunk[:, 0]], sigs[chunk[:, 1]]) >= threshold
+            pairs = pairs[keep]
+        with timed("components"):
+            graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+            _, labels = connected_components(graph, directed=False)
+        sizes = np.bincount(labels)
+        groups = {}
+        for row in np.nonzero(sizes[labels] >= min_size)[0]:
+            groups.setdefault(labels[row], []).append(int(row))
+        return sorted(groups.values(), key=lambda rows: (-len(rows), rows[0]))
+
+def cluster_report(index, threshold=None, min_size=2, cross_game=True):
+    """Builds a JSON-serialisable report of duplicate clusters, optionally only those spanning several games."""
+    clusters = []
+    for rows in index.clusters(threshold, min_size):
+        members = [dict(index.entries[row], row=row) for row in rows]
+        if cross_game and len({m["game_id"] for m in members}) < 2:
+            continue
+        clusters.append({
+            "size": len(members),
+            "seasons": sorted({m["season"] for m in members}, key=lambda s: (len(s), s)),
+            "members": members,
+        })
+    return {
+        "clues_indexed": len(index),
+        "threshold": CONFIG["THRESHOLD"] if threshold is None else threshold,
+        "clusters": len(clusters),
+        "clues_in_clusters": sum(c["size"] for c in clusters),
+        "cluster_list": clusters,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Find near-repeat clues with a MinHash LSH index.")
+    parser.add_argument("--index-dir", default=CONFIG["INDEX_DIR"])
+    parser.add_argument("--threshold", type=float, default=CONFIG["THRESHOLD"])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Index the clues of games added since the last build.")
+    build_parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    query_parser = subparsers.add_parser("query", help="Find near repeats of a clue.")
+    query_parser.add_argument("clue")
+    query_parser.add_argument("--answer", default="")
+    report_parser = subparsers.add_parser("report", help="Cluster the whole archive into near-duplicate groups.")
+    report_parser.add_argument("--min-size", type=int, default=2)
+    report_parser.add_argument("--include-same-game", action="store_true")
+    report_parser.add_argument("--output", default=os.path.join(CONFIG["INDEX_DIR"], "clusters.json"))
+    report_parser.add_argument("--show", type=int, default=10, help="Clusters to print.")
+    args = parser.parse_args()
+
+    index = NearDuplicateIndex(args.index_dir)
+    if args.command == "build":
+        report = RunReport("near_duplicates_build")
+        with report.stage("update") as stage:
+            stage.items = index.update(args.data_path)
+        print(f"{len(index)} clues indexed")
+        report.finish()
+    elif args.command == "query":
+        for score, entry in index.query(args.clue, args.answer, args.threshold):
+            print(f"{score:.2f}  season {entry['season']} game {entry['game_id']}  [{entry['category']}] {entry['clue']} -> {entry['answer']}")
+    else:
+        report = RunReport("near_duplicates_report")
+        with report.stage("cluster", items=len(index)):
+            result = cluster_report(index, args.threshold, args.min_size, not args.include_same_game)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4, ensure_ascii=False)
+        print(f"{result['clusters']} clusters covering {result['clues_in_clusters']} of {result['clues_indexed']} clues")
+        for cluster in result["cluster_list"][:args.show]:
+            print(f"\n{cluster['size']} clues, seasons {', '.join(cluster['seasons'])}:")
+            for member in cluster["members"][:5]:
+                print(f"  season {member['season']} game {member['game_id']}  {member['clue']} -> {member['answer']}")
+        print(f"\nReport saved to {args.output}")
+        report.finish()
@@ -0,0 +1,192 @@
+import os
+import json
+import math
+import hashlib
+import logging
+import argparse
+from collections import Counter, defaultdict
+import game_store
+from instrumentation import RunReport
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "MANIFEST_PATH": "cache/sample_manifest.json",
+    "FRACTION": 0.05,
+    "MIN_GAMES_PER_SEASON": 3,
+    "SEED": 1984,
+    "Z": 1.96,              # error bounds are ~95% intervals
+    "BOUND_TOP_N": 10,      # entries whose bounds are reported
+}
+
+# Preview builds run on a deterministic stratified sample of games. Within each season
+# (the strata) games are ranked by a hash of SEED and their id, and the first
+# ceil(FRACTION x games), but at least MIN_GAMES_PER_SEASON, are drawn; a game's rank never
+# changes, so a growing archive keeps the games already drawn. The draw is cached in
+# CONFIG["MANIFEST_PATH"] per (data path, fraction, seed) until the list of games changes.
+# A season's counts are scaled by w = games / sampled games. Treating each count as Poisson
+# over the season's games, the estimate sum(w c) has variance about sum(w (w - 1) c) (the
+# finite-population correction makes it 0 when every game is drawn); bounds are Z standard
+# errors.
+
+def _rank(game_id, seed):
+    return hashlib.sha1(f"{seed}:{game_id}".encode()).hexdigest()
+
+def draw(locators, fraction, seed=None, min_games=None):
+    """Returns {season: {"games": count, "sampled": [locators]}} for a list of game locators."""
+    seed = CONFIG["SEED"] if seed is None else seed
+    min_games = CONFIG["MIN_GAMES_PER_SEASON"] if min_games is None else min_games
+    by_season = defaultdict(list)
+    for locator in locators:
+        by_season[game_store.season_of(locator)].append(locator)
+    seasons = {}
+    for season, games in sorted(by_season.items()):
+        size = min(len(games), max(min_games, math.ceil(fraction * len(games))))
+        ranked = sorted(games, key=lambda loc: _rank(game_store.game_id_of(loc), seed))
+        seasons[season] = {"games": len(games), "sampled": sorted(ranked[:size])}
+    return seasons
+
+class Sample:
+    """A stratified sample of the archive's games and the weight of each season's games."""
+
+    def __init__(self, fraction, seasons):
+        self.fraction = fraction
+        self.seasons = seasons
+
+    @property
+    def locators(self):
+        return sorted(loc for entry in self.seasons.values() for loc in entry["sampled"])
+
+    @property
+    def games(self):
+        return sum(entry["games"] for entry in self.seasons.values())
+
+    @property
+    def scale(self):
+        """Overall games per sampled game, for counts that are not kept per season."""
+        return self.games / max(1, len(self.locators))
+
+    def weight(self, season):
+        entry = self.seasons.get(str(season))
+        return entry["games"] / len(entry["sampled"]) if entry and entry["sampled"] else 0.0
+
+    def note(self, bound=None):
+        text = (f"PREVIEW: estimated from a {self.fraction:.0%} stratified sample "
+                f"({len(self.locators)} of {self.games} games)")
+        if bound is not None:
+            text += f"; the top counts are within ±{bound:.0%} at ~95% confidence"
+        return text
+
+def load_sample(data_path=None, fraction=None, path=None):
+    """Returns the Sample for a data directory, reusing the cached draw while the games are unchanged."""
+    data_path = data_path or CONFIG["DATA_PATH"]
+    fraction = fraction or CONFIG["FRACTION"]
+    path = path or CONFIG["MANIFEST_PATH"]
+    if not 0 < fraction <= 1:
+        raise ValueError(f"sample fraction must be in (0, 1], got {fraction}")
+    locators = game_store.list_games(data_path)
+    listing = hashlib.sha1("\n".join(locators).encode('utf-8')).hexdigest()
+    key = f"{os.path.abspath(data_path)}|{fraction}|{CONFIG['SEED']}|{CONFIG['MIN_GAMES_PER_SEASON']}"
+
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    entry = manifest.get(key)
+    if entry and entry["listing"] == listing:
+        return Sample(fraction, entry["seasons"])
+
+    seasons = draw(locators, fraction)
+    manifest[key] = {"listing": listing, "seasons": seasons}
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+    sample = Sample(fraction, seasons)
+    logging.info(f"Drew a {fraction:.0%} sample: {len(sample.locators)} of {sample.games} games in {len(seasons)} seasons")
+    return sample
+
+def scale_counts(counts, weight):
+    """Scales one season's counts by its weight. Returns (estimates Counter, bounds dict)."""
+    estimates = Counter({key: round(weight * count) for key, count in counts.items()})
+    bounds = {key: CONFIG["Z"] * math.sqrt(weight * (weight - 1) * count) for key, count in counts.items()}
+    return estimates, bounds
+
+def estimate(sample, count_games, max_clues=None):
+    """
+    Runs `count_games(locators) -> (counts, clues)` on each season's sampled games and
+    combines the scaled counts. Returns (estimates, clues, bounds), each keyed like counts.
+    """
+    totals, variances, clues = defaultdict(float), defaultdict(float), defaultdict(list)
+    for season, entry in sample.seasons.items():
+        if not entry["sampled"]:
+            continue
+        weight = sample.weight(season)
+        counts, season_clues = count_games(entry["sampled"])
+        for key, count in counts.items():
+            totals[key] += weight * count
+            variances[key] += weight * (weight - 1) * count
+        for key, items in season_clues.items():
+            clues[key].extend(items)
+    if max_clues:
+        clues = defaultdict(list, {key: items[:max_clues] for key, items in clues.items()})
+    estimates = defaultdict(int, {key: round(total) for key, total in totals.items()})
+    bounds = {key: CONFIG["Z"] * math.sqrt(variance) for key, variance in variances.items()}
+    return estimates, clues, bounds
+
+def relative_bound(estimates, bounds, top_n=None):
+    """The widest bound, relative to the estimate, among the top_n largest estimates."""
+    top = sorted(estimates, key=lambda key: -estimates[key])[:top_n or CONFIG["BOUND_TOP_N"]]
+    return max((bounds[key] / estimates[key] for key in top if estimates[key]), default=0.0)
+
+def log_bounds(estimates, bounds, top_n=None):
+    for key in sorted(estimates, key=lambda key: -estimates[key])[:top_n or CONFIG["BOUND_TOP_N"]]:
+        logging.info(f"  {key}: {estimates[key]} ± {bounds[key]:.0f}")
+
+def output_path(default_path):
+    stem, ext = os.path.splitext(default_path)
+    return f"{stem}_preview{ext}"
+
+def mark_preview(html_file, note):
+    """Adds a banner with `note` to the top of a chart's HTML page."""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+    banner = ('<div style="background:#fff3cd;color:#664d03;border-bottom:1px solid #ffe69c;'
+              f'padding:6px 12px;font:14px sans-serif">{note}</div>')
+    start = html.find('<body')
+    if start == -1:
+        html = banner + html
+    else:
+        end = html.index('>', start) + 1
+        html = html[:end] + banner + html[end:]
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+def add_arguments(parser):
+    """Adds the --sample option shared by the chart scripts."""
+    parser.add_argument("--sample", type=float, nargs="?", const=CONFIG["FRACTION"], metavar="FRACTION",
+                        help=f"Build a quick preview from a stratified sample of games (default fraction {CONFIG['FRACTION']}).")
+
+def check_arguments(parser, args):
+    """--sample previews the full-archive chart, so it does not combine with the count cube's options."""
+    if args.sample and (getattr(args, "seasons", None) or getattr(args, "animate", False)):
+        parser.error("--sample cannot be combined with --seasons or --animate")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Draw the stratified preview sample (see sampling_check.py for its error against full counts).")
+    parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    parser.add_argument("--fraction", type=float, default=CONFIG["FRACTION"])
+    args = parser.parse_args()
+
+    report = RunReport("sampling")
+    with report.stage("load_sample"):
+        sample = load_sample(args.data_path, args.fraction)
+    for season, entry in sample.seasons.items():
+        print(f"season {season}: {len(entry['sampled'])} of {entry['games']} games")
+    print(sample.note())
+    report.finish()
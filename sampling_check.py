@@ -0,0 +1,62 @@
+import logging
+import argparse
+import sampling
+from instrumentation import RunReport
+
+# Checks the preview sample against the full archive for the count charts. It imports the
+# chart scripts, so it lives apart from sampling.py, which every chart imports: build.py
+# fingerprints a chart by its import closure, and the charts should not depend on each other.
+
+def _count_functions():
+    import years
+    import us_states
+    import world_map
+    import periodic_table
+    return {
+        "state": us_states.get_state_counts,
+        "country": world_map.get_country_counts,
+        "element": periodic_table.get_element_counts,
+        "year": lambda data_path=None, game_files=None: years.aggregate_year_mentions(game_files or years.get_all_game_files(data_path)),
+    }
+
+def compare(data_path, fraction, report, top_n=None):
+    """
+    Measures each chart's sampled estimates against the full counts: the relative error of
+    the top_n entries and how many of them fall within their bounds.
+    """
+    top_n = top_n or sampling.CONFIG["BOUND_TOP_N"]
+    sample = sampling.load_sample(data_path, fraction)
+    results = {}
+    for name, count_fn in _count_functions().items():
+        with report.stage(f"{name}_full"):
+            full, _ = count_fn(data_path)
+        with report.stage(f"{name}_sample"):
+            estimates, _, bounds = sampling.estimate(sample, lambda games: count_fn(game_files=games))
+        top = sorted(full, key=lambda key: -full[key])[:top_n]
+        errors = [abs(estimates.get(key, 0) - full[key]) / full[key] for key in top]
+        covered = sum(abs(estimates.get(key, 0) - full[key]) <= bounds.get(key, 0) for key in top)
+        results[name] = {
+            "top_n": len(top),
+            "mean_relative_error": round(sum(errors) / len(errors), 4) if errors else None,
+            "max_relative_error": round(max(errors), 4) if errors else None,
+            "within_bounds": covered,
+            "reported_bound": round(sampling.relative_bound(estimates, bounds, top_n), 4),
+        }
+    return sample, results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Compare the preview sample's estimates with full counts for the count charts.")
+    parser.add_argument("data_path", nargs="?", default=sampling.CONFIG["DATA_PATH"])
+    parser.add_argument("--fraction", type=float, default=sampling.CONFIG["FRACTION"])
+    parser.add_argument("--top-n", type=int, default=sampling.CONFIG["BOUND_TOP_N"])
+    args = parser.parse_args()
+
+    report = RunReport("sampling_check")
+    sample, results = compare(args.data_path, args.fraction, report, args.top_n)
+    for name, row in results.items():
+        print(f"{name:<8} top {row['top_n']}: mean error {row['mean_relative_error']:.1%}, max {row['max_relative_error']:.1%}, "
+              f"{row['within_bounds']}/{row['top_n']} within bounds (reported ±{row['reported_bound']:.0%})")
+    print(sample.note())
+    report.finish()
@@ -0,0 +1,143 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+import msgspec
+
+# Typed view of a scraped game. The on-disk shape is the one scraper.parse_game produces:
+#   {"url": ..., "rounds": [{"name": ..., "categories": [{"name": ..., "clues": [
+#       {"clue": ..., "answer": ..., "value": "$1,200" | "DD: $3,000" | "", "row": 1-5,
+#        "right_contestants": [...], "wrong_contestants": [...]}]}]}],
+#    "contestants": [{"name": "Ken Jennings", "player_id": 1234, "nickname": "Ken"}, ...]}
+# Final Jeopardy clues only carry "clue" and "answer"; the defaults below fill in the rest,
+# so every Clue has the same fields whatever round it came from. "row" (the clue's board
+# row, top first) is missing from games scraped before it was recorded; values.infer_rows
+# recovers it from the dollar values. Response lists hold the nickname shown on the
+# contestant's podium; "contestants" (missing from games scraped before it was recorded)
+# maps each nickname to the contestant's full name and j-archive player id.
+#
+# The classes are msgspec Structs: they are slotted, decoded straight from JSON bytes
+# without building intermediate dicts, and validated while decoding.
+
+class SchemaError(ValueError):
+    """Raised when a game record is not valid JSON or does not have the expected shape."""
+
+_VALUE_PATTERN = re.compile(r'^\s*(DD:)?\s*\$?\s*([\d,]+)\s*$')
+
+@lru_cache(maxsize=4096)
+def parse_value(value):
+    """
+    Parses a display value into (dollars, is_daily_double).
+    "$1,200" -> (1200, False), "DD: $3,000" -> (3000, True), "" -> (None, False).
+    """
+    if not value:
+        return None, False
+    match = _VALUE_PATTERN.match(value)
+    if not match:
+        return None, value.strip().startswith("DD:")
+    return int(match.group(2).replace(',', '')), match.group(1) is not None
+
+# None of these objects can form reference cycles, so they are kept out of the
+# garbage collector's tracking (gc=False); this is most of the load-time saving.
+
+class Clue(msgspec.Struct, gc=False):
+    clue: str = ""
+    answer: str = ""
+    value: str = ""
+    row: Optional[int] = None
+    right_contestants: tuple[str, ...] = ()
+    wrong_contestants: tuple[str, ...] = ()
+    # Derived from `value` after decoding.
+    dollars: Optional[int] = None
+    daily_double: bool = False
+
+    def __post_init__(self):
+        self.dollars, self.daily_double = parse_value(self.value)
+
+    @property
+    def triple_stumper(self):
+        return "Triple Stumper" in self.wrong_contestants
+
+    def to_dict(self):
+        """Returns the clue in the scraper's dict shape."""
+        clue = {"clue": self.clue, "answer": self.answer, "value": self.value}
+        if self.row is not None:
+            clue["row"] = self.row
+        clue["right_contestants"] = list(self.right_contestants)
+        clue["wrong_contestants"] = list(self.wrong_contestants)
+        return clue
+
+class Category(msgspec.Struct, gc=False):
+    name: Optional[str] = None
+    clues: list[Clue] = []
+
+class Round(msgspec.Struct, gc=False):
+    name: str = ""
+    categories: list[Category] = []
+
+    @property
+    def is_final(self):
+        return self.name == "final_jeopardy_round"
+
+class Player(msgspec.Struct, gc=False):
+    name: str = ""
+    player_id: Optional[int] = None
+    nickname: Optional[str] = None
+
+class Game(msgspec.Struct, gc=False):
+    url: str = ""
+    rounds: list[Round] = []
+    contestants: list[Player] = []
+    # Filled in from the game's location in the archive, not from the record itself.
+    season: Optional[str] = None
+    game_id: Optional[str] = None
+
+    def iter_clues(self):
+        """Yields (round, category, clue) for every clue in the game."""
+        for round_data in self.rounds:
+            for category in round_data.categories:
+                for clue in category.clues:
+                    yield round_data, category, clue
+
+class BundleRecord(msgspec.Struct, gc=False):
+    """One line of a season bundle (see game_store)."""
+    game_id: str
+    game: Game
+
+_GAME_DECODER = msgspec.json.Decoder(Game)
+_RECORD_DECODER = msgspec.json.Decoder(BundleRecord)
+_RAW_DECODER = msgspec.json.Decoder()
+
+def loads(raw):
+    """Decodes JSON bytes/str into plain Python objects."""
+    try:
+        return _RAW_DECODER.decode(raw)
+    except msgspec.DecodeError as e:
+        raise SchemaError(f"invalid JSON: {e}") from None
+
+def decode_game(raw, season=None, game_id=None, bundled=False):
+    """
+    Decodes and validates one game from JSON bytes or str. With bundled=True, raw is a
+    bundle line ({"game_id": ..., "game": {...}}) and the game id is taken from it.
+    """
+    try:
+        if bundled:
+            record = _RECORD_DECODER.decode(raw)
+            game, game_id = record.game, record.game_id
+        else:
+            game = _GAME_DECODER.decode(raw)
+    except msgspec.DecodeError as e:
+        raise SchemaError(str(e)) from None
+    game.season = season
+    game.game_id = game_id
+    return game
+
+def game_from_dict(data, season=None, game_id=None):
+    """Validates an already decoded game dict and converts it into a Game."""
+    try:
+        game = msgspec.convert(data, Game)
+    except msgspec.ValidationError as e:
+        raise SchemaError(str(e)) from None
+    game.season = season
+    game.game_id = game_id
+    return game
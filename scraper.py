@@ -1,27 +1,32 @@
 import requests
 from bs4 import BeautifulSoup
-import os
-import json
 import re
+import logging
+import argparse
+from instrumentation import RunReport, timed
 
 BASE_URL = "https://j-archive.com/"
+TIMEOUT = (5, 30)
 
 def get_soup(url):
-    response = requests.get(url)
-    return BeautifulSoup(response.content, 'lxml')
+    with timed("http_get"):
+        response = requests.get(url, timeout=TIMEOUT)
+        response.raise_for_status()
+    with timed("html_parse"):
+        return BeautifulSoup(response.content, 'lxml')
 
-def get_season_links(soup):
+def get_season_links(soup, base_url=BASE_URL):
     links = []
     for link in soup.select('a[href^="showseason.php"]'):
-        season_url = BASE_URL + link['href']
+        season_url = base_url + link['href']
         if season_url not in links:
             links.append(season_url)
     return links
 
-def get_game_links(soup):
+def get_game_links(soup, base_url=BASE_URL):
     links = []
     for link in soup.select('a[href^="showgame.php"]'):
-        game_url = BASE_URL + link['href']
+        game_url = base_url + link['href']
         if game_url not in links:
             links.append(game_url)
     return links
@@ -30,6 +35,53 @@ def get_game_links(soup):
 def scrape_game(url):
     print(f"Scraping game: {url}")
     game_soup = get_soup(url)
+    with timed("extract"):
+        return parse_game(game_soup, url)
+
+
+_PLAYER_ID_PATTERN = re.compile(r'player_id=(\d+)')
+
+def _match_nicknames(nicknames, players):
+    """
+    Pairs each podium nickname with a player: first by name (the nickname is usually the
+    first name or a short form of it), then the rest by position. The contestants list
+    runs right to left across the podiums, the score tables left to right.
+    """
+    def first_name(player):
+        return player["name"].split(' ')[0].casefold()
+
+    unmatched = list(players)
+    for nickname in nicknames:
+        folded = nickname.casefold()
+        candidates = [p for p in unmatched if first_name(p) == folded] or \
+                     [p for p in unmatched if first_name(p).startswith(folded) or folded.startswith(first_name(p))]
+        if len(candidates) == 1:
+            candidates[0]["nickname"] = nickname
+            unmatched.remove(candidates[0])
+    for position, nickname in enumerate(nicknames):
+        if not unmatched or any(p["nickname"] == nickname for p in players):
+            continue
+        podium = players[len(players) - 1 - position] if position < len(players) else None
+        player = podium if any(p is podium for p in unmatched) else unmatched[-1]
+        player["nickname"] = nickname
+        unmatched = [p for p in unmatched if p is not player]
+
+def parse_contestants(game_soup):
+    """Returns the game's contestants, in page order, with their full name, player id and podium nickname."""
+    players = []
+    for element in game_soup.select('#contestants_table .contestants'):
+        link = element.find('a')
+        if not link:
+            continue
+        match = _PLAYER_ID_PATTERN.search(link.get('href', ''))
+        players.append({"name": link.get_text(strip=True), "player_id": int(match.group(1)) if match else None, "nickname": None})
+    # Every score table repeats the podium nicknames; the first one is enough.
+    nicknames = list(dict.fromkeys(td.get_text(strip=True) for td in game_soup.find_all('td', class_='score_player_nickname')))
+    _match_nicknames(nicknames[:len(players)], players)
+    return players
+
+def parse_game(game_soup, url):
+    """Extracts every round, category and clue, and the contestants, from a parsed game page."""
     game_data = {"url": url, "rounds": []}
 
     rounds = ["jeopardy_round", "double_jeopardy_round", "final_jeopardy_round"]
@@ -81,6 +133,7 @@ def scrape_game(url):
                             "clue": clue_text, 
                             "answer": answer_html,
                             "value": value,
+                            "row": j + 1,
                             "right_contestants": right_contestants,
                             "wrong_contestants": wrong_contestants
                         })
@@ -94,41 +147,30 @@ def scrape_game(url):
 
             round_data["categories"].append(category_data)
         game_data["rounds"].append(round_data)
+    game_data["contestants"] = parse_contestants(game_soup)
     return game_data
 
 
-def main():
+def main(storage="json"):
+    """
+    Scrapes every season, newest first, skipping games already in data/. storage="json"
+    writes one pretty-printed file per game; storage="jsonl" appends compact records to
+    one compressed bundle per season (see game_store). Scheduling, retries and rate
+    limiting live in crawler.py.
+    """
+    import crawler
+
     print("Starting scraper...")
-    data_dir = 'data'
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-
-    main_soup = get_soup(BASE_URL)
-    season_links = get_season_links(main_soup)
-    print(f"Found {len(season_links)} season links.")
-
-    # For testing, only process the first season and first game
-    for season_link in season_links:
-        season_number = season_link.split('=')[-1]
-        season_dir = os.path.join(data_dir, season_number)
-        if not os.path.exists(season_dir):
-            os.makedirs(season_dir)
-        
-        print(f"Processing season: {season_link}")
-        season_soup = get_soup(season_link)
-        game_links = get_game_links(season_soup)
-        print(f"Found {len(game_links)} games in season.")
-        for game_link in game_links:
-            game_id = game_link.split('=')[-1]
-            file_path = os.path.join(season_dir, f"{game_id}.json")
-            
-            game_data = scrape_game(game_link)
-            with open(file_path, 'w') as f:
-                json.dump(game_data, f, indent=4)
-            print(f"Saved data to {file_path}")
-
-    print("Scraping complete.")
+    report = RunReport("scraper")
+    stats = crawler.crawl('data', storage, report=report)
+    print(f"Scraping complete: {stats['games_saved']} games saved, {stats['failed']} failed.")
+    report.finish()
 
 
 if __name__ == "__main__":
-    main()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Scrape j-archive into data/.")
+    parser.add_argument("--storage", choices=["json", "jsonl"], default="json",
+                        help="json: one file per game; jsonl: one compressed bundle per season.")
+    args = parser.parse_args()
+    main(args.storage)
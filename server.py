@@ -0,0 +1,401 @@
+import os
+import re
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import argparse
+from collections import OrderedDict, Counter
+from urllib.parse import urlsplit, parse_qsl, unquote
+import numpy as np
+import archive_db
+import count_cube
+import contestants
+import game_store
+from instrumentation import RunReport
+
+# --- Configuration ---
+CONFIG = {
+    "HOST": "127.0.0.1",
+    "PORT": 8000,
+    "DATA_PATH": "data",
+    "CACHE_ENTRIES": 2048,      # responses kept in the LRU
+    "GZIP_MIN_BYTES": 1024,     # smaller bodies are sent uncompressed
+    "MAX_TOP_N": 500,
+    "MAX_HEADER_BYTES": 16384,
+}
+
+# A read-only JSON API over the precomputed aggregates: the count cube, per-season
+# answer counts from archive_db, the contestant index and the stumper graph's category
+# vectors, all loaded once at startup. Every response is a pure function of its URL, so
+# bodies are cached in an LRU keyed by the normalized URL together with their ETag and
+# gzipped form. Endpoints (all GET):
+#   /api/health                                  what is loaded
+#   /api/seasons                                 games, clues and stumpers per season
+#   /api/entities/<type>?seasons=&rounds=&n=     top states/countries/elements/years
+#   /api/entities/<type>/<entity>?seasons=       one entity: total, per season, example clues
+#   /api/answers/top?seasons=25-30&n=20          top answers over a season range
+#   /api/categories                              the categories in the stumper graph
+#   /api/categories/<name>/neighbours?n=10       most similar categories in the stumper graph
+#   /api/contestants/<name or id>?responses=1    a contestant's history (full name or player id)
+#   /api/leaderboard/<season>?n=20&by=coryat     a season's contestant leaderboard
+#   /api/stats                                   request and cache counters (never cached)
+
+class MissingDataError(Exception):
+    """A precomputed aggregate the server reads is missing or behind the archive."""
+
+def _require_current(name, indexed, archived, command, built_from=None, data_path=None):
+    """
+    Raises MissingDataError unless an index covers exactly the archive. `indexed` and
+    `archived` are {game_key: stamp} (see game_store.game_stamps), or sets of game ids for
+    an index that keeps no stamps; `built_from` is the data directory the index records.
+    """
+    hint = f"run `{command}` (or let crawl_daemon.py refresh it) first"
+    if not indexed and archived:
+        raise MissingDataError(f"The {name} is missing or out of date; {hint}")
+    if built_from is not None and built_from != data_path:
+        raise MissingDataError(f"The {name} was built from {built_from}, not {data_path}; {hint}")
+    behind = len(set(archived) - set(indexed))
+    if behind:
+        raise MissingDataError(f"The {name} is {behind} game(s) behind the archive; {hint}")
+    if isinstance(indexed, dict) and isinstance(archived, dict):
+        stale = sum(archived.get(key) != stamp for key, stamp in indexed.items())
+    else:
+        stale = len(set(indexed) - set(archived))
+    if stale:
+        raise MissingDataError(f"The {name} has {stale} game(s) that were changed or removed since it was built; {hint}")
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def _int_param(params, name, default, limit=None):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer")
+    return max(1, min(value, limit or CONFIG["MAX_TOP_N"]))
+
+class Aggregates:
+    """Everything the API serves, loaded into memory once."""
+
+    def __init__(self, data_path=None, report=None, cube_path=None, db_path=None, index_path=None):
+        # The server only reads: the per-module build commands, which crawl_daemon.py runs
+        # after every crawl, own every write, so a server never races them or rebuilds a
+        # cache mid-request.
+        data_path = os.path.abspath(data_path or CONFIG["DATA_PATH"])
+        cube_path = cube_path or count_cube.CONFIG["CUBE_PATH"]
+        db_path = db_path or archive_db.CONFIG["DB_PATH"]
+        index_path = index_path or contestants.CONFIG["INDEX_PATH"]
+        report = report or RunReport("server")
+        locators = game_store.list_games(data_path)
+        stamps = game_store.game_stamps(locators)
+        with report.stage("count_cube"):
+            self.cube = count_cube.CountCube(cube_path)
+            _require_current("count cube", self.cube.games, stamps, f"python count_cube.py {data_path} --cube {cube_path}",
+                             self.cube.data_path, data_path)
+        with report.stage("answer_counts") as stage:
+            command = f"python archive_db.py --db {db_path} build {data_path}"
+            conn = archive_db.connect_readonly(db_path)
+            if conn is None:
+                raise MissingDataError(f"The archive database {db_path} is missing or out of date; "
+                                       f"run `{command}` (or let crawl_daemon.py refresh it) first")
+            _, rows = archive_db.query("SELECT game_id FROM games", conn=conn)
+            _require_current("archive database", {row[0] for row in rows}, {game_store.game_id_of(loc) for loc in locators}, command)
+            _, rows = archive_db.query("""
+                SELECT season_num, answer_id, COUNT(*) FROM clues
+                WHERE season_num IS NOT NULL AND answer_id IS NOT NULL
+                GROUP BY season_num, answer_id
+            """, conn=conn)
+            counts = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            self.answer_season, self.answer_id, self.answer_count = counts.T
+            _, rows = archive_db.query("SELECT id, label FROM answers", conn=conn)
+            self.answer_labels = {answer_id: label for answer_id, label in rows}
+            columns, rows = archive_db.query(archive_db.QUERIES["seasons"], conn=conn)
+            self.seasons = [dict(zip(columns, row)) for row in rows]
+            conn.close()
+            stage.items = len(counts)
+        with report.stage("contestants") as stage:
+            self.contestants = contestants.ContestantIndex(index_path)
+            data = self.contestants.data
+            indexed = {f"{season}/{game_id}": stamp for season, game_id, stamp
+                       in zip(data["game_seasons"], data["game_ids"], data["game_stamps"])}
+            _require_current("contestant index", indexed, stamps, f"python contestants.py --index {index_path} build {data_path}",
+                             data["data_path"], data_path)
+            stage.items = len(self.contestants)
+        with report.stage("category_vectors") as stage:
+            import stumper_graph
+            loaded = stumper_graph.load_cached_category_vectors()
+            self.category_names, self.category_vectors = loaded or ([], np.zeros((0, 0), dtype=np.float32))
+            if loaded:
+                norms = np.linalg.norm(self.category_vectors, axis=1, keepdims=True)
+                self.category_vectors = (self.category_vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+            else:
+                logging.warning("Stumper graph caches not found; run stumper_graph.py to enable /api/categories")
+            self.category_rows = {name: i for i, name in enumerate(self.category_names)}
+            self.category_rows_folded = {name.casefold(): i for i, name in enumerate(self.category_names)}
+            stage.items = len(self.category_names)
+
+    def health(self, params):
+        return {
+            "status": "ok",
+            "games": len(self.cube.games),
+            "cube_cells": len(self.cube.count),
+            "answer_season_cells": len(self.answer_count),
+            "contestant_responses": len(self.contestants),
+            "graph_categories": len(self.category_names),
+        }
+
+    def season_list(self, params):
+        return self.seasons
+
+    def _entity_type(self, entity_type):
+        if entity_type not in count_cube.ENTITY_TYPES:
+            raise HTTPError(404, f"unknown entity type {entity_type!r}; expected one of {', '.join(count_cube.ENTITY_TYPES)}")
+        return entity_type
+
+    def _rounds(self, params):
+        if not params.get("rounds"):
+            return None
+        rounds = params["rounds"].split(',')
+        unknown = [r for r in rounds if r not in count_cube.ROUNDS]
+        if unknown:
+            raise HTTPError(400, f"unknown round(s): {', '.join(unknown)}")
+        return rounds
+
+    def entities(self, params, entity_type):
+        counts = self.cube.counts(self._entity_type(entity_type), count_cube.parse_seasons(params.get("seasons")), self._rounds(params))
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:_int_param(params, "n", 20)]
+        return {"type": entity_type, "seasons": params.get("seasons"), "total": sum(counts.values()),
+                "entities": [{"entity": entity, "count": count} for entity, count in ranked]}
+
+    def entity(self, params, entity_type, entity):
+        seasons = count_cube.parse_seasons(params.get("seasons"))
+        by_season = self.cube.by_season(self._entity_type(entity_type), seasons, self._rounds(params))
+        per_season = {season: counts[entity] for season, counts in by_season.items() if entity in counts}
+        if not per_season and entity not in self.cube.entities[entity_type]:
+            raise HTTPError(404, f"no {entity_type} {entity!r} in the archive")
+        return {"type": entity_type, "entity": entity, "total": sum(per_season.values()), "by_season": per_season,
+                "examples": self.cube.example_clues(entity_type, [entity], seasons)[entity]}
+
+    def top_answers(self, params):
+        seasons = count_cube.parse_seasons(params.get("seasons"))
+        mask = np.ones(len(self.answer_count), dtype=bool)
+        if seasons is not None:
+            season_values = np.unique(self.answer_season)
+            selected = season_values[[seasons(str(s)) for s in season_values]] if len(season_values) else season_values
+            mask = np.isin(self.answer_season, selected)
+        totals = np.bincount(self.answer_id[mask], weights=self.answer_count[mask])
+        n = min(_int_param(params, "n", 20), np.count_nonzero(totals))
+        top = np.argpartition(-totals, n - 1)[:n] if n else np.zeros(0, dtype=np.int64)
+        top = top[np.lexsort((top, -totals[top]))]
+        return {"seasons": params.get("seasons"), "clues": int(totals.sum()),
+                "answers": [{"answer": self.answer_labels.get(int(i), ""), "count": int(totals[i])} for i in top]}
+
+    def category_list(self, params):
+        return {"categories": sorted(self.category_names)}
+
+    def neighbours(self, params, name):
+        if not self.category_names:
+            raise HTTPError(503, "category vectors are not available; run stumper_graph.py first")
+        row = self.category_rows.get(name, self.category_rows_folded.get(name.casefold()))
+        if row is None:
+            raise HTTPError(404, f"category {name!r} is not in the stumper graph")
+        similarities = self.category_vectors @ self.category_vectors[row]
+        similarities[row] = -np.inf
+        n = min(_int_param(params, "n", 10), len(similarities) - 1)
+        top = np.argpartition(-similarities, n - 1)[:n] if n > 0 else np.zeros(0, dtype=np.int64)
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return {"category": self.category_names[row],
+                "neighbours": [{"category": self.category_names[i], "similarity": round(float(similarities[i]), 4)} for i in top]}
+
+    def contestant(self, params, name):
+        history = self.contestants.history(name)
+        if history is None:
+            raise HTTPError(404, f"no contestant named {name!r}")
+        if params.get("responses") not in ("1", "true"):
+            for game in history["games"]:
+                del game["responses"]
+        return history
+
+    def leaderboard(self, params, season):
+        if not season.isdigit():
+            raise HTTPError(400, "season must be a number")
+        by = params.get("by", "coryat")
+        if by not in ("coryat", "correct", "accuracy"):
+            raise HTTPError(400, "by must be coryat, correct or accuracy")
+        return {"season": int(season), "by": by,
+                "leaderboard": self.contestants.season_leaderboard(int(season), _int_param(params, "n", 20), by)}
+
+class ResponseCache:
+    """LRU of encoded responses: normalized URL -> (etag, body, gzipped body or None)."""
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or CONFIG["CACHE_ENTRIES"]
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, body):
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= CONFIG["GZIP_MIN_BYTES"] else None
+        self.entries[key] = (etag, body, gzipped)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return self.entries[key]
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class APIServer:
+    def __init__(self, aggregates):
+        self.aggregates = aggregates
+        self.cache = ResponseCache()
+        self.stats = Counter()
+        self.started = time.time()
+        a = aggregates
+        self.routes = [
+            (re.compile(r'/api/health'), a.health),
+            (re.compile(r'/api/seasons'), a.season_list),
+            (re.compile(r'/api/entities/([^/]+)'), a.entities),
+            (re.compile(r'/api/entities/([^/]+)/([^/]+)'), a.entity),
+            (re.compile(r'/api/answers/top'), a.top_answers),
+            (re.compile(r'/api/categories'), a.category_list),
+            (re.compile(r'/api/categories/([^/]+)/neighbours'), a.neighbours),
+            (re.compile(r'/api/contestants/([^/]+)'), a.contestant),
+            (re.compile(r'/api/leaderboard/([^/]+)'), a.leaderboard),
+        ]
+
+    def _dispatch(self, path, params):
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                return handler(params, *(unquote(group) for group in match.groups()))
+        raise HTTPError(404, f"no such endpoint: {path}")
+
+    def respond(self, target, headers):
+        """Returns (status, extra headers, body) for a GET of `target`."""
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        path = url.path.rstrip('/') or '/'
+        self.stats["requests"] += 1
+
+        if path == "/api/stats":
+            body = json.dumps({**self.stats, "cache_hits": self.cache.hits, "cache_misses": self.cache.misses,
+                               "cache_entries": len(self.cache.entries), "uptime_s": round(time.time() - self.started, 1)}).encode()
+            return 200, [("Cache-Control", "no-store")], body
+
+        key = path + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        entry = self.cache.get(key)
+        if entry is None:
+            try:
+                body = json.dumps(self._dispatch(path, params), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            except HTTPError as e:
+                self.stats[f"status_{e.status}"] += 1
+                return e.status, [], json.dumps({"error": e.message}).encode('utf-8')
+            entry = self.cache.put(key, body)
+
+        etag, body, gzipped = entry
+        extra = [("ETag", etag), ("Cache-Control", "public, max-age=60"), ("Vary", "Accept-Encoding")]
+        if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(',')]:
+            self.stats["status_304"] += 1
+            return 304, extra, b""
+        if gzipped is not None and "gzip" in headers.get("accept-encoding", ""):
+            self.stats["gzipped"] += 1
+            return 200, extra + [("Content-Encoding", "gzip")], gzipped
+        return 200, extra, body
+
+    async def handle(self, reader, writer):
+        """Serves requests on one connection until the client closes it (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, 431, [], b"", keep_alive=False)
+                    break
+                lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._write(writer, 400, [], b"", keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                if method not in ("GET", "HEAD"):
+                    status, extra, body = 405, [("Allow", "GET, HEAD")], b""
+                else:
+                    try:
+                        status, extra, body = self.respond(target, headers)
+                    except Exception:
+                        logging.exception(f"Error serving {target}")
+                        status, extra, body = 500, [], json.dumps({"error": "internal error"}).encode()
+                await self._write(writer, status, extra, body, keep_alive, head_only=method == "HEAD")
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer, status, extra, body, keep_alive, head_only=False):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                 "Content-Type: application/json; charset=utf-8",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in extra]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (b"" if head_only else body))
+        await writer.drain()
+
+async def serve(aggregates, host=None, port=None):
+    api = APIServer(aggregates)
+    server = await asyncio.start_server(api.handle, host or CONFIG["HOST"], port or CONFIG["PORT"], limit=CONFIG["MAX_HEADER_BYTES"])
+    address = server.sockets[0].getsockname()
+    logging.info(f"Serving the API at http://{address[0]}:{address[1]}/api/health")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serve the precomputed aggregates as a read-only JSON API.")
+    parser.add_argument("data_path", nargs="?", default=CONFIG["DATA_PATH"])
+    parser.add_argument("--host", default=CONFIG["HOST"])
+    parser.add_argument("--port", type=int, default=CONFIG["PORT"])
+    parser.add_argument("--cache-entries", type=int, default=CONFIG["CACHE_ENTRIES"])
+    parser.add_argument("--cube", default=count_cube.CONFIG["CUBE_PATH"], help="Count cube path.")
+    parser.add_argument("--db", default=archive_db.CONFIG["DB_PATH"], help="Archive database path.")
+    parser.add_argument("--index", default=contestants.CONFIG["INDEX_PATH"], help="Contestant index path.")
+    args = parser.parse_args()
+    CONFIG["CACHE_ENTRIES"] = args.cache_entries
+
+    report = RunReport("server")
+    try:
+        aggregates = Aggregates(args.data_path, report, args.cube, args.db, args.index)
+    except MissingDataError as e:
+        raise SystemExit(str(e))
+    print(report.summary())
+    try:
+        asyncio.run(serve(aggregates, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,294 @@
+import math
+import heapq
+import hashlib
+import logging
+import argparse
+from array import array
+from collections import Counter
+from functools import lru_cache, reduce
+
+# --- Configuration ---
+CONFIG = {
+    "EPSILON": 0.001,   # additive error, as a fraction of the stream length
+    "DELTA": 0.01,      # Count-Min failure probability
+    "CANDIDATES": 200,  # items Count-Min keeps track of for most_common()
+    "SEED": 0,
+}
+
+# Fixed-memory heavy-hitter counters that can stand in for a Counter wherever only
+# update/get/most_common/total are used (bump_chart.process_ranks only needs those).
+# Both kinds are mergeable, so per-season sketches can be combined into all-time or
+# sliding multi-season views without rescanning the data.
+
+class SpaceSaving:
+    """
+    Space-Saving (Metwally et al.) over at most `capacity` items. Any item occurring
+    more than total/capacity times is guaranteed to be tracked, and each tracked
+    count overestimates the true count by at most its recorded error (<= total/capacity).
+    """
+
+    def __init__(self, capacity=None, epsilon=None):
+        self.capacity = capacity or math.ceil(1 / (epsilon or CONFIG["EPSILON"]))
+        self.counts = {}
+        self.errors = {}
+        self._total = 0
+        # One entry per tracked item holding a lower bound of its count; see _pop_min.
+        self._heap = []
+
+    def add(self, item, count=1):
+        self._total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+            return
+        floor, evicted = self._pop_min()
+        del counts[evicted], self.errors[evicted]
+        counts[item] = floor + count
+        self.errors[item] = floor
+        heapq.heappush(self._heap, (floor + count, item))
+
+    def update(self, items):
+        """Counts every item of an iterable, like Counter.update."""
+        for item in items:
+            self.add(item)
+
+    def _pop_min(self):
+        # Counts only grow, so a stale heap entry is a lower bound: refresh it and retry
+        # until the top entry is current, which makes it the true minimum.
+        heap, counts = self._heap, self.counts
+        while True:
+            count, item = heapq.heappop(heap)
+            current = counts[item]
+            if current == count:
+                return count, item
+            heapq.heappush(heap, (current, item))
+
+    def _floor(self):
+        """Upper bound on the count of any item that is not tracked."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def get(self, item, default=0):
+        return self.counts.get(item, default)
+
+    def bounds(self, item):
+        """Returns (lower, upper) bounds on the true count of item."""
+        if item in self.counts:
+            return self.counts[item] - self.errors[item], self.counts[item]
+        return 0, self._floor()
+
+    def most_common(self, n=None):
+        ranked = sorted(self.counts.items(), key=lambda kv: -kv[1])
+        return ranked if n is None else ranked[:n]
+
+    def total(self):
+        return self._total
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, item):
+        return item in self.counts
+
+    def merge(self, other):
+        """Returns a new sketch summarising both streams (Agarwal et al., mergeable summaries)."""
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        floor_a, floor_b = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for item in self.counts.keys() | other.counts.keys():
+            count_a = self.counts.get(item, floor_a)
+            count_b = other.counts.get(item, floor_b)
+            counts[item] = count_a + count_b
+            errors[item] = self.errors.get(item, floor_a) + other.errors.get(item, floor_b)
+        for item, count in heapq.nlargest(merged.capacity, counts.items(), key=lambda kv: kv[1]):
+            merged.counts[item] = count
+            merged.errors[item] = errors[item]
+        merged._heap = [(count, item) for item, count in merged.counts.items()]
+        heapq.heapify(merged._heap)
+        merged._total = self._total + other._total
+        return merged
+
+    def memory_entries(self):
+        return len(self.counts)
+
+@lru_cache(maxsize=65536)
+def _hash_pair(item, seed):
+    digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16, salt=seed.to_bytes(16, 'little')).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+class CountMinTopK:
+    """
+    Count-Min sketch (Cormode & Muthukrishnan) plus a bounded set of candidate heavy hitters.
+    Estimates never undercount and exceed the true count by at most epsilon * total with
+    probability 1 - delta. Memory is width * depth counters plus `candidates` items.
+    """
+
+    def __init__(self, epsilon=None, delta=None, candidates=None, seed=None, width=None, depth=None):
+        self.width = width or math.ceil(math.e / (epsilon or CONFIG["EPSILON"]))
+        self.depth = depth or math.ceil(math.log(1 / (delta or CONFIG["DELTA"])))
+        self.candidates = candidates or CONFIG["CANDIDATES"]
+        self.seed = CONFIG["SEED"] if seed is None else seed
+        self.table = array('q', bytes(8 * self.width * self.depth))
+        self.top = {}
+        self._total = 0
+        self._heap = []
+
+    def _cells(self, item):
+        # Double hashing (Kirsch & Mitzenmacher): row i uses h1 + i * h2.
+        h1, h2 = _hash_pair(item, self.seed)
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add(self, item, count=1):
+        self._total += count
+        table = self.table
+        estimate = None
+        for cell in self._cells(item):
+            table[cell] += count
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        self._track(item, estimate)
+
+    def update(self, items):
+        """Counts every item of an iterable, like Counter.update."""
+        for item in items:
+            self.add(item)
+
+    def _track(self, item, estimate):
+        top = self.top
+        if item in top:
+            top[item] = estimate
+            return
+        if len(top) < self.candidates:
+            top[item] = estimate
+            heapq.heappush(self._heap, (estimate, item))
+            return
+        # Same lazy min-heap as SpaceSaving: estimates only grow.
+        heap = self._heap
+        while True:
+            floor, weakest = heap[0]
+            if top[weakest] == floor:
+                break
+            heapq.heapreplace(heap, (top[weakest], weakest))
+        if estimate > floor:
+            heapq.heapreplace(heap, (estimate, item))
+            del top[weakest]
+            top[item] = estimate
+
+    def get(self, item, default=0):
+        if not self._total:
+            return default
+        table = self.table
+        return min(table[cell] for cell in self._cells(item))
+
+    def bounds(self, item):
+        """Returns (lower, upper) bounds that hold with probability 1 - delta."""
+        estimate = self.get(item)
+        return max(0, estimate - math.ceil(math.e / self.width * self._total)), estimate
+
+    def most_common(self, n=None):
+        ranked = sorted(((item, self.get(item)) for item in self.top), key=lambda kv: -kv[1])
+        return ranked if n is None else ranked[:n]
+
+    def total(self):
+        return self._total
+
+    def __len__(self):
+        return len(self.top)
+
+    def __contains__(self, item):
+        return item in self.top
+
+    def merge(self, other):
+        """Returns a new sketch summarising both streams; both must share width, depth and seed."""
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Count-Min sketches can only be merged with identical width, depth and seed")
+        merged = CountMinTopK(candidates=max(self.candidates, other.candidates), seed=self.seed, width=self.width, depth=self.depth)
+        merged.table = array('q', map(int.__add__, self.table, other.table))
+        merged._total = self._total + other._total
+        for item in self.top.keys() | other.top.keys():
+            merged._track(item, merged.get(item))
+        return merged
+
+    def memory_entries(self):
+        return len(self.table) + len(self.top)
+
+SKETCHES = {
+    "space-saving": SpaceSaving,
+    "count-min": CountMinTopK,
+}
+
+def make_sketch(method, epsilon=None):
+    """Returns an empty sketch of the named kind ("space-saving" or "count-min")."""
+    return SKETCHES[method](epsilon=epsilon)
+
+def merge_all(sketches):
+    """Merges a sequence of sketches (e.g. several seasons) into one."""
+    return reduce(lambda a, b: a.merge(b), sketches)
+
+def sliding_windows(season_sketches, window):
+    """
+    Yields ((first season, last season), merged sketch) for every run of `window`
+    consecutive seasons in a {season: sketch} mapping.
+    """
+    seasons = sorted(season_sketches)
+    for start in range(len(seasons) - window + 1):
+        span = seasons[start:start + window]
+        yield (span[0], span[-1]), merge_all([season_sketches[s] for s in span])
+
+def accuracy_report(exact, approximate, top_n=20):
+    """
+    Compares a sketch with the exact Counter for the same stream. Recall is the share
+    of the exact top-n found in the sketch's top-n; errors are measured on the exact top-n.
+    """
+    exact_top = exact.most_common(top_n)
+    approx_top = [item for item, _ in approximate.most_common(top_n)]
+    errors = [abs(approximate.get(item) - count) for item, count in exact_top]
+    relative = [error / count for error, (_, count) in zip(errors, exact_top) if count]
+    exact_rank = {item: rank for rank, (item, _) in enumerate(exact_top)}
+    rank_shifts = [abs(exact_rank[item] - rank) for rank, item in enumerate(approx_top) if item in exact_rank]
+    return {
+        "top_n": top_n,
+        "recall": round(len(set(approx_top) & exact_rank.keys()) / len(exact_top), 4) if exact_top else None,
+        "max_abs_error": max(errors, default=0),
+        "mean_rel_error": round(sum(relative) / len(relative), 6) if relative else 0.0,
+        "mean_rank_shift": round(sum(rank_shifts) / len(rank_shifts), 3) if rank_shifts else 0.0,
+        "exact_distinct": len(exact),
+        "sketch_entries": approximate.memory_entries(),
+    }
+
+
+if __name__ == "__main__":
+    import bump_chart
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Compare heavy-hitter sketches with exact answer counts.")
+    parser.add_argument("data_path", nargs="?", default="data")
+    parser.add_argument("--method", choices=sorted(SKETCHES), default="space-saving")
+    parser.add_argument("--epsilon", type=float, default=CONFIG["EPSILON"])
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--window", type=int, default=3, help="Seasons per sliding window.")
+    args = parser.parse_args()
+
+    exact = bump_chart.analyze_answer_frequencies(args.data_path)
+    approximate = bump_chart.analyze_answer_frequencies(args.data_path, lambda: make_sketch(args.method, args.epsilon))
+
+    rows = [(f"season {s}", exact[s], approximate[s]) for s in sorted(exact)]
+    if exact:
+        rows.append(("all seasons", sum(exact.values(), Counter()), merge_all(approximate[s] for s in sorted(approximate))))
+        for (first, last), sketch in sliding_windows(approximate, min(args.window, len(approximate))):
+            window_exact = sum((exact[s] for s in exact if first <= s <= last), Counter())
+            rows.append((f"seasons {first}-{last}", window_exact, sketch))
+
+    print(f"{args.method}, epsilon={args.epsilon}, top {args.top_n}")
+    print(f"  {'scope':<18} {'recall':>7} {'max err':>8} {'mean rel':>9} {'rank shift':>11} {'distinct':>9} {'entries':>8}")
+    for label, exact_counts, sketch in rows:
+        r = accuracy_report(exact_counts, sketch, args.top_n)
+        print(f"  {label:<18} {r['recall']:>7} {r['max_abs_error']:>8} {r['mean_rel_error']:>9} "
+              f"{r['mean_rank_shift']:>11} {r['exact_distinct']:>9} {r['sketch_entries']:>8}")
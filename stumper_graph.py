@@ -1,12 +1,18 @@
 import os
 import json
+import hashlib
 from collections import defaultdict
 import numpy as np
-import networkx as nx
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from pyvis.network import Network
 import logging
+import game_store
+import categories
+import clustering
+import sampling
+import vector_store
+from instrumentation import RunReport
+
+# sentence_transformers (torch), scipy, networkx and pyvis are imported inside
+# the functions that need them so that cache-hit runs start quickly.
 
 # --- Configuration ---
 CONFIG = {
@@ -16,191 +22,263 @@ CONFIG = {
     "SIMILARITY_THRESHOLD": 0.45,
     "MIN_TOTAL_STUMPERS": 25,
     "OUTPUT_HTML_FILE": "charts/jeopardy_stumper_similarity_graph.html",
-    "CACHE_PATH": "cache"
+    "CACHE_PATH": "cache",
+    "VECTOR_DTYPE": "float32",  # "float16" or "int8": keep clue embeddings quantized and memory-mapped
 }
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def get_all_game_files(base_path):
-    """Recursively finds all .json game files in the base data directory."""
-    json_files = []
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.endswith('.json'):
-                json_files.append(os.path.join(root, file))
-    return json_files
+    """Finds all games under the base data directory, as per-game JSON files or season bundles."""
+    return game_store.list_games(base_path)
 
 def aggregate_category_data(game_files):
     """
     Aggregates appearances, stumper counts/text, and total clue counts for each category.
+    Stumper text is kept as one "clue answer" string per stumper so each clue can be
+    embedded on its own.
     """
-    stumper_texts = defaultdict(str)
+    stumper_texts = defaultdict(list)
     category_counts = defaultdict(int)
     total_stumper_counts = defaultdict(int)
     stumper_clues = defaultdict(list)
     category_clue_counts = defaultdict(int)
     
     logging.info(f"Processing {len(game_files)} game files...")
-    for file_path in game_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            for round_data in data.get("rounds", []):
-                for category in round_data.get("categories", []):
-                    name = category.get("name")
-                    clues = category.get("clues", [])
-                    
-                    if not name or not clues or "potpourri" in name.lower():
-                        continue
-                    
-                    category_counts[name] += 1
-                    category_clue_counts[name] += len(clues)
-                    
-                    for clue in clues:
-                        if "Triple Stumper" in clue.get("wrong_contestants", []):
-                            total_stumper_counts[name] += 1
-                            stumper_texts[name] += f' {clue.get("clue", "")} {clue.get("answer", "")}'
-                            stumper_clues[name].append({
-                                "clue": clue.get("clue", "N/A"),
-                                "answer": clue.get("answer", "N/A")
-                            })
-
-        except (json.JSONDecodeError, KeyError) as e:
-            logging.warning(f"Skipping malformed file {file_path}: {e}")
-            continue
+    for _, game in game_store.iter_games(game_files, typed=True):
+        for round_data in game.rounds:
+            for category in round_data.categories:
+                name = category.name
+                clues = category.clues
+                
+                if not name or not clues or "potpourri" in name.lower():
+                    continue
+                
+                category_counts[name] += 1
+                category_clue_counts[name] += len(clues)
+                
+                for clue in clues:
+                    if clue.triple_stumper:
+                        total_stumper_counts[name] += 1
+                        stumper_texts[name].append(f'{clue.clue} {clue.answer}')
+                        stumper_clues[name].append({
+                            "clue": clue.clue,
+                            "answer": clue.answer
+                        })
             
     return stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts
 
-def get_embeddings(texts_dict):
+def get_embeddings(texts):
     """Encodes texts into vector embeddings using a sentence-transformer model."""
+    from sentence_transformers import SentenceTransformer
+
     model = SentenceTransformer(CONFIG['MODEL_NAME'])
-    corpus = list(texts_dict.values())
-    logging.info(f"Encoding {len(corpus)} documents...")
-    return model.encode(corpus, show_progress_bar=True)
+    logging.info(f"Encoding {len(texts)} documents...")
+    return model.encode(texts, show_progress_bar=True)
 
-def build_graph(similarity_matrix, category_names, category_counts, total_stumper_counts, stumper_clues, category_clue_counts):
-    """Builds a NetworkX graph with rescaled node sizes for better visual distinction."""
-    G = nx.Graph()
+def clue_cache_paths(cache_dir, dtype=None):
+    """Returns (vectors file, keys file) of the clue embedding cache in the given encoding."""
+    dtype = dtype or CONFIG['VECTOR_DTYPE']
+    model_slug = CONFIG['MODEL_NAME'].replace('/', '_')
+    suffix = "" if dtype == "float32" else f"_{dtype}"
+    return (os.path.join(cache_dir, f"clue_embeddings_{model_slug}{suffix}.npy"),
+            os.path.join(cache_dir, f"clue_embeddings_{model_slug}{suffix}_keys.json"))
 
-    ratios = {}
-    for name in category_names:
-        total_stumpers = total_stumper_counts.get(name, 0)
-        total_clues = category_clue_counts.get(name, 1)
-        ratios[name] = total_stumpers / total_clues if total_clues > 0 else 0
+def load_clue_cache(cache_dir, dtype=None):
+    """
+    Returns (vectors, keys) from the clue embedding cache, or (None, []) if there is none.
+    float32 vectors are a plain array; a quantized cache is a memory-mapped VectorStore,
+    created from the float32 cache the first time it is asked for.
+    """
+    dtype = dtype or CONFIG['VECTOR_DTYPE']
+    vectors_file, keys_file = clue_cache_paths(cache_dir, dtype)
+    if os.path.exists(vectors_file) and os.path.exists(keys_file):
+        with open(keys_file, 'r') as f: keys = json.load(f)
+        if dtype == "float32":
+            return np.load(vectors_file), keys
+        return vector_store.VectorStore.open(vectors_file), keys
+    if dtype != "float32" and all(os.path.exists(path) for path in clue_cache_paths(cache_dir, "float32")):
+        float_file, float_keys_file = clue_cache_paths(cache_dir, "float32")
+        logging.info(f"Converting the clue embedding cache to {dtype}...")
+        vector_store.VectorStore.from_vectors(np.load(float_file, mmap_mode='r'), dtype).save(vectors_file)
+        with open(float_keys_file, 'r') as f: keys = json.load(f)
+        with open(keys_file, 'w') as f: json.dump(keys, f)
+        return vector_store.VectorStore.open(vectors_file), keys
+    return None, []
+
+def text_key(text):
+    """The clue embedding cache's key for a text."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def append_clue_vectors(vectors, new_vectors, dtype=None):
+    """Adds float32 vectors after the rows of a loaded clue cache (None for an empty cache)."""
+    dtype = dtype or CONFIG['VECTOR_DTYPE']
+    if dtype == "float32":
+        return new_vectors if vectors is None else np.concatenate([vectors, new_vectors])
+    return vector_store.VectorStore.from_vectors(new_vectors, dtype) if vectors is None else vectors.append(new_vectors)
+
+def save_clue_cache(vectors, keys, cache_dir, dtype=None):
+    dtype = dtype or CONFIG['VECTOR_DTYPE']
+    vectors_file, keys_file = clue_cache_paths(cache_dir, dtype)
+    if dtype == "float32":
+        np.save(vectors_file, vectors)
+    else:
+        vectors.save(vectors_file)
+    with open(keys_file, 'w') as f: json.dump(keys, f)
+
+def embed_clues(texts, cache_dir):
+    """
+    Embeds each unique clue text exactly once. Vectors are kept in an append-only
+    cache keyed by a hash of the text, so only clues never seen before are encoded.
+    Returns (text -> row index, vectors).
+    """
+    dtype = CONFIG['VECTOR_DTYPE']
+    vectors, keys = load_clue_cache(cache_dir, dtype)
+    key_rows = {key: row for row, key in enumerate(keys)}
+
+    unique_texts = list(dict.fromkeys(texts))
+    text_keys = [text_key(text) for text in unique_texts]
+    missing = [(text, key) for text, key in zip(unique_texts, text_keys) if key not in key_rows]
+
+    if missing:
+        new_vectors = np.asarray(get_embeddings([text for text, _ in missing]), dtype=np.float32)
+        for _, key in missing:
+            key_rows[key] = len(keys)
+            keys.append(key)
+        vectors = append_clue_vectors(vectors, new_vectors, dtype)
+        save_clue_cache(vectors, keys, cache_dir, dtype)
+    else:
+        logging.info(f"All {len(unique_texts)} clue embeddings found in cache.")
+
+    clue_index = {text: key_rows[key] for text, key in zip(unique_texts, text_keys)}
+    return clue_index, vectors
+
+def pool_category_vectors(category_names, stumper_texts, clue_index, clue_vectors, weights=None):
+    """
+    Mean-pools per-clue embeddings into one vector per category with a single
+    np.add.reduceat over the concatenated clue rows. `weights` optionally maps a
+    category name to one weight per entry of its stumper_texts list.
+    """
+    if not category_names:
+        return np.empty((0, clue_vectors.shape[1] if clue_vectors is not None else 0), dtype=np.float32)
+
+    rows = [np.fromiter((clue_index[text] for text in stumper_texts[name]), dtype=np.int64) for name in category_names]
+    lengths = np.array([len(r) for r in rows], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    flat_rows = np.concatenate(rows)
+
+    if weights is None:
+        flat_weights = np.ones(len(flat_rows), dtype=np.float32)
+    else:
+        flat_weights = np.concatenate([np.asarray(weights[name], dtype=np.float32) for name in category_names])
+
+    weighted = clue_vectors[flat_rows] * flat_weights[:, None]
+    sums = np.add.reduceat(weighted, offsets, axis=0)
+    totals = np.add.reduceat(flat_weights, offsets)
+    return sums / np.where(totals == 0, 1, totals)[:, None]
+
+def build_knn_matrix(category_vectors, top_n, threshold, batch_size=2048, dtype=None):
+    """
+    Builds a symmetric sparse kNN similarity matrix in one vectorized pass.
+    Each row keeps its top_n neighbours scoring at least `threshold`; rows are
+    processed in blocks so the dense similarity matrix is never materialized.
+    Similarities are computed on the vectors encoded as `dtype` (CONFIG['VECTOR_DTYPE']).
+    """
+    from scipy import sparse
+
+    n = len(category_vectors)
+    k = min(top_n, n - 1)
+    if k <= 0:
+        return sparse.csr_matrix((n, n), dtype=np.float32)
+
+    store = vector_store.VectorStore.from_vectors(category_vectors, dtype or CONFIG['VECTOR_DTYPE'])
+
+    rows, cols, scores = [], [], []
+    for start in range(0, n, batch_size):
+        block = store.similarity(store[start:start + batch_size])
+        row_ids = np.arange(start, start + len(block))
+        block[row_ids - start, row_ids] = -np.inf  # no self-loops
+
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        keep = top_scores >= threshold
+
+        rows.append(np.broadcast_to(row_ids[:, None], top.shape)[keep])
+        cols.append(top[keep])
+        scores.append(top_scores[keep])
+
+    knn = sparse.coo_matrix(
+        (np.concatenate(scores), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n, n)
+    ).tocsr()
+    return knn.maximum(knn.T)
+
+def build_graph(category_vectors, category_names, category_counts, total_stumper_counts, stumper_clues, category_clue_counts, topics=None):
+    """
+    Builds the sparse similarity graph and computes rescaled node sizes and hover
+    titles column-wise. `topics` optionally gives each category's cluster label.
+    Returns (adjacency, sizes, titles).
+    """
+    appearances = np.array([category_counts.get(name, 0) for name in category_names], dtype=np.int64)
+    stumpers = np.array([total_stumper_counts.get(name, 0) for name in category_names], dtype=np.int64)
+    clue_counts = np.array([category_clue_counts.get(name, 1) for name in category_names], dtype=np.int64)
+
+    ratios = np.divide(stumpers, clue_counts, out=np.zeros(len(category_names)), where=clue_counts > 0)
 
-    min_ratio = min(ratios.values()) if ratios else 0
-    max_ratio = max(ratios.values()) if ratios else 0
-    
     min_size = 10
     max_size = 50
-    
-    for name in category_names:
-        total_appearances = category_counts.get(name, 0)
-        total_stumpers = total_stumper_counts.get(name, 0)
-        stumper_ratio = ratios.get(name, 0)
-        
-        if max_ratio > min_ratio:
-            normalized_ratio = (stumper_ratio - min_ratio) / (max_ratio - min_ratio)
-        else:
-            normalized_ratio = 0.5
-        
-        node_size = float(min_size + normalized_ratio * (max_size - min_size))
-        
-        clue_list_preview = stumper_clues.get(name, [])[:5]
-        clue_answer_strings = [f"- {item['clue']}: {item['answer']}" for item in clue_list_preview]
-        stumpers_preview_text = "\n".join(clue_answer_strings)
 
-        title = (
+    ratio_span = float(ratios.max() - ratios.min()) if len(ratios) else 0.0
+    if ratio_span > 0:
+        normalized = (ratios - ratios.min()) / ratio_span
+    else:
+        normalized = np.full(len(ratios), 0.5)
+    sizes = min_size + normalized * (max_size - min_size)
+
+    titles = []
+    for name, total_appearances, total_stumpers, stumper_ratio, topic in zip(category_names, appearances, stumpers, ratios, topics or [None] * len(category_names)):
+        clue_list_preview = stumper_clues.get(name, [])[:5]
+        stumpers_preview_text = "\n".join(f"- {item['clue']}: {item['answer']}" for item in clue_list_preview)
+        topic_line = f"Topic: {topic}\n" if topic else ""
+        titles.append(
             f"{name}\n"
             f"Category Appeared: {total_appearances} times\n"
             f"Total Triple Stumpers: {total_stumpers}\n"
             f"Triple Stumper Ratio: {stumper_ratio:.1%}\n"
+            f"{topic_line}"
             f"-----------------------------\n"
             f"{stumpers_preview_text}"
         )
-        G.add_node(name, size=node_size, title=title)
-
-    logging.info("Building graph edges from similarity matrix...")
-    for i in range(len(category_names)):
-        sim_scores = similarity_matrix[i]
-        sorted_indices = np.argsort(sim_scores)[::-1]
-        edges_added = 0
-        for j in sorted_indices[1:]:
-            if edges_added >= CONFIG['TOP_N_EDGES']:
-                break
-            score = float(sim_scores[j])
-            if score >= CONFIG['SIMILARITY_THRESHOLD']:
-                cat_i, cat_j = category_names[i], category_names[j]
-                G.add_edge(cat_i, cat_j, weight=score, title=f"{score:.2f}", value=score)
-                edges_added += 1
-                
-    return G
 
-def main():
-    """Main function to run the full pipeline."""
-    cache_dir = CONFIG['CACHE_PATH']
-    cache_prefix = f"stumper_ratio_{CONFIG['MIN_TOTAL_STUMPERS']}_"
-    vectors_cache_file = os.path.join(cache_dir, f"{cache_prefix}vectors.npy")
-    names_cache_file = os.path.join(cache_dir, f"{cache_prefix}names.json")
-    all_stumper_texts_cache = os.path.join(cache_dir, "all_stumper_texts_v6.json")
-    all_counts_cache = os.path.join(cache_dir, "all_category_counts_v6.json")
-    all_total_stumpers_cache = os.path.join(cache_dir, "all_total_stumpers_v6.json")
-    all_stumper_clues_cache = os.path.join(cache_dir, "all_stumper_clues_v6.json")
-    all_clue_counts_cache = os.path.join(cache_dir, "all_clue_counts_v6.json")
-    
-    os.makedirs(cache_dir, exist_ok=True)
+    logging.info("Building sparse kNN edges from category vectors...")
+    adjacency = build_knn_matrix(category_vectors, CONFIG['TOP_N_EDGES'], CONFIG['SIMILARITY_THRESHOLD'])
 
-    if os.path.exists(vectors_cache_file) and os.path.exists(names_cache_file):
-        logging.info("Loading filtered data from cache...")
-        category_vectors = np.load(vectors_cache_file)
-        with open(names_cache_file, 'r') as f: category_names = json.load(f)
-        with open(all_counts_cache, 'r') as f: category_counts = json.load(f)
-        with open(all_total_stumpers_cache, 'r') as f: total_stumper_counts = json.load(f)
-        with open(all_stumper_clues_cache, 'r') as f: stumper_clues = json.load(f)
-        with open(all_clue_counts_cache, 'r') as f: category_clue_counts = json.load(f)
-    else:
-        logging.info("Cache not found for current settings. Starting full data processing.")
-        game_files = get_all_game_files(CONFIG['BASE_DATA_PATH'])
-        stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts = aggregate_category_data(game_files)
-
-        with open(all_stumper_texts_cache, 'w') as f: json.dump(stumper_texts, f)
-        with open(all_counts_cache, 'w') as f: json.dump(category_counts, f)
-        with open(all_total_stumpers_cache, 'w') as f: json.dump(total_stumper_counts, f)
-        with open(all_stumper_clues_cache, 'w') as f: json.dump(stumper_clues, f)
-        with open(all_clue_counts_cache, 'w') as f: json.dump(category_clue_counts, f)
-        
-        logging.info(f"Original unique category count: {len(category_counts)}")
+    return adjacency, sizes, titles
 
-        filtered_names = {
-            name for name, count in total_stumper_counts.items() 
-            if count >= CONFIG["MIN_TOTAL_STUMPERS"]
-        }
-        filtered_stumper_texts = { name: text for name, text in stumper_texts.items() if name in filtered_names }
-        
-        logging.info(f"Filtered count (>{CONFIG['MIN_TOTAL_STUMPERS']} total Triple Stumpers): {len(filtered_names)}")
-        
-        category_names = list(filtered_stumper_texts.keys())
-        category_vectors = get_embeddings(filtered_stumper_texts)
-        
-        logging.info(f"Saving filtered data to cache in '{cache_dir}'...")
-        np.save(vectors_cache_file, category_vectors)
-        with open(names_cache_file, 'w') as f: json.dump(category_names, f)
+def to_networkx(category_names, adjacency, sizes, titles, node_colors):
+    """Converts the sparse graph and its node attributes into a NetworkX graph."""
+    import networkx as nx
+    from scipy import sparse
+
+    G = nx.Graph()
+    G.add_nodes_from(
+        (name, {"size": float(size), "title": title, "color": color})
+        for name, size, title, color in zip(category_names, sizes, titles, node_colors)
+    )
+
+    upper = sparse.triu(adjacency, k=1).tocoo()
+    G.add_edges_from(
+        (category_names[i], category_names[j], {"weight": float(score), "title": f"{score:.2f}", "value": float(score)})
+        for i, j, score in zip(upper.row, upper.col, upper.data)
+    )
+    return G
+
+def save_network_html(G, output_file):
+    """Renders the graph with pyvis and writes the interactive HTML file."""
+    logging.info(f"Generating interactive graph: {output_file}")
+    from pyvis.network import Network
 
-    logging.info("Calculating similarity matrix...")
-    similarity_matrix = cosine_similarity(category_vectors)
-    
-    G = build_graph(similarity_matrix, category_names, category_counts, total_stumper_counts, stumper_clues, category_clue_counts)
-
-    logging.info("Coloring graph components...")
-    components = nx.connected_components(G)
-    colors = ["#FF5733", "#33FF57", "#3357FF", "#FF33A1", "#A133FF", "#33FFA1", "#FFC300", "#C70039", "#900C3F", "#581845"]
-    for i, component in enumerate(components):
-        color = colors[i % len(colors)]
-        for node in component:
-            G.nodes[node]['color'] = color
-    
-    logging.info(f"Generating interactive graph: {CONFIG['OUTPUT_HTML_FILE']}")
     net = Network(height="90vh", width="100%", cdn_resources='remote', bgcolor="white", font_color="black")
     net.from_nx(G)
     
@@ -234,9 +312,148 @@ def main():
     }
     """
     net.set_options(options)
-    net.save_graph(CONFIG['OUTPUT_HTML_FILE'])
+    net.save_graph(output_file)
+
+def load_cached_category_vectors(cache_dir=None):
+    """
+    Returns (category_names, category_vectors) for the graph's categories from the caches
+    a previous run left behind, without loading the model; None if any are missing.
+    """
+    cache_dir = cache_dir or CONFIG['CACHE_PATH']
+    vectors_file, keys_file = clue_cache_paths(cache_dir)
+    texts_cache, _, total_stumpers_cache, _, _ = aggregate_cache_paths(cache_dir)
+    if not all(os.path.exists(path) for path in (vectors_file, keys_file, texts_cache, total_stumpers_cache)):
+        return None
+
+    with open(texts_cache, 'r') as f: stumper_texts = json.load(f)
+    with open(total_stumpers_cache, 'r') as f: total_stumper_counts = json.load(f)
+    with open(keys_file, 'r') as f: key_rows = {key: row for row, key in enumerate(json.load(f))}
+    category_names = [name for name, count in total_stumper_counts.items() if count >= CONFIG["MIN_TOTAL_STUMPERS"]]
+    clue_index = {}
+    for name in category_names:
+        for text in stumper_texts[name]:
+            row = key_rows.get(text_key(text))
+            if row is None:
+                return None
+            clue_index[text] = row
+    if CONFIG['VECTOR_DTYPE'] == "float32":
+        clue_vectors = np.load(vectors_file, mmap_mode='r')
+    else:
+        clue_vectors = vector_store.VectorStore.open(vectors_file)
+    return category_names, pool_category_vectors(category_names, stumper_texts, clue_index, clue_vectors)
+
+def aggregate_cache_paths(cache_dir):
+    """The cached outputs of aggregate_category_data; they must be deleted when the data changes."""
+    names = ["all_stumper_texts", "all_category_counts", "all_total_stumpers", "all_stumper_clues", "all_clue_counts"]
+    return [os.path.join(cache_dir, f"{name}_v8.json") for name in names]
+
+def merge_category_aliases(aggregates, data_path=None):
+    """
+    Merges spelling and punctuation variants of category names in aggregate_category_data's
+    output, using the alias table of the whole archive (not of the names in `aggregates`).
+    """
+    aliases = categories.archive_aliases(data_path or CONFIG['BASE_DATA_PATH'])
+    logging.info(f"Merged {len(aliases)} category name variants")
+    return tuple(categories.merge_by_alias(mapping, aliases) for mapping in aggregates)
+
+def save_aggregate_caches(cache_dir, aggregates):
+    for path, mapping in zip(aggregate_cache_paths(cache_dir), aggregates):
+        with open(path, 'w') as f: json.dump(mapping, f)
+
+def main(sample_fraction=None):
+    """Main function to run the full pipeline, or a preview of it on a sample of games."""
+    report = RunReport("stumper_graph")
+    cache_dir = CONFIG['CACHE_PATH']
+    aggregate_caches = aggregate_cache_paths(cache_dir)
+    all_stumper_texts_cache, all_counts_cache, all_total_stumpers_cache, all_stumper_clues_cache, all_clue_counts_cache = aggregate_caches
+    
+    os.makedirs(cache_dir, exist_ok=True)
+
+    sample = None
+    if sample_fraction:
+        sample = sampling.load_sample(CONFIG['BASE_DATA_PATH'], sample_fraction)
+        with report.stage("aggregate_category_data") as stage:
+            stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts = aggregate_category_data(sample.locators)
+            stage.items = len(sample.locators)
+        # The alias table of the last full build is applied as is; it is not rebuilt for the sample's names.
+        aliases = categories.load_aliases()
+        stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts = (
+            categories.merge_by_alias(mapping, aliases)
+            for mapping in (stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts)
+        )
+        # Counts are scaled to the whole archive, so MIN_TOTAL_STUMPERS keeps its meaning.
+        category_counts, _ = sampling.scale_counts(category_counts, sample.scale)
+        category_clue_counts, _ = sampling.scale_counts(category_clue_counts, sample.scale)
+        total_stumper_counts, stumper_bounds = sampling.scale_counts(total_stumper_counts, sample.scale)
+        sampling.log_bounds(total_stumper_counts, stumper_bounds)
+    elif all(os.path.exists(path) for path in aggregate_caches):
+        logging.info("Loading aggregated category data from cache...")
+        with report.stage("load_cache") as stage:
+            with open(all_stumper_texts_cache, 'r') as f: stumper_texts = json.load(f)
+            with open(all_counts_cache, 'r') as f: category_counts = json.load(f)
+            with open(all_total_stumpers_cache, 'r') as f: total_stumper_counts = json.load(f)
+            with open(all_stumper_clues_cache, 'r') as f: stumper_clues = json.load(f)
+            with open(all_clue_counts_cache, 'r') as f: category_clue_counts = json.load(f)
+            stage.items = len(category_counts)
+    else:
+        logging.info("Cache not found. Starting full data processing.")
+        with report.stage("aggregate_category_data") as stage:
+            game_files = get_all_game_files(CONFIG['BASE_DATA_PATH'])
+            stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts = aggregate_category_data(game_files)
+            stage.items = len(game_files)
+
+        # Spelling and punctuation variants of a category name become one node.
+        with report.stage("merge_category_aliases", items=len(category_counts)):
+            stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts = merge_category_aliases(
+                (stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts))
+
+        with report.stage("write_cache", items=len(category_counts)):
+            save_aggregate_caches(cache_dir, (stumper_texts, category_counts, total_stumper_counts, stumper_clues, category_clue_counts))
+        
+    logging.info(f"Original unique category count: {len(category_counts)}")
+
+    category_names = [
+        name for name, count in total_stumper_counts.items()
+        if count >= CONFIG["MIN_TOTAL_STUMPERS"]
+    ]
+    logging.info(f"Filtered count (>{CONFIG['MIN_TOTAL_STUMPERS']} total Triple Stumpers): {len(category_names)}")
+
+    clue_texts = [text for name in category_names for text in stumper_texts[name]]
+    with report.stage("embed_clues", items=len(clue_texts)):
+        clue_index, clue_vectors = embed_clues(clue_texts, cache_dir)
+    with report.stage("pool_category_vectors", items=len(category_names)):
+        category_vectors = pool_category_vectors(category_names, stumper_texts, clue_index, clue_vectors)
+
+    # Nodes are colored by topic cluster (see clustering.py), which also feeds the cluster summary chart.
+    with report.stage("cluster_categories", items=len(category_names)):
+        note = sample.note(sampling.relative_bound(total_stumper_counts, stumper_bounds)) if sample else None
+        assignments_path = sampling.output_path(clustering.CONFIG['ASSIGNMENTS_PATH']) if sample else None
+        assignments = clustering.assign_clusters(category_names, category_vectors, total_stumper_counts, category_clue_counts,
+                                                 path=assignments_path, note=note)
+        topic_labels = {row["cluster"]: row["label"] for row in assignments["clusters"]}
+        topics = [topic_labels[assignments["categories"][name]] for name in category_names]
+
+    with report.stage("build_graph", items=len(category_names)):
+        adjacency, sizes, titles = build_graph(category_vectors, category_names, category_counts, total_stumper_counts, stumper_clues, category_clue_counts, topics)
+        node_colors = clustering.node_colors(category_names, assignments)
+
+        G = to_networkx(category_names, adjacency, sizes, titles, node_colors)
+    
+    output_file = sampling.output_path(CONFIG['OUTPUT_HTML_FILE']) if sample else CONFIG['OUTPUT_HTML_FILE']
+    with report.stage("write_html", items=len(category_names)):
+        save_network_html(G, output_file)
+        if sample:
+            sampling.mark_preview(output_file, note)
     
-    logging.info(f"Success! Open '{CONFIG['OUTPUT_HTML_FILE']}' in your browser to view the graph.")
+    logging.info(f"Success! Open '{output_file}' in your browser to view the graph.")
+    report.finish()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the Triple Stumper category similarity graph.")
+    parser.add_argument("--data-path", default=CONFIG['BASE_DATA_PATH'])
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+    CONFIG['BASE_DATA_PATH'] = args.data_path
+    main(args.sample)
\ No newline at end of file
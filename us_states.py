@@ -1,71 +1,40 @@
-import os
-import json
-import pandas as pd
-import plotly.express as px
 from collections import defaultdict
 import textwrap
+import game_store
+from answers import canonical_answer
+from entities import get_state_data, get_state_name_map
+from instrumentation import RunReport, timed
 
-def get_state_data():
-    """
-    Returns a dictionary mapping full US state names to their 2-letter postal codes.
-    This replaces the pycountry library for the US map.
-    """
-    states = {
-        'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-        'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-        'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-        'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-        'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
-        'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH',
-        'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC',
-        'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
-        'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD', 'Tennessee': 'TN',
-        'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA', 'Washington': 'WA',
-        'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC'
-    }
-    return states
+OUTPUT_HTML_FILE = "charts/jeopardy_answers_by_state.html"
 
-def get_state_counts():
+def get_state_counts(data_path='data', game_files=None):
     """
     Parses Jeopardy data to count how many times each US state is an answer.
     """
     state_counts = defaultdict(int)
     state_clues = defaultdict(list)
     
-    # Create a name map from the full state name to its 2-letter code
-    name_map = get_state_data()
+    name_map = get_state_name_map()
 
-    for season_dir in os.listdir('data'):
-        season_path = os.path.join('data', season_dir)
-        if os.path.isdir(season_path):
-            for episode_file in os.listdir(season_path):
-                if episode_file.endswith('.json'):
-                    with open(os.path.join(season_path, episode_file), 'r', encoding='utf-8') as f:
-                        try:
-                            data = json.load(f)
-                            for round_data in data.get('rounds', []):
-                                for category in round_data.get('categories', []):
-                                    category_name = category.get('name', 'N/A')
-                                    for clue in category.get('clues', []):
-                                        answer = clue.get('answer', '')
-                                        if answer in name_map:
-                                            state_code = name_map[answer]
-                                            state_counts[state_code] += 1
-                                            if len(state_clues[state_code]) < 5:
-                                                clue_info = {
-                                                    'category': category_name,
-                                                    'clue': clue.get('clue', '')
-                                                }
-                                                state_clues[state_code].append(clue_info)
-                        except (json.JSONDecodeError, KeyError) as e:
-                            print(f"Skipping file {episode_file} due to error: {e}")
-                            continue
+    if game_files is None:
+        game_files = game_store.list_games(data_path)
+    for _, game in game_store.iter_games(game_files, typed=True):
+        with timed("scan"):
+            for _, category, clue in game.iter_clues():
+                answer = canonical_answer(clue.answer)
+                if answer in name_map:
+                    state_code = name_map[answer]
+                    state_counts[state_code] += 1
+                    if len(state_clues[state_code]) < 5:
+                        clue_info = {
+                            'category': category.name or 'N/A',
+                            'clue': clue.clue
+                        }
+                        state_clues[state_code].append(clue_info)
     return state_counts, state_clues
 
-def create_us_map(state_counts, state_clues):
-    """
-    Creates the US map using 2-letter state codes for location and wraps hover text.
-    """
+def _map_rows(state_counts, state_clues):
+    """One row per state: code, name, count and wrapped hover text."""
     state_codes = list(state_counts.keys())
     counts = list(state_counts.values())
     
@@ -92,13 +61,28 @@ def create_us_map(state_counts, state_clues):
         )
         hover_texts.append(hover_text)
 
-    data = {
+    return {
         'state_code': state_codes,
         'state_name': [code_to_name.get(code, code) for code in state_codes],
         'count': counts,
         'hover_text': hover_texts
     }
-    df = pd.DataFrame(data)
+
+def create_us_map(state_counts, state_clues, output_file=OUTPUT_HTML_FILE, frames=None):
+    """
+    Creates the US map using 2-letter state codes for location and wraps hover text.
+    With frames, a list of (season, state_counts, state_clues), the map is animated
+    with one frame per season on a shared color scale.
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    animation = {}
+    if frames:
+        df = pd.concat([pd.DataFrame(_map_rows(counts, clues)).assign(season=season) for season, counts, clues in frames])
+        animation = dict(animation_frame="season", range_color=(0, max(df['count'].max(), 1)))
+    else:
+        df = pd.DataFrame(_map_rows(state_counts, state_clues))
 
     fig = px.choropleth(
         df,
@@ -109,6 +93,7 @@ def create_us_map(state_counts, state_clues):
         hover_name="state_name",
         custom_data=['hover_text'],
         color_continuous_scale=['#FFFFFF', '#070973'],
+        **animation
     )
     
     fig.update_traces(hovertemplate='%{customdata}<extra></extra>')
@@ -126,12 +111,41 @@ def create_us_map(state_counts, state_clues):
         )
     )
 
-    fig.write_html("charts/jeopardy_answers_by_state.html")
-    print("Map has been generated and saved as charts/jeopardy_answers_by_state.html")
+    fig.write_html(output_file)
+    print(f"Map has been generated and saved as {output_file}")
 
 
 if __name__ == "__main__":
+    import argparse
+    import count_cube
+    import sampling
+
+    parser = argparse.ArgumentParser(description="Map how often each US state is an answer.")
+    count_cube.add_arguments(parser)
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+    sampling.check_arguments(parser, args)
+
+    report = RunReport("us_states")
+    frames = None
     print("Analyzing Jeopardy data for US states...")
-    state_counts, state_clues = get_state_counts()
+    with report.stage("get_state_counts") as stage:
+        if args.sample:
+            sample = sampling.load_sample(args.data_path, args.sample)
+            state_counts, state_clues, bounds = sampling.estimate(sample, lambda games: get_state_counts(game_files=games), max_clues=5)
+            sampling.log_bounds(state_counts, bounds)
+        elif args.seasons or args.animate:
+            cube = count_cube.load_cube(args.data_path)
+            seasons = count_cube.parse_seasons(args.seasons)
+            state_counts, state_clues = cube.slice("state", seasons)
+            frames = cube.frames("state", seasons) if args.animate else None
+        else:
+            state_counts, state_clues = get_state_counts(args.data_path)
+        stage.items = sum(state_counts.values())
     print("Generating US map...")
-    create_us_map(state_counts, state_clues)
\ No newline at end of file
+    with report.stage("write_html", items=len(state_counts)):
+        output_file = sampling.output_path(OUTPUT_HTML_FILE) if args.sample else count_cube.output_path(OUTPUT_HTML_FILE, args.seasons, args.animate)
+        create_us_map(state_counts, state_clues, output_file, frames)
+        if args.sample:
+            sampling.mark_preview(output_file, sample.note(sampling.relative_bound(state_counts, bounds)))
+    report.finish()
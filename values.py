@@ -0,0 +1,415 @@
+import os
+import json
+import hashlib
+import logging
+import argparse
+import numpy as np
+import categories
+import game_store
+import sampling
+from answers import AnswerVocabulary, CANONICAL_VERSION
+from instrumentation import RunReport, timed
+
+# --- Configuration ---
+CONFIG = {
+    "DATA_PATH": "data",
+    "TABLE_PATH": "cache/clue_values.npz",
+    "OUTPUT_HTML_FILE": "charts/jeopardy_clue_values.html",
+    # Possible top-row values per round: $100/$200 before the values doubled in November
+    # 2001, $200/$400 since.
+    "BASE_VALUES": {"jeopardy_round": (100, 200), "double_jeopardy_round": (200, 400)},
+    "ROWS": 5,
+    "COLUMNS": 6,
+    "MIN_CATEGORY_CLUES": 20,   # categories with fewer clues are left out of the difficulty ranking
+    "TOP_N": 15,
+}
+
+ROUNDS = ["jeopardy_round", "double_jeopardy_round", "final_jeopardy_round"]
+TABLE_VERSION = 2
+
+# One row per clue, stored as parallel numpy columns:
+#   season, game, category, answer   int32 ids into the `seasons`, `games`, `categories` and
+#                                    `answers` tables (answer -1 when it has no usable form)
+#   round                            int8 index into ROUNDS
+#   column, row                      int8 board position; column from 0, row 1-5 top first,
+#                                    0 when unknown (Final Jeopardy, or not inferable)
+#   board_value                      int32 dollars printed on the board, 0 when unknown; a
+#                                    Daily Double's comes from its row
+#   wager                            int32 Daily Double wager, 0 for other clues
+#   daily_double, stumper            bool
+# Values are parsed once, when a game is added (schema.parse_value); every analysis below
+# is a mask and a bincount over the whole archive. The table lives in
+# CONFIG["TABLE_PATH"] and is extended with new games only; it records its data directory
+# and a stamp per game, and is rebuilt when either no longer matches the archive.
+
+COLUMNS = ("season", "game", "category", "answer", "round", "column", "row",
+           "board_value", "wager", "daily_double", "stumper")
+TABLES = ("seasons", "games", "stamps", "categories", "answers", "answer_labels")
+
+def _fingerprint():
+    settings = [TABLE_VERSION, CANONICAL_VERSION, CONFIG["BASE_VALUES"], CONFIG["ROWS"]]
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+def round_base(round_name, dollars):
+    """
+    Returns the top-row value of a round whose regular (non-Daily Double) clues are worth
+    `dollars`: the largest candidate that makes every value a whole row, or None.
+    """
+    for base in sorted(CONFIG["BASE_VALUES"].get(round_name, ()), reverse=True):
+        if all(value % base == 0 and 1 <= value // base <= CONFIG["ROWS"] for value in dollars):
+            return base
+    return None
+
+def infer_rows(round_data):
+    """
+    Returns (rows, base) for one round: a list of board rows per category, 0 where unknown.
+    A recorded row is used as is; otherwise regular clues are placed by value, and a run of
+    clues without a value (Daily Doubles) by the free rows between its neighbours, when
+    there are exactly as many free rows as clues. Clues are stored top row first.
+    """
+    regular = [clue.dollars for category in round_data.categories for clue in category.clues
+               if clue.dollars and not clue.daily_double]
+    base = round_base(round_data.name, regular) if regular else None
+    all_rows = []
+    for category in round_data.categories:
+        rows = [clue.row or (clue.dollars // base if base and clue.dollars and not clue.daily_double else 0)
+                for clue in category.clues]
+        i = 0
+        while i < len(rows):
+            if rows[i]:
+                i += 1
+                continue
+            end = i
+            while end < len(rows) and not rows[end]:
+                end += 1
+            low = rows[i - 1] if i else 0
+            high = rows[end] if end < len(rows) else CONFIG["ROWS"] + 1
+            if high - low - 1 == end - i:
+                rows[i:end] = range(low + 1, high)
+            i = end
+        all_rows.append(rows)
+    return all_rows, base
+
+class ValueTable:
+    """Columnar table of every clue's round, board position, value and outcome."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.fingerprint = _fingerprint()
+        self._load()
+
+    def _reset(self):
+        self.data = {column: np.zeros(0, dtype=dtype) for column, dtype in zip(COLUMNS, (
+            np.int32, np.int32, np.int32, np.int32, np.int8, np.int8, np.int8, np.int32, np.int32, bool, bool))}
+        self.seasons, self.games, self.stamps, self.categories = [], [], [], []
+        self.vocabulary = AnswerVocabulary()
+        self.data_path = None
+
+    def _load(self):
+        self._reset()
+        if not self.path:
+            return
+        try:
+            with np.load(self.path) as npz:
+                data = {column: npz[column] for column in COLUMNS}
+                tables = {table: npz[table].tolist() for table in TABLES}
+                fingerprint = str(npz["fingerprint"])
+                data_path = str(npz["data_path"])
+        except (OSError, ValueError, KeyError):
+            return
+        if fingerprint != self.fingerprint:
+            logging.info("Clue value table is out of date; rebuilding")
+            return
+        self.data = data
+        self.seasons, self.games, self.stamps, self.categories = tables["seasons"], tables["games"], tables["stamps"], tables["categories"]
+        self.data_path = data_path or None
+        self.vocabulary = AnswerVocabulary(zip(tables["answers"], tables["answer_labels"]))
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tables = {
+            "seasons": self.seasons, "games": self.games, "stamps": self.stamps, "categories": self.categories,
+            "answers": self.vocabulary.keys, "answer_labels": self.vocabulary.labels,
+        }
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, fingerprint=np.array(self.fingerprint), data_path=np.array(self.data_path or ""), **self.data,
+                 **{table: np.array(values, dtype=str) for table, values in tables.items()})
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.data["round"])
+
+    def update(self, data_path=None, locators=None):
+        """
+        Adds the games not in the table yet (of `locators`, or every game under data_path) and
+        saves it if it has a path. With data_path, starts over if the table holds another
+        directory's games or one of its games changed or disappeared. Returns the games added.
+        """
+        known = dict(zip(self.games, self.stamps))
+        rebuild = False
+        if locators is None:
+            data_path = os.path.abspath(data_path or CONFIG["DATA_PATH"])
+            rebuild, locators, stamps = game_store.pending_games(data_path, self.data_path, known, "clue value table")
+            if rebuild:
+                self._reset()
+            self.data_path = data_path
+        else:
+            stamps = game_store.game_stamps(locators)
+            locators = [loc for loc in locators if game_store.game_key(loc) not in known]
+        logging.info(f"{len(self.games)} games in the clue value table, {len(locators)} to add")
+        if not locators:
+            if rebuild and self.path:
+                self.save()
+            return 0
+
+        def intern_id(table, lookup, value):
+            if value not in lookup:
+                lookup[value] = len(table)
+                table.append(value)
+            return lookup[value]
+
+        season_ids = {season: i for i, season in enumerate(self.seasons)}
+        category_ids = {name: i for i, name in enumerate(self.categories)}
+        new = {column: [] for column in COLUMNS}
+        for locator, game in game_store.iter_games(locators, typed=True):
+            with timed("extract"):
+                season_idx = intern_id(self.seasons, season_ids, game_store.season_of(locator))
+                game_idx = len(self.games)
+                self.games.append(game_store.game_key(locator))
+                self.stamps.append(stamps[game_store.game_key(locator)])
+                for round_data in game.rounds:
+                    if round_data.name not in ROUNDS:
+                        continue
+                    round_idx = ROUNDS.index(round_data.name)
+                    rows, base = infer_rows(round_data) if not round_data.is_final else ([[]] * len(round_data.categories), None)
+                    for column, (category, category_rows) in enumerate(zip(round_data.categories, rows)):
+                        category_idx = intern_id(self.categories, category_ids, category.name or "")
+                        for i, clue in enumerate(category.clues):
+                            row = category_rows[i] if category_rows else 0
+                            if clue.daily_double:
+                                board_value = row * base if row and base else 0
+                            else:
+                                board_value = clue.dollars or 0
+                            answer = self.vocabulary.id_of(clue.answer)
+                            new["season"].append(season_idx)
+                            new["game"].append(game_idx)
+                            new["category"].append(category_idx)
+                            new["answer"].append(-1 if answer is None else answer)
+                            new["round"].append(round_idx)
+                            new["column"].append(column)
+                            new["row"].append(row)
+                            new["board_value"].append(board_value)
+                            new["wager"].append((clue.dollars or 0) if clue.daily_double else 0)
+                            new["daily_double"].append(clue.daily_double)
+                            new["stumper"].append(clue.triple_stumper)
+
+        with timed("concatenate"):
+            for column in COLUMNS:
+                self.data[column] = np.concatenate([self.data[column], np.array(new[column], dtype=self.data[column].dtype)])
+        if self.path:
+            self.save()
+        return len(locators)
+
+    def _mask(self, rounds=None):
+        if rounds is None:
+            return np.ones(len(self), dtype=bool)
+        return np.isin(self.data["round"], [ROUNDS.index(r) for r in rounds])
+
+    def position_rates(self):
+        """
+        Returns (clues, stumpers, daily_doubles), each a (len(ROUNDS), ROWS + 1) array indexed
+        by round and row; row 0 collects clues whose row is unknown.
+        """
+        d = self.data
+        cell = d["round"].astype(np.int64) * (CONFIG["ROWS"] + 1) + d["row"]
+        shape = (len(ROUNDS), CONFIG["ROWS"] + 1)
+        size = shape[0] * shape[1]
+        clues = np.bincount(cell, minlength=size).reshape(shape)
+        stumpers = np.bincount(cell, weights=d["stumper"], minlength=size).reshape(shape)
+        daily_doubles = np.bincount(cell, weights=d["daily_double"], minlength=size).reshape(shape)
+        return clues, stumpers.astype(np.int64), daily_doubles.astype(np.int64)
+
+    def daily_double_grid(self, rounds=None):
+        """Returns a (ROWS, COLUMNS) count of Daily Doubles by board position."""
+        d = self.data
+        mask = self._mask(rounds or ROUNDS[:2]) & d["daily_double"] & (d["row"] > 0) & (d["column"] < CONFIG["COLUMNS"])
+        cell = (d["row"][mask].astype(np.int64) - 1) * CONFIG["COLUMNS"] + d["column"][mask]
+        return np.bincount(cell, minlength=CONFIG["ROWS"] * CONFIG["COLUMNS"]).reshape(CONFIG["ROWS"], CONFIG["COLUMNS"])
+
+    def value_rates(self, rounds=None):
+        """Returns {(round, board value): (clues, stumpers)} over clues with a known value."""
+        d = self.data
+        mask = self._mask(rounds) & (d["board_value"] > 0)
+        keys, inverse = np.unique(np.stack([d["round"][mask].astype(np.int64), d["board_value"][mask]]), axis=1, return_inverse=True)
+        clues = np.bincount(inverse.ravel(), minlength=keys.shape[1])
+        stumpers = np.bincount(inverse.ravel(), weights=d["stumper"][mask], minlength=keys.shape[1])
+        return {(ROUNDS[r], int(v)): (int(c), int(s)) for (r, v), c, s in zip(keys.T, clues, stumpers)}
+
+    def expected_stumpers(self):
+        """Each clue's Triple Stumper rate given only its round and row: the board-position baseline."""
+        clues, stumpers, _ = self.position_rates()
+        rates = np.divide(stumpers, clues, out=np.zeros(clues.shape), where=clues > 0)
+        return rates[self.data["round"], self.data["row"]]
+
+    def category_difficulty(self, min_clues=None, top_n=None, aliases=None):
+        """
+        Ranks categories by Triple Stumpers relative to what their clues' board positions
+        predict (observed / expected). Also reports the value-weighted stumper rate, the share
+        of the category's board dollars that went unanswered. Spelling variants are merged
+        through the persisted alias table (categories.load_aliases) by default.
+        """
+        d = self.data
+        min_clues = min_clues or CONFIG["MIN_CATEGORY_CLUES"]
+        aliases = categories.load_aliases() if aliases is None else aliases
+        # The table keeps raw names and the aliases are applied here, as archive_db's
+        # canonical_category does, so rebuilding the alias table never invalidates it.
+        names, canonical = np.unique(np.array([categories.canonical_category(name, aliases) for name in self.categories] or [""]),
+                                     return_inverse=True)
+        n = len(names)
+        mask = self._mask(ROUNDS[:2])
+        category = canonical.ravel()[d["category"][mask]]
+        clues = np.bincount(category, minlength=n)
+        stumpers = np.bincount(category, weights=d["stumper"][mask], minlength=n)
+        expected = np.bincount(category, weights=self.expected_stumpers()[mask], minlength=n)
+        dollars = np.bincount(category, weights=d["board_value"][mask], minlength=n)
+        stumped_dollars = np.bincount(category, weights=(d["board_value"] * d["stumper"])[mask], minlength=n)
+
+        eligible = np.flatnonzero((clues >= min_clues) & (expected > 0))
+        ratio = stumpers[eligible] / expected[eligible]
+        order = eligible[np.argsort(-ratio, kind='stable')][:top_n or CONFIG["TOP_N"]]
+        return [{
+            "category": str(names[i]),
+            "clues": int(clues[i]),
+            "stumpers": int(stumpers[i]),
+            "expected_stumpers": round(float(expected[i]), 1),
+            "difficulty": round(float(stumpers[i] / expected[i]), 3),
+            "value_weighted_stumper_rate": round(float(stumped_dollars[i] / dollars[i]), 4) if dollars[i] else None,
+        } for i in order]
+
+    def answer_values(self, top_n=None, scale=1.0):
+        """Ranks answers by the board dollars of their clues. `scale` multiplies the counts (for samples)."""
+        d = self.data
+        mask = d["answer"] >= 0
+        answer = d["answer"][mask]
+        n = len(self.vocabulary)
+        clues = np.bincount(answer, minlength=n)
+        dollars = np.bincount(answer, weights=d["board_value"][mask], minlength=n)
+        stumpers = np.bincount(answer, weights=d["stumper"][mask], minlength=n)
+        positioned = mask & (d["row"] > 0)
+        row_sum = np.bincount(d["answer"][positioned], weights=d["row"][positioned], minlength=n)
+        row_count = np.bincount(d["answer"][positioned], minlength=n)
+        order = np.argsort(-dollars, kind='stable')[:top_n or CONFIG["TOP_N"]]
+        return [{
+            "answer": self.vocabulary.labels[i],
+            "clues": round(int(clues[i]) * scale),
+            "board_dollars": round(float(dollars[i]) * scale),
+            "mean_row": round(float(row_sum[i] / row_count[i]), 2) if row_count[i] else None,
+            "stumper_rate": round(float(stumpers[i] / clues[i]), 4) if clues[i] else None,
+        } for i in order if dollars[i] > 0]
+
+def load_table(data_path=None, path=None):
+    """Returns the clue value table, first adding any games that are not in it yet."""
+    table = ValueTable(path or CONFIG["TABLE_PATH"])
+    table.update(data_path)
+    return table
+
+def plot_values(table, output_file=None, scale=1.0):
+    """Writes the value analytics chart: stumper rate and Daily Doubles by board position, hardest categories and top answers by dollars."""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    output_file = output_file or CONFIG["OUTPUT_HTML_FILE"]
+    clues, stumpers, daily_doubles = table.position_rates()
+    rows = list(range(1, CONFIG["ROWS"] + 1))
+    fig = make_subplots(
+        rows=2, cols=2, horizontal_spacing=0.22, vertical_spacing=0.14,
+        subplot_titles=("Triple Stumper rate by board row", "Where the Daily Doubles are",
+                        "Hardest categories for their board positions", "Answers worth the most on the board"),
+    )
+
+    for round_idx, label in ((0, "Jeopardy!"), (1, "Double Jeopardy!")):
+        counts = clues[round_idx, 1:]
+        rates = np.divide(stumpers[round_idx, 1:], counts, out=np.zeros(len(counts)), where=counts > 0)
+        dd_share = np.divide(daily_doubles[round_idx, 1:], counts, out=np.zeros(len(counts)), where=counts > 0)
+        fig.add_trace(go.Scatter(
+            x=rows, y=rates, mode='lines+markers', name=label,
+            customdata=np.stack([counts, dd_share], axis=1),
+            hovertemplate=f"<b>{label}</b> row %{{x}}<br>Triple Stumper rate: %{{y:.1%}}<br>Clues: %{{customdata[0]:,}}<br>"
+                          "Daily Doubles: %{customdata[1]:.1%}<extra></extra>",
+        ), row=1, col=1)
+
+    grid = table.daily_double_grid()
+    fig.add_trace(go.Heatmap(
+        z=grid, x=[f"Column {c}" for c in range(1, CONFIG["COLUMNS"] + 1)], y=[f"Row {r}" for r in rows],
+        colorscale="YlOrRd", showscale=False,
+        hovertemplate="%{y}, %{x}<br>Daily Doubles: %{z:,}<extra></extra>",
+    ), row=1, col=2)
+
+    hardest = table.category_difficulty()[::-1]
+    fig.add_trace(go.Bar(
+        x=[row["difficulty"] for row in hardest], y=[row["category"] for row in hardest], orientation='h',
+        marker_color="#C70039", showlegend=False,
+        customdata=[[row["clues"], row["stumpers"], row["expected_stumpers"], row["value_weighted_stumper_rate"] or 0] for row in hardest],
+        hovertemplate=("<b>%{y}</b><br>%{x:.2f}x the Triple Stumpers its board positions predict<br>Clues: %{customdata[0]}<br>"
+                       "Triple Stumpers: %{customdata[1]} (expected %{customdata[2]})<br>"
+                       "Board dollars unanswered: %{customdata[3]:.1%}<extra></extra>"),
+    ), row=2, col=1)
+
+    answers = table.answer_values(scale=scale)[::-1]
+    fig.add_trace(go.Bar(
+        x=[row["board_dollars"] for row in answers], y=[row["answer"] for row in answers], orientation='h',
+        marker_color="#3357FF", showlegend=False,
+        customdata=[[row["clues"], row["mean_row"] or 0, row["stumper_rate"] or 0] for row in answers],
+        hovertemplate=("<b>%{y}</b><br>Board dollars: $%{x:,}<br>Clues: %{customdata[0]:,}<br>"
+                       "Mean row: %{customdata[1]:.2f}<br>Triple Stumper rate: %{customdata[2]:.1%}<extra></extra>"),
+    ), row=2, col=2)
+
+    fig.update_yaxes(tickformat='.0%', title_text='Triple Stumper rate', row=1, col=1)
+    fig.update_xaxes(tickvals=rows, title_text='Row (top = lowest value)', row=1, col=1)
+    fig.update_yaxes(autorange='reversed', row=1, col=2)
+    fig.update_xaxes(title_text='Observed / expected Triple Stumpers', row=2, col=1)
+    fig.update_xaxes(title_text='Total board value ($)', row=2, col=2)
+    fig.update_layout(
+        plot_bgcolor='white', paper_bgcolor='white', height=1000,
+        legend=dict(x=0.30, y=1.0), font=dict(family="Arial, sans-serif"),
+    )
+    fig.write_html(output_file)
+    print(f"Value analytics chart saved to {output_file}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Analyse clue values, Daily Doubles and board positions, and chart them.")
+    parser.add_argument("--data-path", default=CONFIG["DATA_PATH"])
+    parser.add_argument("--table", default=CONFIG["TABLE_PATH"])
+    parser.add_argument("--top-n", type=int, default=CONFIG["TOP_N"])
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+    CONFIG["TOP_N"] = args.top_n
+
+    report = RunReport("values")
+    sample = sampling.load_sample(args.data_path, args.sample) if args.sample else None
+    with report.stage("update") as stage:
+        if sample:
+            table = ValueTable()
+            stage.items = table.update(locators=sample.locators)
+        else:
+            table = ValueTable(args.table)
+            stage.items = table.update(args.data_path)
+
+    with report.stage("analyse", items=len(table)):
+        clues, stumpers, daily_doubles = table.position_rates()
+        known = clues[:2, 1:].sum() / max(1, clues[:2].sum())
+    print(f"{len(table)} clues from {len(table.games)} games; board row known for {known:.1%} of regular-round clues")
+    for round_idx in (0, 1):
+        rates = ", ".join(f"row {r}: {stumpers[round_idx, r] / clues[round_idx, r]:.1%}"
+                          for r in range(1, CONFIG["ROWS"] + 1) if clues[round_idx, r])
+        print(f"  {ROUNDS[round_idx]} Triple Stumper rate by row: {rates}")
+
+    output_file = sampling.output_path(CONFIG["OUTPUT_HTML_FILE"]) if sample else CONFIG["OUTPUT_HTML_FILE"]
+    with report.stage("write_html"):
+        plot_values(table, output_file, sample.scale if sample else 1.0)
+        if sample:
+            sampling.mark_preview(output_file, sample.note())
+    report.finish()
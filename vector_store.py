@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+# --- Configuration ---
+CONFIG = {
+    "DTYPES": ["float32", "float16", "int8"],
+    "BATCH_ROWS": 16384,    # stored rows decoded at a time while scoring
+    "RECALL_QUERIES": 200,
+    "RECALL_K": 10,
+    "SEED": 1984,
+}
+
+# Vectors are stored L2-normalized, so cosine similarity is a plain dot product, in one
+# of three encodings: float32; float16 (half the size); or int8 with symmetric per-row
+# scalar quantization, codes = round(v / scale) with scale = max|v| / 127 (a quarter of
+# the size plus one float32 per row). Files, opened memory-mapped:
+#   <name>.npy          the codes
+#   <name>.scales.npy   int8 only: the per-row scales
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def quantize(vectors, dtype):
+    """Normalizes and encodes vectors. Returns (codes, scales); scales is None unless dtype is int8."""
+    if dtype not in CONFIG["DTYPES"]:
+        raise ValueError(f"unknown vector dtype {dtype!r}; expected one of {', '.join(CONFIG['DTYPES'])}")
+    vectors = normalize(vectors)
+    if dtype != "int8":
+        return vectors.astype(dtype), None
+    scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(scales == 0, 1, scales).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+def store_paths(path):
+    """Returns (codes file, scales file) for a store saved at `path` (with or without .npy)."""
+    codes_path = path if path.endswith(".npy") else path + ".npy"
+    return codes_path, codes_path[:-len(".npy")] + ".scales.npy"
+
+def _save_atomic(path, array):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+class VectorStore:
+    """Normalized vectors in a float32, float16 or int8 encoding, scored without decoding the whole store."""
+
+    def __init__(self, codes, scales=None):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_vectors(cls, vectors, dtype):
+        return cls(*quantize(vectors, dtype))
+
+    @classmethod
+    def open(cls, path):
+        codes_path, scales_path = store_paths(path)
+        codes = np.load(codes_path, mmap_mode='r')
+        scales = np.load(scales_path) if codes.dtype == np.int8 else None
+        return cls(codes, scales)
+
+    def save(self, path):
+        codes_path, scales_path = store_paths(path)
+        if os.path.dirname(codes_path):
+            os.makedirs(os.path.dirname(codes_path), exist_ok=True)
+        if self.scales is not None:
+            _save_atomic(scales_path, self.scales)
+        _save_atomic(codes_path, np.asarray(self.codes))
+
+    def append(self, vectors):
+        """Returns a new in-memory store with `vectors` encoded and added after the existing rows."""
+        codes, scales = quantize(vectors, self.dtype)
+        return VectorStore(np.concatenate([self.codes, codes]),
+                           None if scales is None else np.concatenate([self.scales, scales]))
+
+    @property
+    def dtype(self):
+        return self.codes.dtype.name
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, rows):
+        """Decodes the selected rows (an index, slice or index array) to float32."""
+        vectors = np.asarray(self.codes[rows], dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * (self.scales[rows][..., None] if vectors.ndim > 1 else self.scales[rows])
+        return vectors
+
+    def similarity(self, queries):
+        """
+        Returns the (len(queries), len(self)) cosine similarities of normalized float32
+        queries to every stored vector. Codes are upcast CONFIG["BATCH_ROWS"] rows at a
+        time and int8 scores are rescaled afterwards, so no decoded copy of the store exists.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.dtype == "float32" and len(self) <= CONFIG["BATCH_ROWS"]:
+            return queries @ np.asarray(self.codes).T
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start, block in self._score_blocks(queries):
+            scores[:, start:start + block.shape[1]] = block
+        return scores
+
+    def _score_blocks(self, queries):
+        for start in range(0, len(self), CONFIG["BATCH_ROWS"]):
+            stop = start + CONFIG["BATCH_ROWS"]
+            scores = queries @ np.asarray(self.codes[start:stop], dtype=np.float32).T
+            if self.scales is not None:
+                scores *= self.scales[start:stop]
+            yield start, scores
+
+    def top_k(self, queries, k, exclude=None):
+        """
+        Returns (indices, scores), each (len(queries), k), best first. `exclude` optionally
+        gives one row per query to leave out (the query's own row). Only a running top k is
+        kept per query, so memory does not grow with the size of the store.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        best = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start, scores in self._score_blocks(queries):
+            if exclude is not None:
+                local = np.asarray(exclude) - start
+                inside = (local >= 0) & (local < scores.shape[1])
+                scores[np.flatnonzero(inside), local[inside]] = -np.inf
+            block_k = min(k, scores.shape[1])
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            best = np.concatenate([best, top + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            if best.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best, best_scores = np.take_along_axis(best, keep, axis=1), np.take_along_axis(best_scores, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+def _file_bytes(path):
+    return sum(os.path.getsize(p) for p in store_paths(path) if os.path.exists(p))
+
+def recall_report(vectors, dtypes=None, num_queries=None, k=None):
+    """
+    Compares each encoding with exact float32 search over the same vectors: recall@k of the
+    nearest neighbours of sampled rows, size on disk, peak heap allocated while opening the
+    store and answering the queries (memory-mapped pages are not counted), and time.
+    float32 is measured the way the .npy cache used to be read, fully loaded into RAM.
+    """
+    dtypes = dtypes or CONFIG["DTYPES"]
+    vectors = normalize(vectors)
+    k = min(k or CONFIG["RECALL_K"], len(vectors) - 1)
+    rng = np.random.default_rng(CONFIG["SEED"])
+    query_rows = rng.choice(len(vectors), size=min(num_queries or CONFIG["RECALL_QUERIES"], len(vectors)), replace=False)
+    queries = vectors[query_rows]
+    exact, _ = VectorStore(vectors).top_k(queries, k, exclude=query_rows)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for dtype in dtypes:
+            path = os.path.join(tmp_dir, f"vectors_{dtype}.npy")
+            VectorStore.from_vectors(vectors, dtype).save(path)
+            tracemalloc.start()
+            start = time.perf_counter()
+            store = VectorStore(np.load(path)) if dtype == "float32" else VectorStore.open(path)
+            loaded = time.perf_counter()
+            found, _ = store.top_k(queries, k, exclude=query_rows)
+            finished = time.perf_counter()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            hits = sum(len(np.intersect1d(a, b)) for a, b in zip(found, exact))
+            results.append({
+                "dtype": dtype,
+                "vectors": len(vectors),
+                "dim": vectors.shape[1],
+                "file_mb": round(_file_bytes(path) / 1e6, 3),
+                "peak_heap_mb": round(peak / 1e6, 3),
+                "open_ms": round(1000 * (loaded - start), 3),
+                "query_ms": round(1000 * (finished - loaded) / len(queries), 4),
+                f"recall_at_{k}": round(hits / (k * len(queries)), 4),
+            })
+            del store
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Quantized, memory-mapped vector storage.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="Encode a float32 .npy file as a quantized store.")
+    convert.add_argument("source")
+    convert.add_argument("destination")
+    convert.add_argument("--dtype", choices=CONFIG["DTYPES"], default="int8")
+    report = commands.add_parser("report", help="Measure recall, memory and latency of each encoding.")
+    report.add_argument("source", help="A float32 .npy file of vectors, e.g. the stumper_graph clue embedding cache.")
+    report.add_argument("--dtypes", nargs="+", choices=CONFIG["DTYPES"], default=CONFIG["DTYPES"])
+    report.add_argument("--queries", type=int, default=CONFIG["RECALL_QUERIES"])
+    report.add_argument("-k", type=int, default=CONFIG["RECALL_K"])
+    report.add_argument("--output", help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        store = VectorStore.from_vectors(np.load(args.source, mmap_mode='r'), args.dtype)
+        store.save(args.destination)
+        logging.info(f"Wrote {len(store)} {args.dtype} vectors ({store.nbytes / 1e6:.1f} MB) to {store_paths(args.destination)[0]}")
+    else:
+        results = recall_report(np.load(args.source, mmap_mode='r'), args.dtypes, args.queries, args.k)
+        for row in results:
+            print("  ".join(f"{key}={value}" for key, value in row.items()))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=4)
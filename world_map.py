@@ -1,86 +1,41 @@
-import os
-import json
-import pandas as pd
-import plotly.express as px
 from collections import defaultdict
 import pycountry
 import textwrap
+import game_store
+from answers import canonical_answer
+from entities import get_country_name_map
+from instrumentation import RunReport, timed
 
-def get_country_counts():
+OUTPUT_HTML_FILE = "charts/jeopardy_answers_by_country.html"
+
+def get_country_counts(data_path='data', game_files=None):
     """
     Parses Jeopardy data, mapping all country name variations to a standard
     3-letter ISO code for reliable plotting.
     """
     country_counts = defaultdict(int)
     country_clues = defaultdict(list)
-    
-    name_map = {}
-    for country in pycountry.countries:
-        name_map[country.name] = country.alpha_3
-        if hasattr(country, 'common_name'):
-            name_map[country.common_name] = country.alpha_3
-        if hasattr(country, 'official_name'):
-            name_map[country.official_name] = country.alpha_3
-
-    manual_aliases = {
-        # General Aliases
-        'Turkey': 'TUR',
-        'Türkiye': 'TUR',
-        'Russia': 'RUS',
-        'U.S.A.': 'USA',
-        'USA': 'USA',
-        'The United States': 'USA',
-        'Great Britain': 'GBR',
-        'UK': 'GBR',
-        'England': 'GBR',
-        'Holland': 'NLD',
-        'South Korea': 'KOR',
-        'North Korea': 'PRK',
-        'Vietnam': 'VNM',
-        'The Vatican': 'VAT',
-        'Vatican City': 'VAT',
-        'Soviet Union': 'RUS',
-        'U.S.S.R.': 'RUS',
-        'USSR': 'RUS',
-        'Swaziland': 'SWZ',
-        'Zaire': 'COD',
-        'DRC': 'COD',
-        'DR Congo': 'COD',
-        'Congo, Democratic Republic of the': 'COD',
-    }
-    name_map.update(manual_aliases)
+    name_map = get_country_name_map()
 
-    for season_dir in os.listdir('data'):
-        season_path = os.path.join('data', season_dir)
-        if os.path.isdir(season_path):
-            for episode_file in os.listdir(season_path):
-                if episode_file.endswith('.json'):
-                    with open(os.path.join(season_path, episode_file), 'r', encoding='utf-8') as f:
-                        try:
-                            data = json.load(f)
-                            for round_data in data.get('rounds', []):
-                                for category in round_data.get('categories', []):
-                                    category_name = category.get('name', 'N/A')
-                                    for clue in category.get('clues', []):
-                                        answer = clue.get('answer', '')
-                                        if answer in name_map:
-                                            iso_code = name_map[answer]
-                                            country_counts[iso_code] += 1
-                                            if len(country_clues[iso_code]) < 5:
-                                                clue_info = {
-                                                    'category': category_name,
-                                                    'clue': clue.get('clue', '')
-                                                }
-                                                country_clues[iso_code].append(clue_info)
-                        except (json.JSONDecodeError, KeyError) as e:
-                            print(f"Skipping file {episode_file} due to error: {e}")
-                            continue
+    if game_files is None:
+        game_files = game_store.list_games(data_path)
+    for _, game in game_store.iter_games(game_files, typed=True):
+        with timed("scan"):
+            for _, category, clue in game.iter_clues():
+                answer = canonical_answer(clue.answer)
+                if answer in name_map:
+                    iso_code = name_map[answer]
+                    country_counts[iso_code] += 1
+                    if len(country_clues[iso_code]) < 5:
+                        clue_info = {
+                            'category': category.name or 'N/A',
+                            'clue': clue.clue
+                        }
+                        country_clues[iso_code].append(clue_info)
     return country_counts, country_clues
 
-def create_world_map(country_counts, country_clues):
-    """
-    Creates the world map using ISO-3 codes for location and wraps hover text.
-    """
+def _map_rows(country_counts, country_clues):
+    """One row per country: ISO code, name, count and wrapped hover text."""
     iso_codes = list(country_counts.keys())
     counts = list(country_counts.values())
     
@@ -105,13 +60,28 @@ def create_world_map(country_counts, country_clues):
         )
         hover_texts.append(hover_text)
 
-    data = {
+    return {
         'iso_code': iso_codes,
         'country_name': [iso_to_name.get(code, code) for code in iso_codes],
         'count': counts,
         'hover_text': hover_texts
     }
-    df = pd.DataFrame(data)
+
+def create_world_map(country_counts, country_clues, output_file=OUTPUT_HTML_FILE, frames=None):
+    """
+    Creates the world map using ISO-3 codes for location and wraps hover text.
+    With frames, a list of (season, country_counts, country_clues), the map is
+    animated with one frame per season on a shared color scale.
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    animation = {}
+    if frames:
+        df = pd.concat([pd.DataFrame(_map_rows(counts, clues)).assign(season=season) for season, counts, clues in frames])
+        animation = dict(animation_frame="season", range_color=(0, max(df['count'].max(), 1)))
+    else:
+        df = pd.DataFrame(_map_rows(country_counts, country_clues))
 
     fig = px.choropleth(
         df,
@@ -121,6 +91,7 @@ def create_world_map(country_counts, country_clues):
         hover_name="country_name",
         custom_data=['hover_text'],
         color_continuous_scale=['#FFFFFF', '#070973'], # MODIFIED: Custom color scale
+        **animation
     )
     
     fig.update_traces(hovertemplate='%{customdata}<extra></extra>')
@@ -139,12 +110,41 @@ def create_world_map(country_counts, country_clues):
         )
     )
 
-    fig.write_html("charts/jeopardy_answers_by_country.html")
-    print("Map has been generated and saved as charts/jeopardy_answers_by_country.html")
+    fig.write_html(output_file)
+    print(f"Map has been generated and saved as {output_file}")
 
 
 if __name__ == "__main__":
+    import argparse
+    import count_cube
+    import sampling
+
+    parser = argparse.ArgumentParser(description="Map how often each country is an answer.")
+    count_cube.add_arguments(parser)
+    sampling.add_arguments(parser)
+    args = parser.parse_args()
+    sampling.check_arguments(parser, args)
+
+    report = RunReport("world_map")
+    frames = None
     print("Analyzing Jeopardy data...")
-    country_counts, country_clues = get_country_counts()
+    with report.stage("get_country_counts") as stage:
+        if args.sample:
+            sample = sampling.load_sample(args.data_path, args.sample)
+            country_counts, country_clues, bounds = sampling.estimate(sample, lambda games: get_country_counts(game_files=games), max_clues=5)
+            sampling.log_bounds(country_counts, bounds)
+        elif args.seasons or args.animate:
+            cube = count_cube.load_cube(args.data_path)
+            seasons = count_cube.parse_seasons(args.seasons)
+            country_counts, country_clues = cube.slice("country", seasons)
+            frames = cube.frames("country", seasons) if args.animate else None
+        else:
+            country_counts, country_clues = get_country_counts(args.data_path)
+        stage.items = sum(country_counts.values())
     print("Generating world map...")
-    create_world_map(country_counts, country_clues)
\ No newline at end of file
+    with report.stage("write_html", items=len(country_counts)):
+        output_file = sampling.output_path(OUTPUT_HTML_FILE) if args.sample else count_cube.output_path(OUTPUT_HTML_FILE, args.seasons, args.animate)
+        create_world_map(country_counts, country_clues, output_file, frames)
+        if args.sample:
+            sampling.mark_preview(output_file, sample.note(sampling.relative_bound(country_counts, bounds)))
+    report.finish()
@@ -1,31 +1,22 @@
-import os
-import json
-import re
 from collections import Counter, defaultdict
-import pandas as pd
-import plotly.express as px
 import logging
 import textwrap
+import game_store
+from entities import find_years
+from instrumentation import RunReport, timed
 
 # --- Configuration ---
 CONFIG = {
     "BASE_DATA_PATH": "data/",
     "OUTPUT_HTML_FILE": "charts/jeopardy_year_frequency_clues.html",
-    "START_YEAR": 1400,
-    "END_YEAR": 2025
 }
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def get_all_game_files(base_path):
-    """Recursively finds all .json game files in the base data directory."""
-    json_files = []
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.endswith('.json'):
-                json_files.append(os.path.join(root, file))
-    return json_files
+    """Finds all games under the base data directory, as per-game JSON files or season bundles."""
+    return game_store.list_games(base_path)
 
 def aggregate_year_mentions(game_files):
     """
@@ -36,45 +27,25 @@ def aggregate_year_mentions(game_files):
     year_clues = defaultdict(list)
 
     logging.info(f"Processing {len(game_files)} game files to find year mentions and clues...")
-    
-    # MODIFIED: This regex finds a 4-digit number that is NOT followed by "B.C." or "BC"
-    pattern = r'\b(\d{4})\b(?!\s*B\.?\s*C\.?)'
-
-    for file_path in game_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            for round_data in data.get("rounds", []):
-                for category in round_data.get("categories", []):
-                    category_name = category.get("name", "N/A")
-                    for clue in category.get("clues", []):
-                        clue_text = clue.get("clue", "")
-                        
-                        # Find all valid years in the clue using the new pattern
-                        valid_years = re.findall(pattern, clue_text, re.IGNORECASE)
-                        
-                        for year_str in valid_years:
-                            year_int = int(year_str)
-                            if CONFIG["START_YEAR"] <= year_int <= CONFIG["END_YEAR"]:
-                                year_counts[year_int] += 1
-                                year_clues[year_int].append({
-                                    "clue": clue.get("clue", "N/A"),
-                                    "answer": clue.get("answer", "N/A"),
-                                    "category": category_name
-                                })
-        except (json.JSONDecodeError, KeyError) as e:
-            logging.warning(f"Skipping malformed file {file_path}: {e}")
-            continue
+
+    for _, game in game_store.iter_games(game_files, typed=True):
+        for _, category, clue in game.iter_clues():
+            with timed("regex_scan"):
+                valid_years = find_years(clue.clue)
+            
+            for year_int in valid_years:
+                year_counts[year_int] += 1
+                year_clues[year_int].append({
+                    "clue": clue.clue,
+                    "answer": clue.answer,
+                    "category": category.name or "N/A"
+                })
             
     return year_counts, year_clues
 
-def plot_year_frequency(year_counts, year_clues):
-    """
-    Creates and saves a bar chart with detailed, category-inclusive clue information in the hover labels.
-    """
-    if not year_counts:
-        logging.warning("No year data to plot.")
-        return
+def _year_frame(year_counts, year_clues):
+    """One row per year: frequency and hover text."""
+    import pandas as pd
 
     df = pd.DataFrame(year_counts.items(), columns=['Year', 'Frequency']).sort_values(by='Year')
 
@@ -107,15 +78,39 @@ def plot_year_frequency(year_counts, year_clues):
         hover_texts.append(hover_text)
     
     df['hover_text'] = hover_texts
+    return df
 
-    logging.info(f"Generating bar chart for {len(df)} unique years...")
+def plot_year_frequency(year_counts, year_clues, output_file=None, frames=None):
+    """
+    Creates and saves a bar chart with detailed, category-inclusive clue information in the hover labels.
+    With frames, a list of (season, year_counts, year_clues), the chart is animated with
+    one frame per season on shared axes.
+    """
+    if not year_counts:
+        logging.warning("No year data to plot.")
+        return
+
+    import pandas as pd
+    import plotly.express as px
+
+    output_file = output_file or CONFIG['OUTPUT_HTML_FILE']
+    animation = {}
+    if frames:
+        df = pd.concat([_year_frame(counts, clues).assign(Season=season) for season, counts, clues in frames if counts])
+        animation = dict(animation_frame='Season', range_x=(df['Year'].min() - 1, df['Year'].max() + 1),
+                         range_y=(0, df['Frequency'].max() * 1.05))
+    else:
+        df = _year_frame(year_counts, year_clues)
+
+    logging.info(f"Generating bar chart for {df['Year'].nunique()} unique years...")
     
     fig = px.bar(
         df,
         x='Year',
         y='Frequency',
         custom_data=['hover_text'],
-        labels={'Year': 'Year Mentioned in Clue', 'Frequency': 'Number of Mentions'}
+        labels={'Year': 'Year Mentioned in Clue', 'Frequency': 'Number of Mentions'},
+        **animation
     )
     
     fig.update_traces(hovertemplate='%{customdata}<extra></extra>')
@@ -132,10 +127,48 @@ def plot_year_frequency(year_counts, year_clues):
         )
     )
 
-    fig.write_html(CONFIG['OUTPUT_HTML_FILE'])
-    logging.info(f"Success! Open '{CONFIG['OUTPUT_HTML_FILE']}' in your browser to view the chart.")
+    fig.write_html(output_file)
+    logging.info(f"Success! Open '{output_file}' in your browser to view the chart.")
 
 if __name__ == "__main__":
-    game_files = get_all_game_files(CONFIG['BASE_DATA_PATH'])
-    year_counts, year_clues = aggregate_year_mentions(game_files)
-    plot_year_frequency(year_counts, year_clues)
\ No newline at end of file
+    import argparse
+    import count_cube
+    import sampling
+
+    parser = argparse.ArgumentParser(description="Chart the years mentioned in clues.")
+    count_cube.add_arguments(parser)
+    sampling.add_arguments(parser)
+    parser.set_defaults(data_path=CONFIG['BASE_DATA_PATH'])
+    args = parser.parse_args()
+    sampling.check_arguments(parser, args)
+
+    report = RunReport("years")
+    frames = None
+    if args.sample:
+        with report.stage("sample_year_mentions") as stage:
+            sample = sampling.load_sample(args.data_path, args.sample)
+            year_counts, year_clues, bounds = sampling.estimate(sample, aggregate_year_mentions)
+            sampling.log_bounds(year_counts, bounds)
+            stage.items = len(sample.locators)
+    elif args.seasons or args.animate:
+        with report.stage("count_cube") as stage:
+            cube = count_cube.load_cube(args.data_path)
+            seasons = count_cube.parse_seasons(args.seasons)
+            year_counts, year_clues = cube.slice("year", seasons)
+            frames = cube.frames("year", seasons) if args.animate else None
+            stage.items = len(year_counts)
+    else:
+        with report.stage("list_game_files") as stage:
+            game_files = get_all_game_files(args.data_path)
+            stage.items = len(game_files)
+        with report.stage("aggregate_year_mentions", items=len(game_files)):
+            year_counts, year_clues = aggregate_year_mentions(game_files)
+    with report.stage("write_html", items=len(year_counts)):
+        if args.sample:
+            output_file = sampling.output_path(CONFIG['OUTPUT_HTML_FILE'])
+        else:
+            output_file = count_cube.output_path(CONFIG['OUTPUT_HTML_FILE'], args.seasons, args.animate)
+        plot_year_frequency(year_counts, year_clues, output_file, frames)
+        if args.sample:
+            sampling.mark_preview(output_file, sample.note(sampling.relative_bound(year_counts, bounds)))
+    report.finish()
\ No newline at end of file